@@ -20,6 +20,13 @@ class BehaviorType:
     OFFSET_PURSUIT = 0x00010000
 
 
+# how much simulation an agent gets, by how far it is from the screen (see LOD_* in config.py)
+class LodTier:
+    ONSCREEN = 0 # steering, walls, rotated image and mask
+    NEAR = 1 # steering and walls - nothing to draw
+    FAR = 2 # coasts along its velocity every LOD_FAR_INTERVAL ticks
+
+
 # TODO: turn these into proper classes.  Inherit from the Agent class and override methods.  Create a collide_with_player() function as well.
 class AgentType(enum.Enum):
     KRILL = enum.auto()
@@ -41,3 +48,4 @@ SAFE_BUFFER = 100 # TODO: move this into a SafeXY() function
 # how far off screen to draw agents - arbitrary number that needs a better solution overall
 VIEW_OPTO_PIXEL_DISTANCE = -150
 
+AGENT_WALL_BOUNCE_ATTENUATION = 2.1
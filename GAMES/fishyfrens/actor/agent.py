@@ -7,6 +7,7 @@ import pygame
 
 from gamelib.globals import APP_SCREEN, SCREEN_WIDTH, SCREEN_HEIGHT
 from gamelib.colors import Colors
+from gamelib.assets import assets
 
 import fishyfrens.debug as debug
 from fishyfrens.config import *
@@ -14,30 +15,76 @@ from fishyfrens.config import *
 from fishyfrens.view.camera import camera
 
 
-AGENT_WALL_BOUNCE_ATTENUATION = 2.1
-
-
-from fishyfrens.actor import BehaviorType, AgentType, BoundaryBehaviour, SAFE_BUFFER, VIEW_OPTO_PIXEL_DISTANCE
+from fishyfrens.actor import BehaviorType, AgentType, BoundaryBehaviour, LodTier, SAFE_BUFFER, VIEW_OPTO_PIXEL_DISTANCE, AGENT_WALL_BOUNCE_ATTENUATION
 from fishyfrens.actor.boid import Boid
+from fishyfrens.actor.swarm import SwarmField
+from fishyfrens.actor.spatialgrid import SpatialHashGrid
+from fishyfrens.actor.rotationcache import rotation_cache
+
 
 
+# (file name prefix, how many) for each type of agent
+AGENT_IMAGE_FILES = {
+    AgentType.KRILL: ("krill", 4),
+    AgentType.FISH: ("fish", 17),
+    AgentType.FRENFISH: ("fren", 5),
+    AgentType.KRAKEN: ("enemy", 3),
+}
 
-def load_AGENT_IMAGES():
-    AGENT_IMAGES[AgentType.KRILL] = {i: pygame.image.load( os.path.join(MY_DIR, 'resources', 'img', f'krill{i}.png') ).convert_alpha() for i in range(4)}
-    AGENT_IMAGES[AgentType.FISH] = {i: pygame.image.load( os.path.join(MY_DIR, 'resources', 'img', f'fish{i}.png') ).convert_alpha() for i in range(17)}
-    AGENT_IMAGES[AgentType.FRENFISH] = {i: pygame.image.load( os.path.join(MY_DIR, 'resources', 'img', f'fren{i}.png') ).convert_alpha() for i in range(5)}
-    AGENT_IMAGES[AgentType.KRAKEN] = {i: pygame.image.load( os.path.join(MY_DIR, 'resources', 'img', f'enemy{i}.png') ).convert_alpha() for i in range(3)}
+# nothing is decoded at import - the App preloads these in the background while the splash screen is up
+AGENT_IMAGE_ASSETS = {
+    type: {i: assets().image(os.path.join(MY_DIR, 'resources', 'img', f'{prefix}{i}.png')) for i in range(count)}
+    for type, (prefix, count) in AGENT_IMAGE_FILES.items()
+}
 
 AGENT_IMAGES = {}
-load_AGENT_IMAGES()
+
+def load_AGENT_IMAGES() -> dict:
+    """ fill AGENT_IMAGES from the asset handles (waits for any still preloading) - only the first call does anything """
+    if AGENT_IMAGES:
+        return AGENT_IMAGES
+
+    for type, handles in AGENT_IMAGE_ASSETS.items():
+        AGENT_IMAGES[type] = {i: handle.get() for i, handle in handles.items()}
+
+    # every agent of the same type and subtype shares one set of rotated images / masks
+    for type, images in AGENT_IMAGES.items():
+        for subtype, image in images.items():
+            rotation_cache().register((type, subtype), image)
+
+    return AGENT_IMAGES
 
 
 
 
 class Agent(pygame.sprite.Sprite, Boid):
+    # while the agent is in a SwarmGroup these are views into its BoidSwarm (see actor/swarm.py)
+    _swarm = None
+    _slot = None
+    position = SwarmField()
+    velocity = SwarmField()
+    desired_velocity = SwarmField()
+    steering_force = SwarmField()
+    max_speed = SwarmField()
+    max_force = SwarmField()
+    decay_rate = SwarmField()
+    max_sight = SwarmField()
+    vel_coef = SwarmField()
+    behavior_type = SwarmField()
+    is_onscreen = SwarmField()
+    lod_tier = SwarmField()
+    far_ticks = SwarmField()
+    dead = SwarmField()
+    target = SwarmField()
+
     def __init__(self, type: AgentType):
         pygame.sprite.Sprite.__init__(self)
+        self.reset(type)
+
+
 
+    def reset(self, type: AgentType):
+        """ (re)roll everything about the agent - pooled agents are reset instead of being rebuilt (see actor/spawner.py) """
         # position = safeXY() #TODO
         position = pygame.Vector2(
             random.randint(SAFE_BUFFER, int(camera().playfield_width - SAFE_BUFFER)),
@@ -49,6 +96,8 @@ class Agent(pygame.sprite.Sprite, Boid):
             random.uniform(-1.5, 1.5)
         )
 
+        load_AGENT_IMAGES() # normally already done by the level setup
+
         self.type = type
         if type == AgentType.KRILL:
             self.subtype = random.randint(0, len(AGENT_IMAGES[AgentType.KRILL]) - 1)
@@ -136,52 +185,50 @@ class Agent(pygame.sprite.Sprite, Boid):
         # self.rect = self.image.get_rect()
         self.size = pygame.Vector2(self.image.get_size())
         self.rect = self.image.get_rect(topleft=self.position)
-        self.rotated_image = self.image
-        self.mask = pygame.mask.from_surface(self.image)
+        self.rotated_image, self.mask = rotation_cache().get((self.type, self.subtype), 0)
 
         self.hide_out_of_sight = False
         # self.hide_out_of_sight = True # TODO: make this a level variable / also, will error if agent has no target...
         self.dead = False
         self.is_onscreen = None
+        self.lod_tier = LodTier.ONSCREEN
+        self.far_ticks = 0
 
 
 
-    def update(self, all_actors: pygame.sprite.Group):
+    def update(self, neighbor_grid: SpatialHashGrid):
         if self.dead:
             return
 
-        # if agent position is visible on screen given camera offset
-        # NOTE: increases framerate on Dell Wyse from ~10 to ~
-        # TODO: do the same with draw...
-        if self.position.x - camera().offset.x < VIEW_OPTO_PIXEL_DISTANCE \
-            or self.position.x - camera().offset.x > SCREEN_WIDTH - VIEW_OPTO_PIXEL_DISTANCE \
-                or self.position.y - camera().offset.y < VIEW_OPTO_PIXEL_DISTANCE \
-                    or self.position.y - camera().offset.y > SCREEN_HEIGHT - VIEW_OPTO_PIXEL_DISTANCE:
-            self.is_onscreen = False
+        # the SwarmGroup has already moved the whole population this frame
+        if self._swarm is None:
+            # NOTE: skipping agents away from the screen increases framerate on Dell Wyse from ~10 to ~
+            self.lod_tier = self.lod()
+            self.is_onscreen = self.lod_tier == LodTier.ONSCREEN
+
+            if self.lod_tier == LodTier.FAR:
+                self.far_ticks += 1
+                if self.far_ticks % LOD_FAR_INTERVAL == 0:
+                    self.position += self.velocity * LOD_FAR_INTERVAL
+                    self.handle_walls()
+            else:
+                # super().update() # this is the Boid update() and isn't working - perhaps because there are multiple inherited classes?
+                self.update_steering( neighbor_grid )
+                self.handle_walls()
+
+        # nobody sees (or touches) agents off the screen, so they don't need a rotated image or mask
+        if not self.is_onscreen:
             return
-        else:
-            self.is_onscreen = True
-
-        # super().update() # this is the Boid update() and isn't working - perhaps because there are multiple inherited classes?
-        self.update_steering( all_actors )
-
-
-        if self.wall_behavior == BoundaryBehaviour.Bounce:
-            self.bounce_off_walls(attenuate=True)
-        elif self.wall_behavior == BoundaryBehaviour.Wrap:
-            self.wrap_screen()
-
 
         # NOTE: this is being done in draw (not sure i even need a rect...) but it also needs to be offset by the camera
         # self.rect.topleft = self.position
 
         # Update mask for pixel-perfect collision
-        # NOTE: Only necessary if the sprite's appearance or orientation changes
+        # NOTE: rotations are snapped to ROTATION_BUCKETS steps and shared with every agent of the same subtype
         self.rect.topleft = self.position
         angle = self.velocity.angle_to(self.image_orientation)
 
-        self.rotated_image = pygame.transform.rotate(self.image, angle)
-        self.mask = pygame.mask.from_surface(self.rotated_image)
+        self.rotated_image, self.mask = rotation_cache().get((self.type, self.subtype), angle)
 
 
 
@@ -194,7 +241,9 @@ class Agent(pygame.sprite.Sprite, Boid):
             if self.position.distance_to(self.target.position) > self.max_sight:
                 return
 
-        screen_pos = self.position - pygame.Vector2(camera().offset) # Convert world coordinates to screen coordinates
+        # Convert world coordinates to screen coordinates
+        # NOTE: on a fixed timestep draw a fraction of a step back - agents move by exactly their velocity each tick
+        screen_pos = self.position - self.velocity * (1 - camera().alpha) - camera().draw_offset
 
         if debug.DRAW_MASKS:
             _img = self.mask.to_surface()
@@ -214,38 +263,71 @@ class Agent(pygame.sprite.Sprite, Boid):
 
 
 
+    def lod(self) -> int:
+        """ which LodTier the agent is in, by how far it is outside the screen """
+        x = self.position.x - camera().offset.x
+        y = self.position.y - camera().offset.y
+
+        def within(margin):
+            return margin <= x <= SCREEN_WIDTH - margin and margin <= y <= SCREEN_HEIGHT - margin
+
+        if within(VIEW_OPTO_PIXEL_DISTANCE):
+            return LodTier.ONSCREEN
+        if within(VIEW_OPTO_PIXEL_DISTANCE - LOD_NEAR_DISTANCE):
+            return LodTier.NEAR
+        return LodTier.FAR
+
+
+
+    def handle_walls(self):
+        if self.wall_behavior == BoundaryBehaviour.Bounce:
+            self.bounce_off_walls(attenuate=True)
+        elif self.wall_behavior == BoundaryBehaviour.Wrap:
+            self.wrap_screen()
+
+
+
     def bounce_off_walls(self, attenuate: bool = True) -> None:
-        if self.position.x < 0:
-            self.position.x = 0
-            self.velocity.x *= -AGENT_WALL_BOUNCE_ATTENUATION if attenuate else -1
+        # NOTE: work on copies and assign them back - position/velocity may be views into a BoidSwarm
+        position, velocity = self.position, self.velocity
 
-        if self.position.x > camera().playfield_width - self.size.x:
-            self.position.x = camera().playfield_width - self.size.x
-            self.velocity.x *= -AGENT_WALL_BOUNCE_ATTENUATION if attenuate else -1
+        if position.x < 0:
+            position.x = 0
+            velocity.x *= -AGENT_WALL_BOUNCE_ATTENUATION if attenuate else -1
 
-        if self.position.y < 0:
-            self.position.y = 0
-            self.velocity.y *= -AGENT_WALL_BOUNCE_ATTENUATION if attenuate else -1
+        if position.x > camera().playfield_width - self.size.x:
+            position.x = camera().playfield_width - self.size.x
+            velocity.x *= -AGENT_WALL_BOUNCE_ATTENUATION if attenuate else -1
 
-        if self.position.y > camera().playfield_height - self.size.y:
-            self.position.y = camera().playfield_height - self.size.y
-            self.velocity.y *= -AGENT_WALL_BOUNCE_ATTENUATION if attenuate else -1
+        if position.y < 0:
+            position.y = 0
+            velocity.y *= -AGENT_WALL_BOUNCE_ATTENUATION if attenuate else -1
+
+        if position.y > camera().playfield_height - self.size.y:
+            position.y = camera().playfield_height - self.size.y
+            velocity.y *= -AGENT_WALL_BOUNCE_ATTENUATION if attenuate else -1
+
+        self.position, self.velocity = position, velocity
 
 
 
     def wrap_screen(self):
+        position = self.position
+
         # LEFT WALL
-        if self.position.x < 0:
-            self.position.x = camera().playfield_width - self.size.x + self.position.x
+        if position.x < 0:
+            position.x = camera().playfield_width - self.size.x + position.x
 
         # RIGHT WALL
-        if self.position.x > camera().playfield_width - self.size.x:
-            self.position.x = camera().playfield_width % self.position.x
+        if position.x > camera().playfield_width - self.size.x:
+            position.x = camera().playfield_width % position.x
 
         # TOP WALL
-        if self.position.y < 0:
-            self.position.y = camera().playfield_height - self.size.y + self.position.y
+        if position.y < 0:
+            position.y = camera().playfield_height - self.size.y + position.y
 
         # BOTTOM WALL
-        if self.position.y > camera().playfield_height - self.size.y:
-            self.position.y = camera().playfield_height % self.position.y
+        if position.y > camera().playfield_height - self.size.y:
+            position.y = camera().playfield_height % position.y
+
+        self.position = position
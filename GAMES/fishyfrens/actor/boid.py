@@ -7,7 +7,8 @@ import numpy as np
 from gamelib.colors import Colors
 from gamelib.globals import APP_SCREEN
 
-from fishyfrens.actor import BehaviorType
+from fishyfrens.actor import BehaviorType, BoundaryBehaviour
+from fishyfrens.actor.spatialgrid import SpatialHashGrid
 
 from fishyfrens.view.camera import camera
 
@@ -59,14 +60,14 @@ class Boid:
 ###########################################
     def draw_vector(self, vec, color: pygame.Color = Colors.RED, magnitude = 20):
         player_center = self.position + self.size // 2
-        player_center += -camera().offset
+        player_center += -camera().draw_offset
         pygame.draw.line(APP_SCREEN, color, player_center, player_center + vec * magnitude, 3)
 
 
 
 
 ###########################################
-    def update_steering(self, all_actors: pygame.sprite.Group):
+    def update_steering(self, neighbor_grid: SpatialHashGrid):
         self.velocity *= self.vel_coef
 
         # steering = pygame.Vector2(0, 0)
@@ -81,7 +82,7 @@ class Boid:
             self.steering_force += flee_force * 4
 
         if self.behavior_type & BehaviorType.FLOCK:
-            self.steering_force += self.flock( all_actors )
+            self.steering_force += self.flock( neighbor_grid )
 
         # self.steering_force = steering
 
@@ -111,8 +112,13 @@ class Boid:
         if distance > self.max_sight:
             return pygame.Vector2(0, 0)
 
+        if distance == 0:
+            return pygame.Vector2(0, 0)
+
         self.desired_velocity = (self.target.position - self.position).normalize() * self.max_speed
         steering_force = self.desired_velocity - self.velocity
+        if steering_force.length_squared() == 0: # already at the desired velocity (normalize() would raise)
+            return steering_force
         steering_force = steering_force.normalize() * self.max_force
 
         # Invert the decay factor for the seeker
@@ -131,8 +137,13 @@ class Boid:
         if distance > self.max_sight:
             return pygame.Vector2(0, 0)
 
+        if distance == 0:
+            return pygame.Vector2(0, 0)
+
         self.desired_velocity = (self.position - self.target.position).normalize() * self.max_speed
         steering_force = self.desired_velocity - self.velocity
+        if steering_force.length_squared() == 0: # already at the desired velocity (normalize() would raise)
+            return steering_force
         steering_force = steering_force.normalize() * self.max_force
 
         # Standard decay for flee
@@ -142,20 +153,24 @@ class Boid:
         return steering_force
 
 
-    def align(self, neighbors: pygame.sprite.Group) -> pygame.Vector2:
+    # NOTE: neighbors are (agent, position, distance) tuples - position is where that agent is as seen from
+    # this one (it differs from agent.position when the neighbor is across a wrapping edge)
+    def align(self, neighbors: list) -> pygame.Vector2:
         average = pygame.Vector2(0, 0)
-        for a in neighbors:
+        for a, position, distance in neighbors:
             average += a.velocity
 
         average /= max(len(neighbors), 1)
         return average.normalize() * self.max_force if average != pygame.Vector2(0, 0) else pygame.Vector2(0, 0)
 
 
-    def separate(self, neighbors: pygame.sprite.Group) -> pygame.Vector2:
+    def separate(self, neighbors: list) -> pygame.Vector2:
         average = pygame.Vector2(0, 0)
-        for a in neighbors:
-            diff = self.position - a.position
-            diff /= a.distance
+        for a, position, distance in neighbors:
+            if distance == 0: # right on top of us - no direction to push away in
+                continue
+            diff = self.position - position
+            diff /= distance
             average += diff
 
         average /= max(len(neighbors), 1)
@@ -164,10 +179,10 @@ class Boid:
 
 
 
-    def cohere(self, neighbors: pygame.sprite.Group) -> pygame.Vector2:
+    def cohere(self, neighbors: list) -> pygame.Vector2:
         average = pygame.Vector2(0, 0)
-        for a in neighbors:
-            average += a.position
+        for a, position, distance in neighbors:
+            average += position
 
         average /= max(len(neighbors), 1)
         # return average - self.position
@@ -175,16 +190,14 @@ class Boid:
 
 
 ###########################################
-    def flock(self, all_actors: pygame.sprite.Group) -> pygame.Vector2:
-        # get actors within sight
-
-        neighbors: pygame.sprite.Group = pygame.sprite.Group()
-        for a in all_actors:
-            if a != self:
-                distance = self.position.distance_to(a.position)
-                a.distance = distance
-                if distance < self.max_sight // 2:
-                    neighbors.add(a)
+    def flock(self, neighbor_grid: SpatialHashGrid) -> pygame.Vector2:
+        # get actors within sight (only the grid cells next to ours are searched)
+        wrap = getattr(self, "wall_behavior", None) == BoundaryBehaviour.Wrap
+
+        neighbors = []
+        for a, offset, distance in neighbor_grid.query(self.position, self.max_sight // 2, wrap=wrap):
+            if a is not self:
+                neighbors.append( (a, self.position - pygame.Vector2(offset), distance) )
 
 
         if len(neighbors) == 0:
@@ -0,0 +1,88 @@
+import math
+import logging
+logger = logging.getLogger()
+
+import pygame
+
+from fishyfrens.actor.spatialgrid import SpatialHashGrid
+
+
+# agents keep moving after the grid is rebuilt at the top of the frame - look this much further to make up for it
+COLLISION_QUERY_MARGIN = 16
+
+
+
+class CollisionPipeline:
+    """ Player vs agent collisions in three stages, cheapest first:
+
+        broadphase  - agents in the spatial grid near the player
+        AABB        - the agent's mask box overlaps the player's mask box
+        narrowphase - the pixel masks overlap
+
+        Only agent types with a callback are tested at all. A callback gets the agent and returns True if the agent
+        should be removed from its group.
+
+        The grid is the one built for flocking at the start of the frame, so agents spawned since then are found
+        on the next frame.
+    """
+
+    def __init__(self, reach: float):
+        # the farthest an agent's top-left can be from its far corner, at any rotation
+        self.reach = reach
+        self.callbacks = {}
+
+        # counters for the most recent frame
+        self.candidates = 0
+        self.narrowphase_tests = 0
+        self.hits = 0
+
+
+    def on(self, agent_type, callback):
+        """ call `callback(agent)` when the player touches an agent of this type """
+        self.callbacks[agent_type] = callback
+
+
+    def collide(self, sprite: pygame.sprite.Sprite, grid: SpatialHashGrid) -> list:
+        """ every agent in the grid whose mask overlaps the sprite's mask """
+        self.candidates = 0
+        self.narrowphase_tests = 0
+        self.hits = 0
+
+        left, top = sprite.rect.topleft
+        box = pygame.Rect(sprite.rect.topleft, sprite.mask.get_size())
+        radius = math.hypot(*box.size) + self.reach + COLLISION_QUERY_MARGIN
+
+        hits = []
+        for agent, _, _ in grid.query(box.topleft, radius):
+            if agent.type not in self.callbacks:
+                continue
+            self.candidates += 1
+
+            if not box.colliderect(pygame.Rect(agent.rect.topleft, agent.mask.get_size())):
+                continue
+            self.narrowphase_tests += 1
+
+            if sprite.mask.overlap(agent.mask, (agent.rect.left - left, agent.rect.top - top)):
+                hits.append(agent)
+
+        self.hits = len(hits)
+        return hits
+
+
+    def run(self, sprite: pygame.sprite.Sprite, grid: SpatialHashGrid, group: pygame.sprite.Group) -> list:
+        """ collide, then hand each hit to its callback and remove the ones that were eaten
+
+            Returns the agents that were removed.
+        """
+        removed = []
+        for agent in self.collide(sprite, grid):
+            if self.callbacks[agent.type](agent):
+                group.remove(agent)
+                removed.append(agent)
+        return removed
+
+
+
+def agent_reach(images: dict) -> float:
+    """ the diagonal of the biggest image in {type: {subtype: image}} - no rotation of it can stick out further """
+    return max(math.hypot(*image.get_size()) for subtypes in images.values() for image in subtypes.values())
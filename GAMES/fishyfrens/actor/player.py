@@ -9,6 +9,7 @@ logger = logging.getLogger()
 from gamelib.globals import *
 from gamelib.colors import Colors
 from gamelib.utils import lerp_color
+from gamelib.assets import assets
 
 import fishyfrens.debug as debug
 from fishyfrens.config import *
@@ -16,12 +17,23 @@ from fishyfrens.app import App
 
 from fishyfrens.view.camera import camera
 from fishyfrens.audio import audio
+from fishyfrens.actor.rotationcache import rotation_cache
 
 # from fishyfrens.level import level
 from fishyfrens.actor.singletons import level
 
 
 
+PLAYER_SCALE_BY = 3
+
+# decoded and scaled by the App's background preload, like the agent images
+PLAYER_IMAGE_ASSETS = {
+    name: assets().image(os.path.join(MY_DIR, 'resources', 'img', f'player{name}.png'), scale=PLAYER_SCALE_BY)
+    for name in ["myca", "charlie"]
+}
+
+
+
 class Player(pygame.sprite.Sprite):
     def __init__(self, name):
         super().__init__()
@@ -29,15 +41,19 @@ class Player(pygame.sprite.Sprite):
         self.name = name
         self.top_speed = 5
         self.position = pygame.Vector2(random.randint(100, camera().playfield_width - 100), random.randint(100, camera().playfield_height - 100))  # Use Vector2 for position
+        self.previous_position = pygame.Vector2(self.position)
         self.velocity = pygame.Vector2(random.randint(-2, 2), random.randint(-2, 2))  # Use Vector2 for velocity
         self.velocity_dampening = 0.97
         self.acceleration = pygame.Vector2(0, 0)
 
-        self.image = pygame.image.load(os.path.join(MY_DIR, 'resources', 'img', f'player{self.name}.png')).convert_alpha()
-        self.scale_by = 3
-        self.image = pygame.transform.scale(self.image, (int(self.image.get_width() * self.scale_by), int(self.image.get_height() * self.scale_by)))
+        self.scale_by = PLAYER_SCALE_BY
+        self.image = PLAYER_IMAGE_ASSETS[self.name].get()
         self.image = pygame.transform.flip(self.image, True, False)
         self.flipped = False
+        # one image per facing direction, so the rotation cache only ever sees these two
+        self.images = {False: self.image, True: pygame.transform.flip(self.image, False, True)}
+        for flipped, image in self.images.items():
+            rotation_cache().register(("player", self.name, flipped), image)
         self.size = pygame.Vector2(self.image.get_size())
         self.image_orientation: pygame.Vector2 = pygame.Vector2(1, 0)
 
@@ -97,11 +113,12 @@ class Player(pygame.sprite.Sprite):
         # if velocity is negative, flip the image
         if self.velocity.x < 0.0 and self.flipped == False:
             self.flipped = True
-            self.image = pygame.transform.flip(self.image, False, True)
+            self.image = self.images[self.flipped]
         elif self.velocity.x > 0.0 and self.flipped == True:
             self.flipped = False
-            self.image = pygame.transform.flip(self.image, False, True)
+            self.image = self.images[self.flipped]
 
+        self.previous_position = pygame.Vector2(self.position)
         self.position += self.velocity
         self.bounce_off_walls(attenuate=True)
 
@@ -111,16 +128,15 @@ class Player(pygame.sprite.Sprite):
         # Update mask for pixel-perfect collision
         # Note: Only necessary if the sprite's appearance or orientation changes
         angle = self.velocity.angle_to(self.image_orientation)
-        self.rotated_image = pygame.transform.rotate(self.image, angle)
-        self.mask = pygame.mask.from_surface(self.rotated_image)
+        self.rotated_image, self.mask = rotation_cache().get(("player", self.name, self.flipped), angle)
 
 
     def draw(self):
         # angle = self.velocity.angle_to(self.image_orientation)
         # rotated_image = pygame.transform.rotate(self.image, angle)
 
-        # Convert world coordinates to screen coordinates
-        screen_pos = self.position - pygame.Vector2(camera().offset)
+        # Convert world coordinates to screen coordinates (between the last two updates on a fixed timestep)
+        screen_pos = self.draw_position() - camera().draw_offset
 
         if debug.DRAW_MASKS:
             # _img = pygame.transform.rotate(self.mask.to_surface(), self.velocity.angle_to(self.image_orientation))
@@ -155,9 +171,13 @@ class Player(pygame.sprite.Sprite):
 
 
 
+    def draw_position(self) -> pygame.Vector2:
+        return self.previous_position.lerp(self.position, camera().alpha)
+
+
     def draw_velocity_overlay(self):
-        player_center = self.position + self.size // 2
-        player_center -= camera().offset
+        player_center = self.draw_position() + self.size // 2
+        player_center -= camera().draw_offset
         pygame.draw.line(APP_SCREEN, Colors.GREEN, player_center, player_center + self.velocity * 8, 3)
         # pygame.draw.line(APP_SCREEN, Colors.YELLOW, player_center, player_center + self.dot_product * 8, 3)
 
@@ -0,0 +1,131 @@
+import time
+import logging
+logger = logging.getLogger()
+
+import pygame
+
+from fishyfrens.config import ROTATION_BUCKETS
+
+
+
+class RotationCache:
+    """ Rotated images and their collision masks, shared by every sprite drawn from the same base image.
+
+        Angles are snapped to one of `buckets` evenly spaced steps around the circle, so there are at most `buckets`
+        rotations per image no matter how many agents are swimming around with it.
+        Entries are made the first time an angle is asked for, or all at once with prewarm().
+
+        NOTE: the cached surfaces are shared - don't draw on them.
+    """
+
+    def __init__(self, buckets: int = ROTATION_BUCKETS):
+        self.buckets = buckets
+        self.step = 360 / buckets
+        self.images = {}    # key -> base image
+        self.entries = {}   # (key, bucket) -> (rotated image, mask)
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+
+
+    def register(self, key, image: pygame.Surface):
+        """ remember the base image for a key, e.g. (AgentType.KRILL, subtype) """
+        if self.images.get(key) is image:
+            return
+        if key in self.images:
+            self.forget(key)
+        self.images[key] = image
+
+
+    def forget(self, key):
+        for bucket in range(self.buckets):
+            entry = self.entries.pop((key, bucket), None)
+            if entry is not None:
+                self.bytes -= entry_size(*entry)
+        self.images.pop(key, None)
+
+
+    def bucket(self, angle: float) -> int:
+        return round(angle / self.step) % self.buckets
+
+
+    def get(self, key, angle: float):
+        """ (rotated image, mask) for the key's image rotated by `angle` degrees (snapped to the nearest bucket) """
+        bucket = self.bucket(angle)
+        entry = self.entries.get((key, bucket))
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        return self._make(key, bucket)
+
+
+    def _make(self, key, bucket: int):
+        rotated = pygame.transform.rotate(self.images[key], bucket * self.step)
+        entry = (rotated, pygame.mask.from_surface(rotated))
+        self.entries[(key, bucket)] = entry
+        self.bytes += entry_size(*entry)
+        return entry
+
+
+    def prewarm(self, keys=None):
+        """ fill every bucket for the given keys (all registered keys by default) so gameplay never has to """
+        start = time.perf_counter()
+        made = 0
+        for key in list(self.images if keys is None else keys):
+            for bucket in range(self.buckets):
+                if (key, bucket) not in self.entries:
+                    self._make(key, bucket)
+                    made += 1
+
+        logger.debug(f"rotation cache prewarmed {made} entries in {(time.perf_counter() - start) * 1000:.0f} ms ({self.bytes / 1_000_000:.1f} MB)")
+
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+        self.reset_stats()
+
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+
+    def stats(self) -> dict:
+        return {
+            "buckets": self.buckets,
+            "images": len(self.images),
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "bytes": self.bytes,
+        }
+
+
+
+def entry_size(surface: pygame.Surface, mask: pygame.mask.Mask) -> int:
+    """ rough memory use of one cache entry in bytes (pixels plus one bit per mask pixel) """
+    w, h = mask.get_size()
+    return surface.get_pitch() * surface.get_height() + (w + 7) // 8 * h
+
+
+
+###########################################
+_rc = None
+
+def rotation_cache():
+    """ the one RotationCache shared by every agent and the player """
+    global _rc
+    if _rc is None:
+        from fishyfrens.app import App
+        _rc = RotationCache(int(App.get_instance().manifest_key_value("rotation_buckets", ROTATION_BUCKETS)))
+    return _rc
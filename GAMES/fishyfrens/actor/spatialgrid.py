@@ -0,0 +1,143 @@
+import numpy as np
+
+
+# never let the cells get so small that the grid itself becomes the bottleneck
+MIN_CELL_SIZE = 16
+
+# queries are expanded into candidate pairs this many rows at a time to bound memory
+QUERY_CHUNK_ROWS = 2048
+
+
+
+class SpatialHashGrid:
+    """ Uniform bucket grid over the playfield, rebuilt from scratch once per frame.
+
+        Cells are at least `cell_size` wide, so every neighbor within `cell_size` of a point is in the 3x3 block of
+        cells around it (queries with a bigger radius look further out). Cell sizes are stretched so a whole number
+        of cells spans the playfield, which lets wrapping queries walk off one edge and onto the other.
+
+        Positions are a snapshot taken at rebuild() - items that move afterwards are still found where they were.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.positions = np.zeros((0, 2))
+        self.width = 1
+        self.height = 1
+        self.cols = 1
+        self.rows = 1
+        self.cell_width = 1
+        self.cell_height = 1
+        self.order = np.zeros(0, dtype=np.int64)
+        self.cell_start = np.zeros(1, dtype=np.int64)
+        self.cell_count = np.zeros(1, dtype=np.int64)
+
+
+    def rebuild(self, positions: np.ndarray, items: list, width: float, height: float, cell_size: float):
+        """ bucket every item by the cell its position falls in (positions off the playfield go in the edge cells) """
+        self.items = items
+        self.positions = np.array(positions, dtype=np.float64).reshape(-1, 2)
+        self.width = float(width)
+        self.height = float(height)
+
+        cell_size = max(cell_size, MIN_CELL_SIZE)
+        self.cols = max(1, int(self.width // cell_size))
+        self.rows = max(1, int(self.height // cell_size))
+        self.cell_width = self.width / self.cols
+        self.cell_height = self.height / self.rows
+
+        keys = self.cell_keys(self.positions)
+        self.order = np.argsort(keys, kind="stable")
+        self.cell_count = np.bincount(keys, minlength=self.cols * self.rows)
+        self.cell_start = np.cumsum(self.cell_count) - self.cell_count
+
+
+    def cell_coords(self, positions: np.ndarray):
+        cx = np.clip((positions[:, 0] // self.cell_width).astype(np.int64), 0, self.cols - 1)
+        cy = np.clip((positions[:, 1] // self.cell_height).astype(np.int64), 0, self.rows - 1)
+        return cx, cy
+
+
+    def cell_keys(self, positions: np.ndarray) -> np.ndarray:
+        cx, cy = self.cell_coords(positions)
+        return cy * self.cols + cx
+
+
+###########################################
+    def pairs(self, positions: np.ndarray, radius: np.ndarray, wrap: np.ndarray):
+        """ every (query, item) pair closer than the query's radius
+
+            positions, radius and wrap have one row per query. Wrapping queries measure the shortest way around
+            the playfield and look through the cells on the opposite edge.
+
+            Returns (query_index, item_index, offset, distance) where offset is query position minus the item's
+            (nearest wrapped) position. A query sitting on an item will find that item at distance zero.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (len(positions),))
+        wrap = np.broadcast_to(np.asarray(wrap, dtype=bool), (len(positions),))
+
+        results = [self._pairs(positions[s:s + QUERY_CHUNK_ROWS], radius[s:s + QUERY_CHUNK_ROWS], wrap[s:s + QUERY_CHUNK_ROWS], s)
+                    for s in range(0, len(positions), QUERY_CHUNK_ROWS)]
+        if not results:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, 2)), np.zeros(0)
+
+        return tuple(np.concatenate(r) for r in zip(*results))
+
+
+    def _pairs(self, positions, radius, wrap, first_row):
+        cx, cy = self.cell_coords(positions)
+        rows = np.arange(len(positions))
+
+        # how many cells out the biggest radius in this chunk can reach (never more than the whole grid)
+        biggest = radius.max() if len(radius) else 0
+        reach_x = min(int(np.ceil(biggest / self.cell_width)), self.cols - 1)
+        reach_y = min(int(np.ceil(biggest / self.cell_height)), self.rows - 1)
+
+        query_rows = []
+        query_cells = []
+        for dy in range(-reach_y, reach_y + 1):
+            ny, y_ok = self.neighbor_cells(cy, dy, self.rows, wrap, reach_y)
+            for dx in range(-reach_x, reach_x + 1):
+                nx, x_ok = self.neighbor_cells(cx, dx, self.cols, wrap, reach_x)
+                ok = x_ok & y_ok
+                query_rows.append(rows[ok])
+                query_cells.append(ny[ok] * self.cols + nx[ok])
+
+        query_rows = np.concatenate(query_rows)
+        query_cells = np.concatenate(query_cells)
+
+        # expand (query, cell) into (query, item) for every item in the cell
+        lengths = self.cell_count[query_cells]
+        total = int(lengths.sum())
+        q = np.repeat(query_rows, lengths)
+        within = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        j = self.order[np.repeat(self.cell_start[query_cells], lengths) + within]
+
+        offset = positions[q] - self.positions[j]
+        wrapped = wrap[q]
+        if wrapped.any():
+            offset[wrapped, 0] -= self.width * np.round(offset[wrapped, 0] / self.width)
+            offset[wrapped, 1] -= self.height * np.round(offset[wrapped, 1] / self.height)
+
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+        keep = distance < radius[q]
+        return q[keep] + first_row, j[keep], offset[keep], distance[keep]
+
+
+    @staticmethod
+    def neighbor_cells(cells: np.ndarray, delta: int, count: int, wrap: np.ndarray, reach: int = 1):
+        """ the cell `delta` away along one axis, and whether to visit it """
+        n = cells + delta
+        ok = ((n >= 0) & (n < count)) | wrap
+        # when the reach spans the whole (wrapped) axis, deltas past -reach + count - 1 land on cells already visited
+        if delta > count - 1 - reach:
+            ok &= ~wrap
+        return n % count, ok
+
+
+###########################################
+    def query(self, position, radius: float, wrap: bool = False) -> list:
+        """ [(item, offset, distance), ...] for a single point - offset is a pygame-style (x, y) tuple """
+        q, j, offset, distance = self.pairs(np.array([[position[0], position[1]]]), radius, wrap)
+        return [(self.items[i], (o[0], o[1]), d) for i, o, d in zip(j.tolist(), offset.tolist(), distance.tolist())]
@@ -0,0 +1,98 @@
+import time
+import logging
+logger = logging.getLogger()
+
+import pygame
+
+from fishyfrens.config import SPAWN_BUDGET_PER_FRAME, SPAWN_BUDGET_MS
+from fishyfrens.actor import AgentType
+from fishyfrens.actor.agent import Agent
+
+
+
+class AgentPool:
+    """ Agents that were eaten or wiped off the board, waiting to be reused.
+
+        Building an Agent means a Sprite, a rect and a handful of Vector2s - reset() on an old one skips most of that.
+    """
+
+    def __init__(self):
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+
+    def acquire(self, type: AgentType) -> Agent:
+        if self.free:
+            agent = self.free.pop()
+            agent.reset(type)
+            self.reused += 1
+            return agent
+
+        self.created += 1
+        return Agent(type)
+
+
+    def release(self, agent: Agent):
+        """ the agent must already be out of every group """
+        self.free.append(agent)
+
+
+    def release_group(self, group: pygame.sprite.Group):
+        """ empty the group into the pool """
+        agents = group.sprites()
+        group.empty()
+        self.free.extend(agents)
+
+
+    def prewarm(self, count: int):
+        """ build agents until there are at least `count` waiting in the pool """
+        start = time.perf_counter()
+        made = 0
+        while len(self.free) < count:
+            self.free.append(Agent(AgentType.KRILL))
+            self.created += 1
+            made += 1
+
+        if made:
+            logger.debug(f"agent pool prewarmed {made} agents in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+
+class Spawner:
+    """ Tops a group up to a target size a few agents at a time, so filling a level doesn't stall a single frame.
+
+        Each call to fill() stops after `per_frame` agents or `budget_ms` milliseconds, whichever comes first.
+    """
+
+    def __init__(self, pool: AgentPool, per_frame: int = SPAWN_BUDGET_PER_FRAME, budget_ms: float = SPAWN_BUDGET_MS):
+        self.pool = pool
+        self.per_frame = per_frame
+        self.budget_ms = budget_ms
+        self.spawned_last_frame = 0
+
+
+    def fill(self, group: pygame.sprite.Group, target: int, spawn) -> int:
+        """ call `spawn()` (which adds one agent to the group) until the group is `target` big or the budget runs out """
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        spawned = 0
+        while len(group) < target and spawned < self.per_frame:
+            spawn()
+            spawned += 1
+            if time.perf_counter() > deadline:
+                break
+
+        self.spawned_last_frame = spawned
+        return spawned
+
+
+
+###########################################
+_pool = None
+
+def agent_pool():
+    """ the one AgentPool every level spawns from """
+    global _pool
+    if _pool is None:
+        _pool = AgentPool()
+    return _pool
@@ -0,0 +1,483 @@
+import logging
+logger = logging.getLogger()
+
+import pygame
+import numpy as np
+
+from gamelib.globals import SCREEN_WIDTH, SCREEN_HEIGHT
+
+from fishyfrens.config import BOID_BACKEND, LOD_NEAR_DISTANCE, LOD_FAR_INTERVAL
+from fishyfrens.actor import BehaviorType, BoundaryBehaviour, LodTier, VIEW_OPTO_PIXEL_DISTANCE, AGENT_WALL_BOUNCE_ATTENUATION
+from fishyfrens.actor.spatialgrid import SpatialHashGrid
+
+from fishyfrens.view.camera import camera
+
+
+INITIAL_CAPACITY = 256
+
+
+
+class SwarmField:
+    """ An agent attribute that lives in the swarm's arrays while the agent is in a SwarmGroup.
+
+        When the agent isn't attached to a swarm (or the 'reference' backend is in use) the value is kept
+        in the instance __dict__ like any other attribute.
+
+        NOTE: vector fields return a *copy* - `agent.position.x = 0` does nothing while attached, assign the whole vector instead.
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        if obj._swarm is None:
+            return obj.__dict__[self.name]
+        return obj._swarm.get_field(self.name, obj._slot)
+
+    def __set__(self, obj, value):
+        if obj._swarm is None:
+            obj.__dict__[self.name] = value
+        else:
+            obj._swarm.set_field(self.name, obj._slot, value)
+
+
+
+class BoidSwarm:
+    """ Structure-of-arrays store for every agent in a SwarmGroup.
+
+        Rows [0, count) are live and packed - removing an agent moves the last row into its slot.
+        step() runs seek, flee, flock, force/speed clamping and wall handling for the whole population at once.
+    """
+
+    VECTOR_FIELDS = ("position", "velocity", "desired_velocity", "steering_force")
+    FLOAT_FIELDS = ("max_speed", "max_force", "decay_rate", "max_sight", "vel_coef")
+    INT_FIELDS = ("behavior_type", "lod_tier", "far_ticks")
+    BOOL_FIELDS = ("is_onscreen", "dead")
+    FIELDS = VECTOR_FIELDS + FLOAT_FIELDS + INT_FIELDS + BOOL_FIELDS + ("target",)
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.count = 0
+        self.capacity = 0
+        self.agents = []
+
+        # agents all share one (or very few) targets, so each row just stores an index into this list
+        self.targets = []
+
+        self.position = np.zeros((0, 2))
+        self.velocity = np.zeros((0, 2))
+        self.desired_velocity = np.zeros((0, 2))
+        self.steering_force = np.zeros((0, 2))
+        self.size = np.zeros((0, 2))
+
+        self.max_speed = np.zeros(0)
+        self.max_force = np.zeros(0)
+        self.decay_rate = np.zeros(0)
+        self.max_sight = np.zeros(0)
+        self.vel_coef = np.zeros(0)
+
+        self.behavior_type = np.zeros(0, dtype=np.int64)
+        self.lod_tier = np.zeros(0, dtype=np.int64)
+        self.far_ticks = np.zeros(0, dtype=np.int64)
+        self.target_index = np.zeros(0, dtype=np.int64)
+
+        self.is_onscreen = np.zeros(0, dtype=bool)
+        self.dead = np.zeros(0, dtype=bool)
+        self.wraps = np.zeros(0, dtype=bool)
+
+        self.grow(capacity)
+
+
+    def _arrays(self):
+        return self.VECTOR_FIELDS + self.FLOAT_FIELDS + self.INT_FIELDS + self.BOOL_FIELDS + ("size", "target_index", "wraps")
+
+
+    def grow(self, capacity: int):
+        for name in self._arrays():
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+
+###########################################
+    def get_field(self, name: str, slot: int):
+        if name == "target":
+            index = self.target_index[slot]
+            return None if index < 0 else self.targets[index]
+        if name in self.VECTOR_FIELDS:
+            return pygame.Vector2(getattr(self, name)[slot].tolist())
+        return getattr(self, name)[slot].item()
+
+
+    def set_field(self, name: str, slot: int, value):
+        if name == "target":
+            self.target_index[slot] = self.target_slot(value)
+        elif name in self.VECTOR_FIELDS:
+            getattr(self, name)[slot] = (value[0], value[1])
+        else:
+            getattr(self, name)[slot] = value
+
+
+    def target_slot(self, target) -> int:
+        if target is None:
+            return -1
+        for i, t in enumerate(self.targets):
+            if t is target:
+                return i
+        self.targets.append(target)
+        return len(self.targets) - 1
+
+
+###########################################
+    def attach(self, agent):
+        """ move the agent's boid state out of its __dict__ and into a new row """
+        if agent._swarm is not None:
+            raise Exception("Agent is already attached to a swarm")
+
+        if self.count == self.capacity:
+            self.grow(self.capacity * 2)
+
+        slot = self.count
+        self.count += 1
+        self.agents.append(agent)
+
+        state = agent.__dict__
+        for name in self.FIELDS:
+            value = state.pop(name)
+            if name in self.BOOL_FIELDS:
+                value = bool(value)
+            self.set_field(name, slot, value)
+        self.size[slot] = (agent.size.x, agent.size.y)
+        self.wraps[slot] = agent.wall_behavior == BoundaryBehaviour.Wrap
+
+        agent._swarm = self
+        agent._slot = slot
+
+
+    def detach(self, agent):
+        """ copy the agent's row back into its __dict__ and fill the hole with the last row """
+        slot = agent._slot
+        for name in self.FIELDS:
+            agent.__dict__[name] = self.get_field(name, slot)
+        agent._swarm = None
+        agent._slot = None
+
+        last = self.count - 1
+        if slot != last:
+            for name in self._arrays():
+                array = getattr(self, name)
+                array[slot] = array[last]
+            moved = self.agents[last]
+            moved._slot = slot
+            self.agents[slot] = moved
+        self.agents.pop()
+        self.count -= 1
+
+
+    def detach_all(self) -> list:
+        """ detach every agent at once - one column at a time instead of one row at a time """
+        n = self.count
+        columns = {}
+        for name in self.FIELDS:
+            if name == "target":
+                columns[name] = [None if i < 0 else self.targets[i] for i in self.target_index[:n].tolist()]
+            elif name in self.VECTOR_FIELDS:
+                columns[name] = [pygame.Vector2(v) for v in getattr(self, name)[:n].tolist()]
+            else:
+                columns[name] = getattr(self, name)[:n].tolist()
+
+        agents = self.agents
+        for slot, agent in enumerate(agents):
+            state = agent.__dict__
+            for name, column in columns.items():
+                state[name] = column[slot]
+            agent._swarm = None
+            agent._slot = None
+
+        self.agents = []
+        self.count = 0
+        return agents
+
+
+###########################################
+    def update_lod(self):
+        """ same tiers as the reference Agent.lod() """
+        n = self.count
+        offset = camera().offset
+        rel_x = self.position[:n, 0] - offset.x
+        rel_y = self.position[:n, 1] - offset.y
+
+        def within(margin):
+            return (rel_x >= margin) & (rel_x <= SCREEN_WIDTH - margin) & (rel_y >= margin) & (rel_y <= SCREEN_HEIGHT - margin)
+
+        onscreen = within(VIEW_OPTO_PIXEL_DISTANCE)
+        near = within(VIEW_OPTO_PIXEL_DISTANCE - LOD_NEAR_DISTANCE)
+        self.is_onscreen[:n] = onscreen
+        self.lod_tier[:n] = np.where(onscreen, LodTier.ONSCREEN, np.where(near, LodTier.NEAR, LodTier.FAR))
+
+
+    def step(self, neighbor_grid: SpatialHashGrid = None):
+        """ one tick of Boid.update_steering() plus wall handling for every live agent on or near the screen
+
+            Far agents coast along their velocity every LOD_FAR_INTERVAL ticks they've spent far away instead
+            (so they don't all move on the same tick).
+        """
+        if self.count == 0:
+            return
+
+        self.update_lod()
+        n = self.count
+        alive = ~self.dead[:n]
+        tier = self.lod_tier[:n]
+
+        idx = np.flatnonzero(alive & (tier != LodTier.FAR))
+        if idx.size:
+            self.update_steering(idx, neighbor_grid)
+            self.handle_walls(idx)
+
+        far = np.flatnonzero(alive & (tier == LodTier.FAR))
+        if far.size:
+            self.far_ticks[far] += 1
+            far = far[self.far_ticks[far] % LOD_FAR_INTERVAL == 0]
+            self.position[far] += self.velocity[far] * LOD_FAR_INTERVAL
+            self.handle_walls(far)
+
+
+    def tier_counts(self) -> list:
+        """ [on screen, near, far] """
+        return np.bincount(self.lod_tier[:self.count], minlength=3).tolist()
+
+
+    def update_steering(self, idx: np.ndarray, neighbor_grid: SpatialHashGrid = None):
+        position = self.position[idx]
+        velocity = self.velocity[idx] * self.vel_coef[idx, None]
+        max_speed = self.max_speed[idx]
+        max_force = self.max_force[idx]
+        decay_rate = self.decay_rate[idx]
+        max_sight = self.max_sight[idx]
+        behavior = self.behavior_type[idx]
+
+        steering = np.zeros_like(position)
+        desired = self.desired_velocity[idx]
+
+        #### SEEK / FLEE
+        target_index = self.target_index[idx]
+        has_target = target_index >= 0
+        if has_target.any():
+            target_positions = np.array([(t.position.x, t.position.y) for t in self.targets])
+            to_target = target_positions[np.maximum(target_index, 0)] - position
+            distance = np.hypot(to_target[:, 0], to_target[:, 1])
+            # agents sitting exactly on the target get no seek/flee force (the reference can't normalize a zero vector either)
+            in_sight = has_target & (distance <= max_sight) & (distance > 0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = distance / max_sight
+
+            seek = in_sight & ((behavior & BehaviorType.SEEK) != 0)
+            if seek.any():
+                want = normalize(to_target[seek]) * max_speed[seek, None]
+                desired[seek] = want
+                force = normalize(want - velocity[seek]) * max_force[seek, None]
+                # Invert the decay factor for the seeker
+                force *= (1 - np.exp(-decay_rate[seek] * (1 - ratio[seek])))[:, None]
+                steering[seek] += force
+
+            flee = in_sight & ((behavior & BehaviorType.FLEE) != 0)
+            if flee.any():
+                want = normalize(-to_target[flee]) * max_speed[flee, None]
+                desired[flee] = want
+                force = normalize(want - velocity[flee]) * max_force[flee, None]
+                # Standard decay for flee
+                force *= np.exp(-decay_rate[flee] * ratio[flee])[:, None]
+                steering[flee] += force * 4
+
+        #### FLOCK
+        flock = (behavior & BehaviorType.FLOCK) != 0
+        if flock.any():
+            steering[flock] += self.flock(idx[flock], neighbor_grid)
+
+        #### LIMIT STEERING FORCE TO MAX FORCE
+        steering = normalize(steering) * max_force[:, None]
+        velocity += steering
+
+        #### LIMIT VELOCITY TO MAX SPEED
+        speed = np.hypot(velocity[:, 0], velocity[:, 1])
+        too_fast = speed > max_speed
+        velocity[too_fast] *= (max_speed[too_fast] / speed[too_fast])[:, None]
+
+        self.velocity[idx] = velocity
+        self.position[idx] = position + velocity
+        self.steering_force[idx] = steering
+        self.desired_velocity[idx] = desired
+
+
+    def flock(self, rows: np.ndarray, neighbor_grid: SpatialHashGrid) -> np.ndarray:
+        """ align * 1 + separate * 0.5 + cohere * 1.3 against every other agent within max_sight // 2
+
+            Wrapping agents see neighbors across the playfield edges.
+        """
+        if not self.grid_is_current(neighbor_grid):
+            neighbor_grid = SpatialHashGrid()
+            update_neighbor_grid(neighbor_grid, self)
+
+        k = rows.size
+        position = self.position[rows]
+        q, j, offset, distance = neighbor_grid.pairs(position, np.floor_divide(self.max_sight[rows], 2), self.wraps[rows])
+        not_self = j != rows[q]
+        q, j, offset, distance = q[not_self], j[not_self], offset[not_self], distance[not_self]
+
+        count = np.bincount(q, minlength=k)
+        has_neighbors = count > 0
+        divisor = np.maximum(count, 1)[:, None]
+
+        align = sum_rows(q, self.velocity[j], k) / divisor
+
+        # the reference divides by the distance, so overlapping agents are skipped instead of dividing by zero
+        with np.errstate(divide="ignore"):
+            inverse = np.where(distance > 0, 1 / distance, 0.0)
+        separate = sum_rows(q, offset * inverse[:, None], k) / divisor
+
+        # NOTE: the reference normalizes the average *position* (not the offset to it) - kept for equivalence
+        cohere = sum_rows(q, position[q] - offset, k) / divisor
+
+        max_force = self.max_force[rows, None]
+        force = normalize(align) * max_force * 1 \
+                + normalize(separate) * max_force * 0.5 \
+                + normalize(cohere) * max_force * 1.3
+        force[~has_neighbors] = 0
+        return force
+
+
+    def grid_is_current(self, neighbor_grid: SpatialHashGrid) -> bool:
+        """ the grid's item indices are only our row numbers if it was built from us since the last add/remove """
+        return neighbor_grid is not None and neighbor_grid.items is self.agents and len(neighbor_grid.positions) == self.count
+
+
+    def handle_walls(self, idx: np.ndarray):
+        """ Agent.bounce_off_walls(attenuate=True) and Agent.wrap_screen() for a batch of rows """
+        width = camera().playfield_width
+        height = camera().playfield_height
+        position = self.position[idx]
+        velocity = self.velocity[idx]
+        size = self.size[idx]
+        wraps = self.wraps[idx]
+        bounces = ~wraps
+
+        for axis, extent in ((0, width), (1, height)):
+            p = position[:, axis]
+            v = velocity[:, axis]
+            far = extent - size[:, axis]
+
+            low = bounces & (p < 0)
+            p[low] = 0
+            v[low] *= -AGENT_WALL_BOUNCE_ATTENUATION
+            high = bounces & (p > far)
+            p[high] = far[high]
+            v[high] *= -AGENT_WALL_BOUNCE_ATTENUATION
+
+            low = wraps & (p < 0)
+            p[low] = far[low] + p[low]
+            high = wraps & (p > far)
+            p[high] = np.mod(extent, p[high])
+
+        self.position[idx] = position
+        self.velocity[idx] = velocity
+
+
+
+def sum_rows(rows: np.ndarray, vectors: np.ndarray, count: int) -> np.ndarray:
+    """ sum the vectors that belong to each of `count` rows """
+    out = np.empty((count, 2))
+    out[:, 0] = np.bincount(rows, weights=vectors[:, 0], minlength=count)
+    out[:, 1] = np.bincount(rows, weights=vectors[:, 1], minlength=count)
+    return out
+
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """ row-wise normalize, zero-length rows stay zero (pygame would raise instead) """
+    length = np.hypot(vectors[:, 0], vectors[:, 1])
+    out = np.zeros_like(vectors)
+    nonzero = length > 0
+    out[nonzero] = vectors[nonzero] / length[nonzero, None]
+    return out
+
+
+
+class SwarmGroup(pygame.sprite.Group):
+    """ A sprite group that keeps its agents' boid state in a BoidSwarm and steps them all at once in update() """
+
+    def __init__(self, *sprites):
+        self.swarm = BoidSwarm()
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.swarm.attach(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.swarm.detach(sprite)
+
+    def empty(self):
+        # let go of the whole swarm in one go rather than swap-removing agents one by one
+        for sprite in self.sprites():
+            super().remove_internal(sprite)
+            sprite.remove_internal(self)
+        self.swarm.detach_all()
+
+    def update(self, neighbor_grid: SpatialHashGrid = None):
+        self.swarm.step(neighbor_grid)
+        super().update(neighbor_grid)
+
+
+
+def create_actor_group() -> pygame.sprite.Group:
+    """ the group every level puts its agents in - a SwarmGroup unless the reference backend is selected """
+    from fishyfrens.app import App
+    backend = App.get_instance().manifest_key_value("boid_backend", BOID_BACKEND)
+
+    if backend == "numpy":
+        return SwarmGroup()
+    elif backend == "reference":
+        return pygame.sprite.Group()
+    else:
+        raise NotImplementedError(f"boid backend {backend} does not exist")
+
+
+
+def update_neighbor_grid(neighbor_grid: SpatialHashGrid, actors) -> SpatialHashGrid:
+    """ rebuild the flock neighbor grid from a SwarmGroup, a BoidSwarm or any plain group of agents
+
+        Cells are max_sight // 2 of the farthest-sighted flocking agent (the flock neighbor radius).
+    """
+    swarm = actors if isinstance(actors, BoidSwarm) else getattr(actors, "swarm", None)
+
+    if swarm is not None:
+        n = swarm.count
+        items = swarm.agents
+        positions = swarm.position[:n]
+        flocking = (swarm.behavior_type[:n] & BehaviorType.FLOCK) != 0
+        sight = swarm.max_sight[:n][flocking]
+    else:
+        items = list(actors)
+        positions = np.array([(a.position.x, a.position.y) for a in items]).reshape(-1, 2)
+        sight = np.array([a.max_sight for a in items if a.behavior_type & BehaviorType.FLOCK])
+
+    cell_size = np.floor_divide(sight.max(), 2) if sight.size else max(camera().playfield_width, camera().playfield_height)
+    neighbor_grid.rebuild(positions, items, camera().playfield_width, camera().playfield_height, cell_size)
+    return neighbor_grid
+
+
+
+def lod_counts(actors) -> list:
+    """ how many agents are [on screen, near, far] in a SwarmGroup or any plain group of agents """
+    swarm = getattr(actors, "swarm", None)
+    if swarm is not None:
+        return swarm.tier_counts()
+
+    counts = [0, 0, 0]
+    for a in actors:
+        counts[a.lod_tier] += 1
+    return counts
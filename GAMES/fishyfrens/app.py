@@ -15,6 +15,8 @@ from gamelib import globals
 from gamelib.logger import setup_logging
 from gamelib.singleton import Singleton
 from gamelib.viewstate import ViewManager
+from gamelib.assets import assets
+from gamelib.profiler import configure_profiler, profiler
 
 from fishyfrens.config import *
 # from fishyfrens import config
@@ -59,6 +61,7 @@ class App(Singleton):
         pygame.init()
         pygame.font.init() # really needed?
         app.clock = pygame.time.Clock()
+        configure_profiler("fishyfrens", fps=FPS)
 
         # _info = pygame.display.Info()
         # app.width, app.height = _info.current_w, _info.current_h
@@ -104,6 +107,10 @@ class App(Singleton):
         # global SCREEN_HEIGHT
         globals.SCREEN_HEIGHT = app.height
 
+        # images are converted for the display, so this has to wait until it's set up
+        if app.manifest_key_value('asset_cache', True):
+            assets().cache_dir = ASSET_CACHE_DIR
+
         pygame.display.set_caption( app.manifest.get('name') or app.manifest.get('launcher', {}).get('name', 'Game') )
 
         #### setup views
@@ -124,6 +131,8 @@ class App(Singleton):
     def start(self):
         logger.debug("App.start()")
 
+        self.preload_assets()
+
         if self.manifest_key_value('skip_to_gameplay', False) == True:
             # self.viewmanager.run_view("gameplay") # TODO clean up this manifest variable action
             self.viewmanager.run_view("main_menu")
@@ -133,22 +142,28 @@ class App(Singleton):
         self.running = True
         while self.running:
             try:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        self.running = False
-                        continue
-                    if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                        self.running = False
-                        continue
-
-                    self.viewmanager.handle_event(event)
-
-                self.viewmanager.update()
-                self.viewmanager.draw()
+                profiler().frame()
+                with profiler().phase("events"):
+                    for event in pygame.event.get():
+                        if event.type == pygame.QUIT:
+                            self.running = False
+                            continue
+                        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                            self.running = False
+                            continue
+
+                        self.viewmanager.handle_event(event)
+
+                with profiler().phase("update"):
+                    self.viewmanager.update()
+                with profiler().phase("draw"):
+                    self.viewmanager.draw()
 
                 # pygame.display.update() # TODO is this needed?
-                pygame.display.flip()
-                self.clock.tick(FPS)
+                with profiler().phase("flip"):
+                    pygame.display.flip()
+                with profiler().phase("tick"):
+                    self.clock.tick(FPS)
 
             except KeyboardInterrupt:
                 logger.info("KeyboardInterrupt")
@@ -163,9 +178,22 @@ class App(Singleton):
                 logger.exception(e)
                 self.running = False
 
+        assets().shutdown()
         pygame.quit()
         sys.exit()
 
+    def preload_assets(self):
+        """ start decoding every image and sound in the background - the first view is up long before they're needed """
+        from fishyfrens.actor.agent import AGENT_IMAGE_ASSETS
+        from fishyfrens.actor.player import PLAYER_IMAGE_ASSETS
+        from fishyfrens.audio import audio
+
+        preload = list(PLAYER_IMAGE_ASSETS.values())
+        for handles in AGENT_IMAGE_ASSETS.values():
+            preload.extend(handles.values())
+        preload.extend(audio().assets())
+        assets().preload(preload)
+
     def stop(self):
         self.running = False
         # pygame.quit()
@@ -5,6 +5,8 @@ logger = logging.getLogger()
 
 import pygame
 
+from gamelib.assets import assets
+
 from fishyfrens.config import *
 from fishyfrens.app import App
 
@@ -16,22 +18,38 @@ class SoundMaster:
     """
 
     def __init__(self):
-        self.dink_effect = pygame.mixer.Sound( os.path.join(MY_DIR, 'resources', 'sounds', 'dink.wav') )
+        # handles only - the sounds are decoded by the App's background preload (or on first play)
+        self.dink_effect_asset = assets().sound( os.path.join(MY_DIR, 'resources', 'sounds', 'dink.wav') )
 
         self.oww_effects = {}
         for player_name in ["myca", "charlie"]:
             for i in range(3):
                 file_name = os.path.join(MY_DIR, 'resources', 'sounds', f'{player_name}oww{i}.wav')
-                logger.debug(f"loading sound {file_name}")
-                self.oww_effects[f'{player_name}oww{i}'] = pygame.mixer.Sound( file_name )
+                self.oww_effects[f'{player_name}oww{i}'] = assets().sound( file_name )
 
-        self.boost_effect = pygame.mixer.Sound( os.path.join(MY_DIR, 'resources', 'sounds', 'boost.wav') )
+        self.boost_effect_asset = assets().sound( os.path.join(MY_DIR, 'resources', 'sounds', 'boost.wav') )
 
-        self.you_died_effect = pygame.mixer.Sound( os.path.join(MY_DIR, 'resources', 'sounds', 'mycagameover.wav') )
+        self.you_died_effect_asset = assets().sound( os.path.join(MY_DIR, 'resources', 'sounds', 'mycagameover.wav') )
 
         self.current_track = None
         self.quiet = App.get_instance().manifest.get("quiet", False)
 
+    def assets(self) -> list:
+        """ every sound effect's handle - for preloading """
+        return [self.dink_effect_asset, self.boost_effect_asset, self.you_died_effect_asset, *self.oww_effects.values()]
+
+    @property
+    def dink_effect(self) -> pygame.mixer.Sound:
+        return self.dink_effect_asset.get()
+
+    @property
+    def boost_effect(self) -> pygame.mixer.Sound:
+        return self.boost_effect_asset.get()
+
+    @property
+    def you_died_effect(self) -> pygame.mixer.Sound:
+        return self.you_died_effect_asset.get()
+
     def play_bg(self, track: int = 0):
         if self.quiet:
             return
@@ -79,8 +97,9 @@ class SoundMaster:
 
         effect = f"{player_name}oww{r}"
 
-        self.oww_effects[effect].set_volume(0.5)
-        self.oww_effects[effect].play()
+        sound = self.oww_effects[effect].get()
+        sound.set_volume(0.5)
+        sound.play()
 
 
     def you_died(self):
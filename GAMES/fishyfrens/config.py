@@ -18,6 +18,47 @@ if platform.system() == "Darwin":
     TOP_BAR_HEIGHT = 34
 
 FPS = 80
+
+# GameplayView simulates at a fixed TICK_RATE (gamelib/timestep.py) and draws at whatever FPS the machine manages
+# everything was tuned at 80 frames per second, so that's the tick rate too
+# (can be overridden with "tick_rate" in the manifest's game_config)
+TICK_RATE = 80
+# a frame that falls further behind than this many ticks drops the rest (the game slows down instead of stalling)
+MAX_CATCH_UP_STEPS = 4
+
+# "numpy" steps every agent at once in a BoidSwarm (actor/swarm.py)
+# "reference" is the original per-object Boid math - keep it around to compare against
+# (can be overridden with "boid_backend" in the manifest's game_config)
+BOID_BACKEND = "numpy"
+
+# agents and the player look up their rotated image + collision mask in a RotationCache (actor/rotationcache.py)
+# angles are snapped to this many steps around the circle - 128 is under 3 degrees a step
+# (can be overridden with "rotation_buckets" in the manifest's game_config)
+ROTATION_BUCKETS = 128
+# fill the cache for every agent image when a level is set up, instead of a bit at a time during the first few seconds
+ROTATION_PREWARM = True
+
+# agents off the screen by less than this (past VIEW_OPTO_PIXEL_DISTANCE) keep steering, just without sprite work
+LOD_NEAR_DISTANCE = 600
+# agents further away than that only coast along their velocity, once every this many ticks
+LOD_FAR_INTERVAL = 8
+
+# levels top up their agents a few at a time - at most this many agents / milliseconds per frame
+SPAWN_BUDGET_PER_FRAME = 150
+SPAWN_BUDGET_MS = 4
+# build a level's worth of agents (actor/spawner.py AgentPool) when the level is set up
+AGENT_POOL_PREWARM = True
+
+# the light around the player on dark levels (view/vignette.py) - full brightness out to the inner radius, easing
+# down to VIGNETTE_COLOR (multiplied into the screen) at the outer radius
+VIGNETTE_INNER_RADIUS = 440
+VIGNETTE_OUTER_RADIUS = 640
+VIGNETTE_COLOR = (34, 29, 31)
+
+# images and sounds are decoded in the background while the splash screen is up (gamelib/assets.py)
+# the converted and scaled images are also kept here as raw pixels - the next start maps them in instead of decoding
+# (can be turned off with "asset_cache": false in the manifest's game_config)
+ASSET_CACHE_DIR = os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "fishyfrens", "assets")
 # BORDER_WIDTH = 6
 
 # PLAYFIELD_WIDTH = None
@@ -5,10 +5,16 @@ import logging
 logger = logging.getLogger()
 
 from gamelib.globals import *
+from gamelib.profiler import profiler
 
+from fishyfrens.config import ROTATION_PREWARM, AGENT_POOL_PREWARM
 from fishyfrens.view.camera import camera
+from fishyfrens.view.vignette import vignette
 # from fishyfrens.actor.player import player
-from fishyfrens.actor.agent import Agent, AgentType, BehaviorType
+from fishyfrens.actor.agent import AgentType, BehaviorType
+from fishyfrens.actor.swarm import create_actor_group
+from fishyfrens.actor.rotationcache import rotation_cache
+from fishyfrens.actor.spawner import Spawner, agent_pool
 from fishyfrens.actor.singletons import player, level
 
 
@@ -82,6 +88,8 @@ class LevelVariables:
         self.agent_spawn_interval = 0.1 # seconds
         self.last_krill_spawn_time = time.time()
         self.last_fish_spawn_time = time.time()
+        # levels fill up over a few frames instead of all at once
+        self.spawner = Spawner(agent_pool())
 
         # self.show_vignette: bool = None
         self.show_vignette = False
@@ -140,7 +148,7 @@ class LevelVariables:
 
             # TODO: add a marquee to the queue.  This way we can explain gameplay/level to player
             # TODO: trigger a "yay sound effect"
-            self.gameplay_view.actor_group = pygame.sprite.Group() # KILL ALL AGENTS (wipe the board clean)
+            self.wipe_agents()
 
             camera().resize(SCREEN_WIDTH // 2, SCREEN_HEIGHT * 6)
             self.starting_score = self.gameplay_view.score
@@ -153,7 +161,7 @@ class LevelVariables:
             self.depth_gradient = True
 
         elif self.current_level == 2:
-            self.gameplay_view.actor_group = pygame.sprite.Group() # KILL ALL AGENTS (wipe the board clean)
+            self.wipe_agents()
 
             camera().resize(SCREEN_WIDTH * 4, SCREEN_HEIGHT * 4)
             self.starting_score = self.gameplay_view.score
@@ -167,37 +175,56 @@ class LevelVariables:
         else:
             raise NotImplementedError(f"Level {self.level} not implemented")
 
+        # work out the light around the player now, not on the first dark frame
+        if self.show_vignette:
+            vignette().build(APP_SCREEN)
 
+        # rotate every agent image up front (this only does work the first time)
+        if ROTATION_PREWARM:
+            rotation_cache().prewarm()
 
-    def spawn_krill(self, hide_out_of_sight: bool = False):
-        agent = Agent(AgentType.KRILL)
+        # build this level's agents now, while the board is being reset anyway
+        if AGENT_POOL_PREWARM and self.max_agents:
+            agent_pool().prewarm(self.max_agents)
+
+        # that was loading, not a hitch
+        profiler().reset()
+
+
+
+    def wipe_agents(self):
+        """ KILL ALL AGENTS (wipe the board clean) - they go back in the pool to be respawned """
+        if getattr(self.gameplay_view, "actor_group", None) is not None:
+            agent_pool().release_group(self.gameplay_view.actor_group)
+        self.gameplay_view.actor_group = create_actor_group()
+
+
+
+    def spawn(self, type: AgentType, hide_out_of_sight: bool = False):
+        agent = agent_pool().acquire(type)
         agent.target = player()
         agent.hide_out_of_sight = hide_out_of_sight
         self.gameplay_view.actor_group.add(agent)
 
 
 
+    def spawn_krill(self, hide_out_of_sight: bool = False):
+        self.spawn(AgentType.KRILL, hide_out_of_sight)
+
+
+
     def spawn_fren(self, hide_out_of_sight: bool = False):
-        agent = Agent(AgentType.FRENFISH)
-        agent.target = player()
-        agent.hide_out_of_sight = hide_out_of_sight
-        self.gameplay_view.actor_group.add(agent)
+        self.spawn(AgentType.FRENFISH, hide_out_of_sight)
 
 
 
     def spawn_fish(self, hide_out_of_sight: bool = False):
-        agent = Agent(AgentType.FISH)
-        agent.target = player()
-        agent.hide_out_of_sight = hide_out_of_sight
-        self.gameplay_view.actor_group.add(agent)
+        self.spawn(AgentType.FISH, hide_out_of_sight)
 
 
 
     def spawn_kraken(self, hide_out_of_sight: bool = False):
-        agent = Agent(AgentType.KRAKEN)
-        agent.target = player()
-        agent.hide_out_of_sight = hide_out_of_sight
-        self.gameplay_view.actor_group.add(agent)
+        self.spawn(AgentType.KRAKEN, hide_out_of_sight)
 
 
 
@@ -220,29 +247,13 @@ class LevelVariables:
         #################  LEVEL TWO  #######################
         #####################################################
         elif self.current_level == 1:
-            while len(self.gameplay_view.actor_group) < self.max_agents:
-                random_number = random.uniform(0, 1)
-
-                if random_number < 0.5:
-                    self.spawn_krill( self.hide_out_of_sight )
-                else:
-                    self.spawn_fish( self.hide_out_of_sight )
+            self.spawner.fill(self.gameplay_view.actor_group, self.max_agents, self.spawn_level_1_agent)
 
         #####################################################
         #################  LEVEL THREE  #####################
         #####################################################
         elif self.current_level == 2:
-            while len(self.gameplay_view.actor_group) < self.max_agents:
-                random_number = random.uniform(0, 1)
-                if random_number < 15/32:
-                    # print("This branch runs with a 7/16 probability.")
-                    self.spawn_krill( self.hide_out_of_sight )
-                elif random_number < 15/32 + 16/32:
-                    # print("This branch runs with a 8/16 (or 1/2) probability.")
-                    self.spawn_fish( self.hide_out_of_sight )
-                else:
-                    # print("This branch runs with a 1/16 probability.")
-                    self.spawn_kraken( self.hide_out_of_sight )
+            self.spawner.fill(self.gameplay_view.actor_group, self.max_agents, self.spawn_level_2_agent)
 
 
 
@@ -251,13 +262,37 @@ class LevelVariables:
 
 
 
+    def spawn_level_1_agent(self):
+        random_number = random.uniform(0, 1)
+
+        if random_number < 0.5:
+            self.spawn_krill( self.hide_out_of_sight )
+        else:
+            self.spawn_fish( self.hide_out_of_sight )
+
+
+
+    def spawn_level_2_agent(self):
+        random_number = random.uniform(0, 1)
+        if random_number < 15/32:
+            # print("This branch runs with a 7/16 probability.")
+            self.spawn_krill( self.hide_out_of_sight )
+        elif random_number < 15/32 + 16/32:
+            # print("This branch runs with a 8/16 (or 1/2) probability.")
+            self.spawn_fish( self.hide_out_of_sight )
+        else:
+            # print("This branch runs with a 1/16 probability.")
+            self.spawn_kraken( self.hide_out_of_sight )
+
+
+
     def testing_level_agent_generator(self):
         if self.gameplay_view.clicked:
             self.gameplay_view.clicked = False
 
             for i in range(4):
                 x, y = self.gameplay_view.clicked_pos + camera().offset + pygame.Vector2(random.randint(-100, 100), random.randint(-100, 100))
-                agent = Agent(AgentType.KRILL)
+                agent = agent_pool().acquire(AgentType.KRILL)
                 agent.target = player()
                 agent.max_sight = 200
                 agent.position = pygame.Vector2(x, y)
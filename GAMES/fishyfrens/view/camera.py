@@ -1,6 +1,7 @@
 import random
 from icecream import ic
 
+import numpy as np
 import pygame
 
 from gamelib.globals import APP_SCREEN, SCREEN_WIDTH, SCREEN_HEIGHT
@@ -18,6 +19,10 @@ class Camera:
 
     def __init__(self):
         self.offset = pygame.Vector2(0, 0)
+        # draw with draw_offset - it's between the last two offsets when the view runs on a fixed timestep
+        self.previous_offset = pygame.Vector2(0, 0)
+        self.draw_offset = pygame.Vector2(0, 0)
+        self.alpha = 1
         self.playfield_width = SCREEN_WIDTH
         self.playfield_height = SCREEN_HEIGHT
         self.camera_overpan_x = min(100, self.playfield_width // 3)
@@ -47,6 +52,8 @@ class Camera:
             self.offset = pygame.Vector2(0, 0)
             return
 
+        self.previous_offset = pygame.Vector2(self.offset)
+
         if self.playfield_width > SCREEN_WIDTH:
             self.target_ratio_x = self.target.rect.x / ( self.playfield_width - self.camera_overpan_x - self.target.rect.width)
             max_camera_x = self.playfield_width - SCREEN_WIDTH + self.camera_overpan_x // 2
@@ -66,6 +73,12 @@ class Camera:
         self.parallax_background.update()
 
 
+    def interpolate(self, alpha: float):
+        """ set up draw_offset for a frame that is `alpha` (0 to 1) of the way from the previous update to the last one """
+        self.alpha = alpha
+        self.draw_offset = self.previous_offset.lerp(self.offset, alpha)
+
+
     def draw_effects(self):
         self.parallax_background.draw()
 
@@ -86,36 +99,55 @@ def camera() -> Camera:
 
 
 
-class Particle:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.size = random.uniform(0.8, 3)
-        self.color = (random.randint(200, 255), random.randint(170, 245), 255, random.randint(60, 140))
-        self.velocity = [random.uniform(-0.2, 0.4), random.uniform(-0.2, 0.6)]
-
-    def update(self):
-        self.x += self.velocity[0]
-        self.y += self.velocity[1]
-
-    def draw(self, surface):
-        pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), self.size)
-
 # PSIZEFACTOR = 0.3
 PSIZEFACTOR = 1.3
-PARLLAX_PARTICLES = 500 # TODO: This should be a function of the playfield size (particle density)
+PARALLAX_PARTICLES_PER_SCREEN = 300 # density - how many particles in a screen-sized patch of the background
+PARALLAX_MAX_PARTICLES = 10000 # no matter how big the playfield gets
+PARALLAX_SPRITES = 32 # particles share this many pre-rendered looks
+
+
+def particle_sprite(size: float, color: tuple) -> pygame.Surface:
+    """ one particle, drawn once onto its own little surface """
+    radius = int(size) + 1
+    surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(surface, color, (radius, radius), size)
+    return surface
 
 
 class ParallaxBackground:
+    """ Drifting particles behind the playfield, moving slower than the camera.
+
+        The background is as big as the playfield times PSIZEFACTOR, but nothing that big is ever allocated -
+        positions live in NumPy arrays and only the particles inside the viewport are stamped onto the screen,
+        in one blits() call, from a small bank of pre-rendered sprites.
+    """
+
     def __init__(self, width, height):
         # self.width = int(camera().playfield_width * PSIZEFACTOR)
         # self.height = int(camera().playfield_height * PSIZEFACTOR)
         self.width = int( width )
         self.height = int( height )
-        self.surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        # self.layers = [[Particle(random.randint(0, self.width), random.randint(0, self.height)) for _ in range(100)] for _ in range(3)]
-        self.particles = [Particle(random.randint(0, self.width), random.randint(0, self.height)) for _ in range(500)]  # 100 particles
         self.offset = pygame.Vector2(0, 0)
+        self.previous_offset = pygame.Vector2(0, 0)
+
+        self.sprites = []
+        for _ in range(PARALLAX_SPRITES):
+            color = (random.randint(200, 255), random.randint(170, 245), 255, random.randint(60, 140))
+            self.sprites.append(particle_sprite(random.uniform(0.8, 3), color))
+        # the sprite is blitted from its top-left, the particle is at its center
+        self.half_size = np.array([s.get_width() // 2 for s in self.sprites])
+        self.max_sprite_size = max(s.get_width() for s in self.sprites)
+
+        area = (self.width * self.height) / (SCREEN_WIDTH * SCREEN_HEIGHT)
+        count = min(PARALLAX_MAX_PARTICLES, int(PARALLAX_PARTICLES_PER_SCREEN * area))
+        self.position = np.column_stack((np.random.uniform(0, self.width, count),
+                                         np.random.uniform(0, self.height, count)))
+        self.velocity = np.column_stack((np.random.uniform(-0.2, 0.4, count),
+                                         np.random.uniform(-0.2, 0.6, count)))
+        self.sprite_index = np.random.randint(0, PARALLAX_SPRITES, count)
+        self.size = np.array([self.width, self.height], dtype=float)
+
+        self.drawn = 0 # particles that were in the viewport last frame
 
         self.markers = [
             pygame.Rect(0, 0, 10, 10),  # Top Left
@@ -126,11 +158,9 @@ class ParallaxBackground:
         ]
 
     def update(self):
-        for particle in self.particles:
-                particle.update()
-        # for layer in self.layers:
-        #     for particle in layer:
-        #         particle.update()
+        self.position += self.velocity
+        # NOTE: they used to drift off the edge and never come back - wrap them around so the density holds
+        np.mod(self.position, self.size, out=self.position)
 
         parallax_range_x = self.width - SCREEN_WIDTH
         parallax_offset_x = parallax_range_x * (1 - camera().target_ratio_x) - parallax_range_x
@@ -138,22 +168,24 @@ class ParallaxBackground:
         parallax_range_y = self.height - SCREEN_HEIGHT
         parallax_offset_y = parallax_range_y * (1 - camera().target_ratio_y) - parallax_range_y
 
+        self.previous_offset = self.offset
         self.offset = pygame.Vector2(parallax_offset_x, parallax_offset_y)
 
 
     def draw(self):
-        # self.surface.fill((0, 0, 0, 0))  # Clear surface
-        # for i, layer in enumerate(self.layers):
-        #     parallax_factor = 0.1 + i * 0.01
-        #     offset_x = self.offset.x * parallax_factor
-        #     offset_y = self.offset.y * parallax_factor
-        #     for particle in layer:
-        #         particle.draw(self.surface)
-
-        # TODO: really need to optimize this...
-        self.surface.fill((0, 0, 0, 0))  # Clear surface
-        for particle in self.particles:
-            particle.draw(self.surface)
+        offset = self.previous_offset.lerp(self.offset, camera().alpha)
+        ox, oy = int(offset.x), int(offset.y)
+
+        # top-left of every particle's sprite on screen
+        x = self.position[:, 0].astype(int) + (ox - self.half_size[self.sprite_index])
+        y = self.position[:, 1].astype(int) + (oy - self.half_size[self.sprite_index])
+
+        visible = (x > -self.max_sprite_size) & (x < SCREEN_WIDTH) & (y > -self.max_sprite_size) & (y < SCREEN_HEIGHT)
+        sprites = self.sprites
+        APP_SCREEN.blits([(sprites[i], (px, py)) for i, px, py in zip(self.sprite_index[visible].tolist(),
+                                                                        x[visible].tolist(),
+                                                                        y[visible].tolist())], False)
+        self.drawn = int(visible.sum())
+
         for marker in self.markers:
-            pygame.draw.rect(self.surface, (255, 0, 0), marker)  # Draw on parallax surface
-        APP_SCREEN.blit(self.surface, (int(self.offset.x), int(self.offset.y)))
+            pygame.draw.rect(APP_SCREEN, (255, 0, 0), marker.move(ox, oy))
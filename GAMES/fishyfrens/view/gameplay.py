@@ -1,4 +1,3 @@
-import os
 import time
 import random
 
@@ -19,7 +18,9 @@ from gamelib.utils import lerp_color
 # from gamelib.cooldown_keys import CooldownKey, KEY_UP, KEY_DOWN, KEY_LEFT, KEY_RIGHT
 from gamelib.cooldown_keys import *
 from gamelib.viewstate import View
-from gamelib.text import text
+from gamelib.text import text, text_cache
+from gamelib.timestep import FixedTimestep
+from gamelib.profiler import profiler
 
 from fishyfrens import debug
 from fishyfrens.config import *
@@ -31,9 +32,15 @@ from fishyfrens.actor.singletons import level, create_levels, player
 
 from fishyfrens.audio import audio
 from fishyfrens.view.camera import camera, ParallaxBackground
+from fishyfrens.view.vignette import vignette
 
 from fishyfrens.actor import BehaviorType
-from fishyfrens.actor.agent import Agent, AgentType
+from fishyfrens.actor.agent import Agent, AgentType, load_AGENT_IMAGES
+from fishyfrens.actor.swarm import update_neighbor_grid, lod_counts
+from fishyfrens.actor.spatialgrid import SpatialHashGrid
+from fishyfrens.actor.rotationcache import rotation_cache
+from fishyfrens.actor.collision import CollisionPipeline, agent_reach
+from fishyfrens.actor.spawner import agent_pool
 
 # from fishyfrens.actor.player import player, create_player
 
@@ -41,24 +48,6 @@ from fishyfrens.actor.agent import Agent, AgentType
 PLAYER_ACCELERATION = 1
 
 
-# TODO: move this to a better place
-def create_vignette_surface():
-    # file_name = 'vdonewhitehuge.png'
-    file_name = "v1cleanhuge.png"
-    scale = 2
-    surface = pygame.image.load(
-        os.path.join(MY_DIR, "resources", "img", "vignette", file_name)
-    ).convert_alpha()
-    surface = pygame.transform.scale(
-        surface, (surface.get_width() * scale, surface.get_height() * scale)
-    )
-    surface.set_colorkey((255, 255, 255))
-    return surface
-
-
-vignette_surface = create_vignette_surface()
-
-
 class GameplayView(View):
     def __init__(self):
         super().__init__()
@@ -90,10 +79,28 @@ class GameplayView(View):
         self.clicked = False
         self.clicked_pos = None
 
+        self.neighbor_grid = SpatialHashGrid()
+
+        # update() runs at a fixed tick rate no matter how fast we can draw
+        self.timestep = FixedTimestep(
+            App.get_instance().manifest_key_value("tick_rate", TICK_RATE),
+            MAX_CATCH_UP_STEPS,
+        )
+
+        # what happens when the player touches each type of agent (frenfish don't collide)
+        # (how far it reaches is known once the agent images are loaded, in setup())
+        self.collisions = CollisionPipeline(0)
+        self.collisions.on(AgentType.KRILL, self.eat_krill)
+        self.collisions.on(AgentType.FISH, self.eat_fish)
+        self.collisions.on(AgentType.KRAKEN, self.hit_kraken)
+
     def setup(self):
         # NOTE: This is called when the view is switched to, so it's a good place to reset things
         # we can also use this to setup the view the first time it's run instead of in __init__()
 
+        # done preloading by now, unless the player was really quick
+        self.collisions.reach = agent_reach(load_AGENT_IMAGES())
+
         starting_level = App.get_instance().manifest_key_value(
             "starting_level", 0
         )  # TODO: find a way to set
@@ -123,7 +130,7 @@ class GameplayView(View):
 
         # camera().target = self.player
         camera().target = player()
-        self.actor_group = pygame.sprite.Group()
+        level().wipe_agents()
 
         for key in self.cooldown_keys.values():
             key.reset()
@@ -137,7 +144,11 @@ class GameplayView(View):
         if self.paused:
             return
 
-        self.actor_group.update(self.actor_group)
+        # one grid per frame serves every agent's flock neighbor query
+        with profiler().phase("grid"):
+            update_neighbor_grid(self.neighbor_grid, self.actor_group)
+        with profiler().phase("steering"):
+            self.actor_group.update(self.neighbor_grid)
 
         self.handle_cooldown_keys()
         player().update()
@@ -152,6 +163,9 @@ class GameplayView(View):
         camera().update()  # this should be done last ( now updates parallax background too)
 
     def draw(self):
+        # nothing moves while paused, so there's nothing to interpolate
+        camera().interpolate(1 if self.paused else self.timestep.alpha)
+
         APP_SCREEN.fill((23, 21, 25))
 
         if level().depth_gradient:
@@ -165,8 +179,8 @@ class GameplayView(View):
             APP_SCREEN,
             bg_color,
             (
-                -camera().offset.x,
-                -camera().offset.y,
+                -camera().draw_offset.x,
+                -camera().draw_offset.y,
                 camera().playfield_width,
                 camera().playfield_height,
             ),
@@ -186,19 +200,7 @@ class GameplayView(View):
 
         # VIGNETTE
         if level().show_vignette:
-            APP_SCREEN.blit(
-                vignette_surface,
-                # (self.player.position.x - camera().offset.x - vignette_surface.get_width() // 2, self.player.position.y - camera().offset.y - vignette_surface.get_height() //2),
-                (
-                    player().position.x
-                    - camera().offset.x
-                    - vignette_surface.get_width() // 2,
-                    player().position.y
-                    - camera().offset.y
-                    - vignette_surface.get_height() // 2,
-                ),
-                special_flags=pygame.BLEND_RGBA_MULT,
-            )
+            vignette().draw(APP_SCREEN, player().draw_position() - camera().draw_offset)
 
         # self.player.draw_life_bar()
         player().draw_life_bar()
@@ -254,6 +256,8 @@ class GameplayView(View):
         )
 
         if debug.DRAW_STATS:
+            # frame time graph and where the time went, top left (press O to write it to a file)
+            profiler().draw(APP_SCREEN)
             fps = f"FPS: {App.get_instance().clock.get_fps():.0f}"
             speed = round(player().velocity.magnitude(), 1)
             text(
@@ -297,6 +301,56 @@ class GameplayView(View):
                 color=arcade_color.PIGGY_PINK,
                 center=True,
             )
+            onscreen, near, far = lod_counts(self.actor_group)
+            text(
+                APP_SCREEN,
+                f"on screen: {onscreen}  near: {near}  far: {far}",
+                (SCREEN_WIDTH // 2, 160),
+                font_size=20,
+                color=arcade_color.PIGGY_PINK,
+                center=True,
+            )
+            text(
+                APP_SCREEN,
+                f"rotation cache: {rotation_cache().hit_rate:.1%} hits, {rotation_cache().bytes / 1_000_000:.1f} MB",
+                (SCREEN_WIDTH // 2, 180),
+                font_size=20,
+                color=arcade_color.PIGGY_PINK,
+                center=True,
+            )
+            text(
+                APP_SCREEN,
+                f"collisions: {self.collisions.candidates} candidates, {self.collisions.narrowphase_tests} mask tests, {self.collisions.hits} hits",
+                (SCREEN_WIDTH // 2, 200),
+                font_size=20,
+                color=arcade_color.PIGGY_PINK,
+                center=True,
+            )
+            text(
+                APP_SCREEN,
+                f"agent pool: {len(agent_pool().free)} free, {agent_pool().reused} reused, {level().spawner.spawned_last_frame} spawned this frame",
+                (SCREEN_WIDTH // 2, 220),
+                font_size=20,
+                color=arcade_color.PIGGY_PINK,
+                center=True,
+            )
+            parallax = camera().parallax_background
+            text(
+                APP_SCREEN,
+                f"parallax: {parallax.drawn} of {len(parallax.position)} particles drawn",
+                (SCREEN_WIDTH // 2, 240),
+                font_size=20,
+                color=arcade_color.PIGGY_PINK,
+                center=True,
+            )
+            text(
+                APP_SCREEN,
+                f"text cache: {text_cache().hit_rate:.1%} hits, {len(text_cache().surfaces)} surfaces, {text_cache().bytes / 1_000_000:.1f} MB",
+                (SCREEN_WIDTH // 2, 260),
+                font_size=20,
+                color=arcade_color.PIGGY_PINK,
+                center=True,
+            )
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -324,6 +378,8 @@ class GameplayView(View):
                 debug.DRAW_RECTS = not debug.DRAW_RECTS
             elif event.key == pygame.K_b:
                 debug.DRAW_STATS = not debug.DRAW_STATS
+            elif event.key == pygame.K_o:
+                profiler().dump()
             elif event.key == pygame.K_LEFTBRACKET:
                 camera().resize(camera().playfield_width - 200, camera().playfield_height - 200)
             elif event.key == pygame.K_RIGHTBRACKET:
@@ -334,7 +390,7 @@ class GameplayView(View):
                 level().set_level(self, next_level=True)
 
             if event.key == pygame.K_l:
-                self.actor_group = pygame.sprite.Group()
+                level().wipe_agents()
 
             self.handle_cooldown_keys(event.key)
         elif event.type == pygame.KEYUP:
@@ -367,8 +423,7 @@ class GameplayView(View):
         # arcade.draw_arc_filled(center_x, center_y, radius, radius, arcade.color.WHITE, end_angle, start_angle, 90)
         # arcade.draw_text(f"Hold <ESCAPE> to quit", center_x, center_y - radius, arcade.color.WHITE_SMOKE, font_size=20, anchor_x="center", anchor_y="center")
         # pygame.draw.arc(APP_SCREEN, Colors.WHITE, (center_x - radius, center_y - radius, radius * 2, radius * 2), start_angle, end_angle, 90)
-        font = pygame.font.SysFont(None, 70)
-        text = font.render("Hold <ESCAPE> to quit", True, arcade_color.WHITE_SMOKE)
+        text = text_cache().render("Hold <ESCAPE> to quit", None, 70, arcade_color.WHITE_SMOKE)
         text_rect = text.get_rect(center=(center_x, center_y - radius))
         APP_SCREEN.blit(text, text_rect)
         pygame.draw.arc(
@@ -395,67 +450,10 @@ class GameplayView(View):
             player().boost()
 
     def handle_collisions(self):
-        # find all agents within the screen
-        agents_within_proximity = pygame.sprite.Group()
-        # for agent in self.actor_group:
-        #     if agent.position.x - camera().offset.x < 100 \
-        #     or agent.position.x - camera().offset.x > SCREEN_WIDTH - 100 \
-        #         or agent.position.y - camera().offset.y < 100 \
-        #             or agent.position.y - camera().offset.y > SCREEN_HEIGHT - 100:
-        # for agent in self.actor_group:
-        #     if agent.is_onscreen:
-        #         visible_agents.add(agent)
-
-        # TODO play around with these algorithms... set visible_onscreen to false for all agents we aren't calculating to visualise effectiveness
-
-        for agent in self.actor_group:
-            # distance from player to agent
-            # distance = self.player.position.distance_to(agent.position)
-            distance = player().position.distance_to(agent.position)
-            if (
-                distance < 150
-            ):  # this doesn't always work... HMMM... fucking arbitrary... # TODO
-                agents_within_proximity.add(agent)
-
-        # TODO print important performance metrics here
-        # print(f"% of visible agents: {len(visible_agents) / len(self.actor_group)}")
-        # logger.debug(f"visible agents: {len(agents_within_proximity)} / fps: {App.get_instance().clock.get_fps():.0f}")
-
-        # collisions = pygame.sprite.spritecollide(self.player, self.actor_group, False, pygame.sprite.collide_mask)
-        # collisions = pygame.sprite.spritecollide(self.player, agents_within_proximity, False, pygame.sprite.collide_mask)
-        collisions = pygame.sprite.spritecollide(
-            player(), agents_within_proximity, False, pygame.sprite.collide_mask
-        )
-        for agent in collisions:
-            # agent.dead = True
-            if agent.type == AgentType.KRILL:
-                audio().dink()
-                self.score += 1
-                # self.stomach[AgentType.KRILL][agent.subtype] += 1
-                self.stomach[AgentType.KRILL] += 1
-                # self.player.adjust_life(13) # faster
-                player().adjust_life(13)  # faster
-            elif agent.type == AgentType.FISH:
-                audio().dink()
-                self.score += 2
-                # self.stomach[AgentType.FISH][agent.subtype] += 1
-                self.stomach[AgentType.FISH] += 1
-                # self.player.adjust_life(5) # more plentiful
-                player().adjust_life(5)  # more plentiful
-            elif agent.type == AgentType.FRENFISH:
-                continue
-            elif agent.type == AgentType.KRAKEN:
-                self.score -= 3
-                # self.stomach[AgentType.KRAKEN][agent.subtype] += 1
-                self.stomach[AgentType.KRAKEN] += 1
-                # audio().oww( self.player.name )
-                audio().oww(player().name)
-                # self.player.adjust_life(-15)
-                player().adjust_life(-15)
-
-            # TODO: let's call a callback in order to do cool things before we destroy the agent.
-            self.actor_group.remove(agent)
-            del agent
+        # the neighbor grid was rebuilt at the top of update(), so it already knows where every agent is
+        with profiler().phase("collisions"):
+            for agent in self.collisions.run(player(), self.neighbor_grid, self.actor_group):
+                agent_pool().release(agent)
 
         if (
             level().current_level > 0
@@ -463,3 +461,25 @@ class GameplayView(View):
         ):  # level().LEVEL_SCORE_PROGRESSION[level().current_level] - level().LEVEL_SCORE_PROGRESSION[level().current_level - 1]:
             # if level().current_level > 0 and self.score > level().LEVEL_SCORE_PROGRESSION[level().current_level] - level().LEVEL_SCORE_PROGRESSION[level().current_level - 1]:
             level().set_level(self, next_level=True)
+
+    # TODO: let's do cool things in these before we destroy the agent.
+    def eat_krill(self, agent) -> bool:
+        audio().dink()
+        self.score += 1
+        self.stomach[AgentType.KRILL] += 1
+        player().adjust_life(13)  # faster
+        return True
+
+    def eat_fish(self, agent) -> bool:
+        audio().dink()
+        self.score += 2
+        self.stomach[AgentType.FISH] += 1
+        player().adjust_life(5)  # more plentiful
+        return True
+
+    def hit_kraken(self, agent) -> bool:
+        self.score -= 3
+        self.stomach[AgentType.KRAKEN] += 1
+        audio().oww(player().name)
+        player().adjust_life(-15)
+        return True
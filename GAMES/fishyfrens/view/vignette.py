@@ -0,0 +1,108 @@
+import math
+import logging
+logger = logging.getLogger()
+
+import numpy as np
+import pygame
+
+from fishyfrens.config import VIGNETTE_INNER_RADIUS, VIGNETTE_OUTER_RADIUS, VIGNETTE_COLOR
+
+
+# the white disc in the middle is left out of the multiply in bands this tall
+LIT_BAND_HEIGHT = 64
+
+
+class Vignette:
+    """ A pool of light around a point - everything further than `outer_radius` from it is dimmed to `color`.
+
+        The light is worked out once (at level setup) as a patch in the screen's own pixel format: white out to
+        `inner_radius`, easing down to `color` at `outer_radius` and staying that color out to the patch's edges. The
+        point is always on the screen, so a patch twice the screen's size covers it wherever the point is - no part
+        of the screen is ever left out, and nothing outside what can be seen is made.
+
+        Each frame multiplies in the part of the patch that's on the screen, minus the white disc in the middle
+        (multiplying by white changes nothing).
+
+        NOTE: BLEND_RGB_MULT blits of the patch beat filling the dark part with a blend flag (many times slower) or
+        covering it with a dark surface with alpha
+    """
+
+    def __init__(self, inner_radius: int = VIGNETTE_INNER_RADIUS, outer_radius: int = VIGNETTE_OUTER_RADIUS, color: tuple = VIGNETTE_COLOR):
+        self.inner_radius = inner_radius
+        self.outer_radius = outer_radius
+        self.color = color
+
+        self.patch: pygame.Surface = None
+        self.rects = [] # the parts of the patch that aren't all white
+        self.built_for = None # (screen size, pixel format) the patch was made for
+
+
+    def build(self, screen: pygame.Surface):
+        """ make the patch for this screen - does nothing if it's already made for one like it """
+        key = (screen.get_size(), screen.get_bitsize(), screen.get_masks())
+        if key == self.built_for:
+            return
+
+        width, height = screen.get_size()
+        self.patch = pygame.Surface((width * 2, height * 2)).convert(screen)
+        self.patch.fill(self.color)
+        center = self.patch.get_rect().center
+
+        # only the light itself needs working out - it's all `color` past the outer radius. It's worked out all the way
+        # to the outer radius, cropped to the patch (on a screen under 640 px across, the patch is smaller than it)
+        offsets_x = np.arange(-min(self.outer_radius, width), min(self.outer_radius, width), dtype=np.float32) + 0.5
+        offsets_y = np.arange(-min(self.outer_radius, height), min(self.outer_radius, height), dtype=np.float32) + 0.5
+        # surfarray is indexed [x][y]
+        distance = np.hypot(offsets_x[:, None], offsets_y[None, :])
+
+        # smoothstep from the inner radius to the outer one
+        t = np.clip((distance - self.inner_radius) / (self.outer_radius - self.inner_radius), 0, 1)
+        t = t * t * (3 - 2 * t)
+
+        pixels = np.empty((len(offsets_x), len(offsets_y), 3), dtype=np.uint8)
+        for channel, value in enumerate(self.color):
+            pixels[:, :, channel] = np.rint(255 + (value - 255) * t)
+        light = pygame.surfarray.make_surface(pixels)
+        self.patch.blit(light, light.get_rect(center=center))
+
+        # everything in the patch but the white disc in the middle, as bands across it - a bit inside the inner radius
+        # so rounding never leaves out a pixel that isn't quite white
+        lit = self.inner_radius - 2
+        self.rects = [
+            pygame.Rect(0, 0, width * 2, center[1] - lit),
+            pygame.Rect(0, center[1] + lit, width * 2, height * 2 - center[1] - lit),
+        ]
+        for top in range(center[1] - lit, center[1] + lit, LIT_BAND_HEIGHT):
+            bottom = min(top + LIT_BAND_HEIGHT, center[1] + lit)
+            # the disc is narrowest at the band's edge furthest from the middle
+            furthest = max(abs(top - center[1]), abs(bottom - center[1]))
+            half = int(math.sqrt(max(lit * lit - furthest * furthest, 0)))
+            self.rects.append(pygame.Rect(0, top, center[0] - half, bottom - top))
+            self.rects.append(pygame.Rect(center[0] + half, top, width * 2 - center[0] - half, bottom - top))
+
+        self.built_for = key
+        logger.debug(f"vignette patch {self.patch.get_width()} x {self.patch.get_height()} built")
+
+
+    def draw(self, screen: pygame.Surface, center):
+        if self.patch is None:
+            self.build(screen)
+
+        patch = self.patch.get_rect(center=(round(center[0]), round(center[1])))
+        # the screen, where it is on the patch
+        visible = screen.get_rect().move(-patch.x, -patch.y)
+
+        for rect in self.rects:
+            area = rect.clip(visible)
+            if area:
+                screen.blit(self.patch, (area.x + patch.x, area.y + patch.y), area, special_flags=pygame.BLEND_RGB_MULT)
+
+
+
+_vignette = None
+
+def vignette() -> Vignette:
+    global _vignette
+    if _vignette is None:
+        _vignette = Vignette()
+    return _vignette
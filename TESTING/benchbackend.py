@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+The backend server (lnarcade.backend.server) next to a running launcher: does being scraped cost the render loop
+anything, and how long does a scrape take.
+
+    frames      a launcher-like loop (fill, blit, flip, metrics().frame()) at 60 fps - alone, then while another
+                thread asks for /metrics every --scrape-every seconds
+    scrape      how long GET /metrics takes, and what the page looks like (lines, bytes)
+    admin       /api/status, /api/free_play and /api/games/reload answered (the reload is handed to the loop as a
+                pygame event, the way the game menu gets it)
+
+Runs on SDL's dummy video driver with a made-up launch in the supervisor's history. The wallet daemon isn't
+started - arcade_wallet_up reads 0 unless one is already listening. FREE_PLAY is written to a scratch config file.
+
+Prints one JSON object (append it to a file with --output).
+
+    python3 benchbackend.py --seconds 5
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+import argparse
+import urllib.request
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # lnarcade is at the repo top
+
+import numpy as np
+import pygame
+
+from lnarcade.app import App
+from lnarcade.backend.metrics import metrics
+from lnarcade.backend.server import ArcadeServerPage, RELOAD_GAMES
+from lnarcade.utilities.manifest_index import manifest_index
+from lnarcade.utilities.supervisor import GameSupervisor, GameRun
+
+FPS = 60
+PORT = 18321
+
+
+def ms(times) -> dict:
+    times = np.array(times) * 1000
+    return {"p50": round(float(np.percentile(times, 50)), 2), "p99": round(float(np.percentile(times, 99)), 2),
+            "max": round(float(times.max()), 2)}
+
+
+def request(path: str, method: str = "GET", body: dict = None) -> tuple:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(f"http://127.0.0.1:{PORT}{path}", data=data, method=method)
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return response.status, response.read().decode()
+
+
+def run_frames(screen, seconds: float, scrape_every: float = None) -> dict:
+    """ the launcher's loop for a while - optionally with /metrics scraped from another thread """
+    stop = threading.Event()
+    scrapes = []
+
+    def scraper():
+        while not stop.is_set():
+            t = time.perf_counter()
+            request("/metrics")
+            scrapes.append(time.perf_counter() - t)
+            stop.wait(scrape_every)
+
+    thread = None
+    if scrape_every is not None:
+        thread = threading.Thread(target=scraper, daemon=True)
+        thread.start()
+
+    clock = pygame.time.Clock()
+    background = pygame.Surface(screen.get_size())
+    background.fill((30, 30, 60))
+    times = []
+    work = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        for event in pygame.event.get():
+            if event.type == RELOAD_GAMES:
+                manifest_index().clear()
+                event.reply.set_result(len(manifest_index().scan()))
+        t = time.perf_counter()
+        screen.blit(background, (0, 0))
+        pygame.display.flip()
+        work.append(time.perf_counter() - t)
+        clock.tick(FPS)
+        metrics().frame(clock.get_time(), clock.get_rawtime())
+        times.append(clock.get_time() / 1000)
+
+    stop.set()
+    if thread is not None:
+        thread.join()
+    return {
+        "frame_ms": ms(times),
+        "work_ms": ms(work),
+        "frames_over_1.5x_budget": sum(t > 1.5 / FPS for t in times),
+        "scrapes": len(scrapes),
+        "scrape_ms": ms(scrapes) if scrapes else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Launcher frame times while the backend's /metrics is scraped")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--scrape-every", type=float, default=0.01, help="seconds between scrapes (Prometheus: 15)")
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((1280, 720))
+
+    # just enough of the launcher for the pages - App.configure_instance() wants a real display and config.env
+    app = App.__new__(App)
+    App._instance = app
+    app.supervisor = GameSupervisor()
+    run = GameRun("Fishy Frens", ["python3", "main.py"], pid=1, launch_seconds=0.012, wall_seconds=42.0, exit_code=0)
+    app.supervisor.history.append(run)
+    metrics().game_launched(run)
+    metrics().game_exited(run)
+
+    env_path = os.path.join(tempfile.mkdtemp(), "config.env")
+    open(env_path, "w").close()
+    backend = ArcadeServerPage(env_path, port=PORT)
+    threading.Thread(target=backend.start_server, daemon=True).start()
+    time.sleep(0.5)
+
+    result = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "fps": FPS, "scrape_every": args.scrape_every}
+    result["alone"] = run_frames(screen, args.seconds)
+    result["scraped"] = run_frames(screen, args.seconds, args.scrape_every)
+
+    status, page = request("/metrics")
+    result["page"] = {"status": status, "lines": page.count("\n"), "bytes": len(page)}
+
+    # the reload needs the loop running to answer it
+    reload_answer = {}
+    def reload():
+        reload_answer["reply"] = request("/api/games/reload", "POST")
+    thread = threading.Thread(target=reload)
+    thread.start()
+    run_frames(screen, 0.5)
+    thread.join()
+
+    result["admin"] = {
+        "status": json.loads(request("/api/status")[1]),
+        "free_play": json.loads(request("/api/free_play", "POST", {"enabled": False})[1]),
+        "free_play_saved": open(env_path).read().strip(),
+        "reload": json.loads(reload_answer["reply"][1]),
+    }
+
+    backend.stop()
+    pygame.quit()
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
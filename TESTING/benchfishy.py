@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Headless fishyfrens benchmark - no display, no sound, no hands on the controls.
+
+Builds the GameplayView at a given level and agent count, steps it a fixed number of frames (one update + one draw
+each) with a fixed seed and a scripted player, and times each phase of the frame:
+
+    grid, steering, walls, rotation_mask, collisions, spawning, parallax, draw  (plus "other" and the whole "frame")
+
+Prints one JSON object - append it to a file with --output to track regressions across commits.
+
+    python3 benchfishy.py --level 2 --agents 1200 --frames 300
+    python3 benchfishy.py --backend reference --output bench.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import functools
+import contextlib
+import subprocess
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from fishyfrens.app import App
+from fishyfrens.config import BOID_BACKEND
+
+
+# phase name -> the (class or module, function name) pairs that make it up
+# only leaf functions are listed so no time is counted twice
+def phase_targets():
+    from fishyfrens.actor.boid import Boid
+    from fishyfrens.actor.agent import Agent
+    from fishyfrens.actor.swarm import BoidSwarm
+    from fishyfrens.actor.rotationcache import RotationCache
+    from fishyfrens.actor.spawner import Spawner
+    from fishyfrens.view.camera import ParallaxBackground
+    from fishyfrens.view import gameplay
+
+    return {
+        "grid": [(gameplay, "update_neighbor_grid")],
+        "steering": [(BoidSwarm, "update_steering"), (Boid, "update_steering")],
+        "walls": [(BoidSwarm, "handle_walls"), (Agent, "bounce_off_walls"), (Agent, "wrap_screen")],
+        "rotation_mask": [(RotationCache, "get")],
+        "collisions": [(gameplay.GameplayView, "handle_collisions")],
+        "spawning": [(Spawner, "fill")],
+        "parallax": [(ParallaxBackground, "update")],
+        "draw": [(gameplay.GameplayView, "draw")],
+    }
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.current = {}
+        self.frames = {}
+
+    def instrument(self, targets: dict):
+        for phase, functions in targets.items():
+            self.current[phase] = 0.0
+            for owner, name in functions:
+                setattr(owner, name, self.timed(phase, getattr(owner, name)))
+        self.reset()
+
+    def timed(self, phase, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.current[phase] += time.perf_counter() - start
+        return wrapper
+
+    def end_frame(self, frame_seconds: float):
+        for phase, seconds in self.current.items():
+            self.frames[phase].append(seconds)
+        self.frames["other"].append(frame_seconds - sum(self.current.values()))
+        self.frames["frame"].append(frame_seconds)
+        for phase in self.current:
+            self.current[phase] = 0.0
+
+    def reset(self):
+        for phase in self.current:
+            self.current[phase] = 0.0
+        self.frames = {phase: [] for phase in list(self.current) + ["other", "frame"]}
+
+    def summary(self) -> dict:
+        result = {}
+        for phase, seconds in self.frames.items():
+            ms = np.array(seconds) * 1000
+            result[phase] = {
+                "mean_ms": round(float(ms.mean()), 4),
+                "p50_ms": round(float(np.percentile(ms, 50)), 4),
+                "p95_ms": round(float(np.percentile(ms, 95)), 4),
+                "max_ms": round(float(ms.max()), 4),
+                "total_ms": round(float(ms.sum()), 3),
+            }
+        return result
+
+
+class ScriptedPlayer:
+    """ holds a random set of arrow keys for a random number of frames, then picks again (seeded, so repeatable) """
+
+    KEYS = (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT)
+
+    def __init__(self, view, seed: int):
+        self.view = view
+        self.rng = random.Random(seed)
+        self.held = set()
+        self.frames_left = 0
+
+    def step(self):
+        if self.frames_left > 0:
+            self.frames_left -= 1
+            return
+
+        wanted = {k for k in self.KEYS if self.rng.random() < 0.35}
+        for key in self.held - wanted:
+            self.view.handle_event(pygame.event.Event(pygame.KEYUP, key=key))
+        for key in wanted - self.held:
+            self.view.handle_event(pygame.event.Event(pygame.KEYDOWN, key=key))
+        self.held = wanted
+        self.frames_left = self.rng.randint(10, 60)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args) -> dict:
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+
+    app = App.get_instance()
+    game_config = app.manifest.setdefault("game_config", {})
+    game_config["starting_level"] = args.level
+    if args.backend is not None:
+        game_config["boid_backend"] = args.backend
+    app.manifest["god_mode"] = True
+
+    from fishyfrens.audio import audio
+    from fishyfrens.actor.singletons import create_player, level
+    audio().quiet = True
+    create_player("myca")
+
+    timer = PhaseTimer()
+    timer.instrument(phase_targets())
+
+    app.viewmanager.run_view("gameplay")
+    view = app.viewmanager.current_state
+    level().winning_score = float("inf") # stay on this level
+    if level().life_suck_rate is None:
+        level().life_suck_rate = 1 # only level zero sets this
+    if args.agents is not None:
+        level().max_agents = args.agents
+    if args.level == 0:
+        # level zero only spawns where you click
+        while len(view.actor_group) < (args.agents or 0):
+            level().spawn_krill()
+
+    scripted = ScriptedPlayer(view, args.seed)
+
+    def frame():
+        scripted.step()
+        start = time.perf_counter()
+        view.update()
+        view.draw()
+        pygame.display.flip()
+        return time.perf_counter() - start
+
+    for _ in range(args.warmup):
+        frame()
+    timer.reset()
+
+    wall_start = time.perf_counter()
+    for _ in range(args.frames):
+        timer.end_frame(frame())
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "level": args.level,
+        "agents": len(view.actor_group),
+        "frames": args.frames,
+        "seed": args.seed,
+        "backend": app.manifest_key_value("boid_backend", BOID_BACKEND),
+        "screen": list(app.screen.get_size()),
+        "fps": round(args.frames / wall, 2),
+        "phases": timer.summary(),
+    }
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="headless fishyfrens benchmark")
+    parser.add_argument("--level", type=int, default=2)
+    parser.add_argument("--agents", type=int, default=None, help="agent count (default: the level's max_agents)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=60, help="frames to run (and fill the level) before timing")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--backend", choices=("numpy", "reference"), default=None)
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    # the game prints as it goes - keep stdout for the result
+    with contextlib.redirect_stdout(sys.stderr):
+        result = run(args)
+
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
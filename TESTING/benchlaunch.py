@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Game startup time - a cold `python` vs a fork of the launcher's zygote (lnarcade.utilities.zygote).
+
+Each round launches a probe that does what a game does before its first frame - imports pygame, numpy and gamelib,
+and with --app also builds fishyfrens' App (display, manifest, views) - then exits. The time is from the launch call
+until the probe has exited.
+
+Prints one JSON object (append it to a file with --output).
+
+    python3 benchlaunch.py --rounds 10
+    python3 benchlaunch.py --app
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+from lnarcade.utilities.supervisor import LocalProcess
+from lnarcade.utilities.zygote import Zygote, ZYGOTE_PRELOAD, zygote_argv
+
+
+# {app} is filled in with --app - the probe's command line is the same either way
+PROBE = """
+import pygame
+import numpy
+import gamelib.viewstate
+import gamelib.text
+if {app}:
+    from fishyfrens.app import App
+    App.get_instance()
+    pygame.quit()
+"""
+
+
+def wait(process) -> float:
+    """poll until the probe exits - returns its exit code"""
+    while True:
+        status = process.poll()
+        if status is not None:
+            return status.exit_code
+        time.sleep(0.001)
+
+
+def launch_times(start, rounds: int) -> list:
+    times = []
+    for _ in range(rounds):
+        t = time.perf_counter()
+        exit_code = wait(start())
+        times.append(time.perf_counter() - t)
+        if exit_code != 0:
+            raise SystemExit(f"probe exited with {exit_code}")
+    return times
+
+
+def summary(seconds: list) -> dict:
+    ms = np.array(seconds) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "min_ms": round(float(ms.min()), 1),
+        "max_ms": round(float(ms.max()), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cold vs zygote game startup")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--app", action="store_true", help="also build fishyfrens' App in the probe")
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write(PROBE.format(app=args.app))
+        probe = f.name
+
+    command = ["python3", probe]
+    cwd = os.getcwd()
+
+    try:
+        preload = ZYGOTE_PRELOAD + (["fishyfrens.config"] if args.app else [])
+        started = time.perf_counter()
+        zygote = Zygote(preload)
+        while not zygote.poll_ready(0.01):
+            if zygote.process.poll() is not None:
+                raise SystemExit("the zygote died")
+        zygote_ready = time.perf_counter() - started
+
+        cold = launch_times(lambda: LocalProcess(command, cwd), args.rounds)
+        forked = launch_times(lambda: zygote.fork(zygote_argv(command), cwd), args.rounds)
+        zygote.close()
+    finally:
+        os.unlink(probe)
+
+    result = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rounds": args.rounds,
+        "app": args.app,
+        "zygote_ready_ms": round(zygote_ready * 1000, 1),
+        "cold": summary(cold),
+        "zygote": summary(forked),
+        "speedup": round(float(np.median(cold) / np.median(forked)), 1),
+    }
+
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
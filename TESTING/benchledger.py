@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Concurrent debits against one credit ledger (arcade_ledger.CreditLedger) from several processes - like several
+games (or player stations) on one cabinet spending credits at once.
+
+For each process count, every process debits one credit at a time from its own sessions (and, with --shared,
+from one session they all spend from), as fast as it can. Reports debits per second, the per-debit latency, and
+checks the books: every debit that succeeded is in the ledger, and no session went below zero even when the
+processes asked for more credits than there were.
+
+Prints one JSON object (append it to a file with --output).
+
+    python3 benchledger.py --processes 1,2,4,8 --debits 2000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # arcade_ledger is at the repo top
+
+from arcade_ledger import CreditLedger
+
+SHARED_SESSION = "shared"
+
+
+def worker(path: str, session_id: str, debits: int, start, results):
+    ledger = CreditLedger(path)
+    latencies = np.empty(debits)
+    taken = 0
+    start.wait()
+    began = time.perf_counter()
+    for i in range(debits):
+        t = time.perf_counter()
+        try:
+            ledger.debit(session_id)
+            taken += 1
+        except ValueError:
+            pass # out of credits - expected with --shared
+        latencies[i] = time.perf_counter() - t
+    results.put((session_id, taken, time.perf_counter() - began, latencies))
+    ledger.close()
+
+
+def run(processes: int, debits: int, shared: bool) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "ledger.sqlite3")
+    ledger = CreditLedger(path)
+
+    sessions = [SHARED_SESSION] * processes if shared else [f"station-{i}" for i in range(processes)]
+    # shared: half the credits the processes will ask for, so they fight over the last ones
+    credits = processes * debits // 2 if shared else debits
+    for session_id in set(sessions):
+        ledger.open_session(session_id)
+        ledger.credit(session_id, credits)
+
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=worker, args=(path, s, debits, start, results)) for s in sessions]
+    for w in workers:
+        w.start()
+    time.sleep(0.5) # let them all open the database
+    start.set()
+    done = [results.get() for _ in workers]
+    for w in workers:
+        w.join()
+
+    taken = sum(d[1] for d in done)
+    elapsed = max(d[2] for d in done)
+    latencies = np.concatenate([d[3] for d in done])
+
+    balances = {s: ledger.balance(s) for s in set(sessions)}
+    logged = -ledger.db.execute("SELECT COALESCE(SUM(credits), 0) FROM entries WHERE kind = 'debit'").fetchone()[0]
+    ledger.close()
+
+    return {
+        "processes": processes,
+        "debits_taken": taken,
+        "debits_per_second": round(taken / elapsed),
+        "debit_ms": {
+            "p50": round(float(np.percentile(latencies, 50)) * 1000, 3),
+            "p99": round(float(np.percentile(latencies, 99)) * 1000, 3),
+            "max": round(float(np.max(latencies)) * 1000, 1),
+        },
+        # the books balance: what was taken is what's logged, and is what's missing from the sessions
+        "books_ok": taken == logged == credits * len(balances) - sum(balances.values()) and min(balances.values()) >= 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="concurrent credit ledger debits from several processes")
+    parser.add_argument("--processes", default="1,2,4,8")
+    parser.add_argument("--debits", type=int, default=2000, help="debits each process tries")
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.processes.split(",")]
+    result = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "debits_per_process": args.debits,
+        "own_sessions": [run(n, args.debits, shared=False) for n in counts],
+        "shared_session": [run(n, args.debits, shared=True) for n in counts],
+    }
+
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
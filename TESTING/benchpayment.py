@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+How long after an invoice is paid do the credits reach the game? Runs against TESTING/standinmint.py, so it's
+all offline.
+
+Starts a stand-in mint for each way of finding out about the payment:
+
+    websocket   the mint pushes the quote's state (NUT-17)
+    polling     the mint doesn't offer that - arcade_payments falls back to asking, with a growing delay
+    old         what ReflexGame used to do - try to mint every 2 seconds
+
+and for each requests --rounds payments, then reports the time from the invoice being paid (--pay-after seconds
+after the request) to `wait_for_credits()` returning, plus how many requests the mint served per payment.
+A real mint only re-checks an unpaid invoice every so often (--check-every), which is the floor for both kinds of
+polling.
+
+Prints one JSON object (append it to a file with --output). Needs cashu installed.
+
+    python3 benchpayment.py --rounds 5 --pay-after 2
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE)) # arcade_payments lives at the top of the repo
+
+from standinmint import start as start_mint
+
+
+async def old_way(payments, session) -> int:
+    """the old check_payment_loop: a mint attempt every 2 seconds until one works"""
+    while True:
+        try:
+            await payments.wallet.mint(session.amount_sats, quote_id=session.quote_id)
+            return session.amount_sats // payments.SATS_PER_CREDIT
+        except Exception:
+            await asyncio.sleep(2)
+
+
+async def measure(payments, mode: str, rounds: int, pay_after: float) -> list:
+    await payments.init_wallet()
+    delays = []
+    for _ in range(rounds):
+        requested = time.perf_counter()
+        await payments.create_payment_request(1)
+        if mode == "old":
+            payments.current_session.watcher.cancel()
+            await old_way(payments, payments.current_session)
+        else:
+            await payments.wait_for_credits(timeout=pay_after + 30)
+        delays.append(time.perf_counter() - requested - pay_after)
+        payments.end_session()
+    return delays
+
+
+def run_mode(mode: str, port: int, rounds: int, pay_after: float, check_every: int) -> dict:
+    options = ["--pay-after", str(pay_after), "--check-every", str(check_every)]
+    if mode != "websocket":
+        options.append("--no-websocket")
+    mint = start_mint(port, *options)
+    os.environ["ARCADE_MINT_URL"] = f"http://127.0.0.1:{port}"
+    os.environ["ARCADE_WALLET_SOCKET"] = os.path.join(tempfile.mkdtemp(), "none.sock") # no daemon - wallet in-process
+    os.chdir(tempfile.mkdtemp()) # a fresh arcade_wallet database
+
+    import importlib
+    import arcade_wallet_client
+    import arcade_payments
+    import arcade_walletd
+    importlib.reload(arcade_wallet_client) # picks up the new MINT_URL
+    payments = importlib.reload(arcade_payments) # drops the old wallet
+    Wallet = arcade_walletd.Wallet
+
+    # count what the wallet asks the mint for
+    requests = []
+    original = Wallet._request
+    async def counted(self, method, path, *args, **kwargs):
+        requests.append(path)
+        return await original(self, method, path, *args, **kwargs)
+    Wallet._request = counted
+
+    try:
+        delays = asyncio.run(measure(payments, mode, rounds, pay_after))
+    finally:
+        Wallet._request = original
+        mint.terminate()
+        mint.wait()
+
+    status = sum("mint/quote/bolt11/" in r for r in requests) # quote state checks
+    mints = sum(r == "mint/bolt11" for r in requests) # mint attempts - the old way's failures included
+    return {
+        "paid_to_credits_ms": {
+            "p50": round(float(np.percentile(delays, 50)) * 1000),
+            "max": round(float(np.max(delays)) * 1000),
+        },
+        "quote_checks_per_payment": round(status / rounds, 1),
+        "mint_attempts_per_payment": round(mints / rounds, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="payment confirmation latency against a local stand-in mint")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--pay-after", type=float, default=2.0, help="seconds until the stand-in mint pays")
+    parser.add_argument("--check-every", type=int, default=10,
+                        help="seconds between the mint's backend checks of an unpaid quote (nutshell's default is 10)")
+    parser.add_argument("--port", type=int, default=3338)
+    parser.add_argument("--modes", default="websocket,polling,old")
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    result = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rounds": args.rounds,
+        "pay_after_s": args.pay_after,
+        "mint_check_every_s": args.check_every,
+    }
+    for i, mode in enumerate(args.modes.split(",")):
+        result[mode] = run_mode(mode, args.port + i, args.rounds, args.pay_after, args.check_every)
+
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+How long a winner waits for their prize token: made on the spot (arcade_walletd.WalletService.send_token - coin
+selection and a swap with the mint, what handle_win used to wait on) vs handed out from the prize reserve
+(payout_token - made ahead of time). Runs against TESTING/standinmint.py with --latency milliseconds on every mint
+answer, since a real mint is across the internet.
+
+Funds a fresh wallet, then for --wins rounds pays out --prize sats each way, giving the reserve time to top up in
+between (as it would between games). Reports the latency, the reserve's stats, and that the reserve made exactly
+the tokens it handed out plus the ones it holds.
+
+Prints one JSON object (append it to a file with --output). Needs cashu installed.
+
+    python3 benchpayout.py --wins 10 --prize 500 --latency 80
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+import httpx
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE)) # the arcade_* modules live at the top of the repo
+
+from arcade_walletd import WalletService
+from standinmint import start as start_mint
+
+
+def ms(seconds: list) -> dict:
+    return {"p50": round(float(np.percentile(seconds, 50)) * 1000, 1), "max": round(float(np.max(seconds)) * 1000, 1)}
+
+
+async def measure(mint: str, wins: int, prize: int) -> dict:
+    service = WalletService(mint, db=tempfile.mkdtemp())
+    await service.start()
+
+    # fund it - enough for every prize both ways, plus what the reserve keeps
+    quote = await service.request_mint(prize * (2 * wins + 4))
+    httpx.post(f"{mint}/standin/pay/{quote.quote}")
+    await asyncio.sleep(1.5)
+    await service.mint(quote.amount, quote.quote)
+
+    on_the_spot = []
+    for _ in range(wins):
+        t = time.perf_counter()
+        await service.send_token(prize)
+        on_the_spot.append(time.perf_counter() - t)
+
+    await service.reserve_payouts([prize])
+    reserved = []
+    for _ in range(wins):
+        while not service.payouts.held[prize]: # topped up between games
+            await asyncio.sleep(0.05)
+        t = time.perf_counter()
+        await service.payout_token(prize)
+        reserved.append(time.perf_counter() - t)
+
+    stats = service.payouts.stats()
+    service.close()
+    return {
+        "send_token_ms": ms(on_the_spot),
+        "payout_token_ms": ms(reserved),
+        "reserve": stats,
+        "books_ok": stats["made"] == stats["hits"] + stats["ready"][prize] and stats["unclaimed"] == wins,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="prize token latency: made on the spot vs from the reserve")
+    parser.add_argument("--wins", type=int, default=10)
+    parser.add_argument("--prize", type=int, default=500, help="sats")
+    parser.add_argument("--latency", type=float, default=80, help="milliseconds added to every mint answer")
+    parser.add_argument("--port", type=int, default=3338)
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    mint = start_mint(args.port, "--manual", "--check-every", "1", "--latency", str(args.latency))
+    os.chdir(tempfile.mkdtemp())
+    try:
+        measured = asyncio.run(measure(f"http://127.0.0.1:{args.port}", args.wins, args.prize))
+    finally:
+        mint.terminate()
+        mint.wait()
+
+    result = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "wins": args.wins,
+        "prize_sats": args.prize,
+        "mint_latency_ms": args.latency,
+        **measured,
+    }
+
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
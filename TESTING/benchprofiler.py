@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+What gamelib.profiler costs a game loop.
+
+    record      FrameProfiler.frame() and a `with profiler.phase(...)` block, per call
+    overlay     FrameProfiler.draw() - the frame time graph and the percentile lines - per frame
+    hitch       a frame over the hitch threshold: how long frame() takes when it has to start a dump, and whether
+                the CSV file turns up with every recorded frame in it
+
+Prints one JSON object (append it to a file with --output). No display needed - runs on SDL's dummy video driver.
+
+    python3 benchprofiler.py --calls 100000
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # gamelib is at the repo top
+
+import numpy as np
+import pygame
+
+from gamelib.profiler import FrameProfiler
+
+FPS = 60
+PHASES = ("events", "update", "steering", "collisions", "draw", "flip")
+
+
+def per_call_us(function, calls: int) -> float:
+    t = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return round((time.perf_counter() - t) / calls * 1_000_000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gamelib.profiler overhead")
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((1280, 720))
+    dump_dir = tempfile.mkdtemp()
+    profiler = FrameProfiler("bench", fps=FPS, dump_dir=dump_dir, hitch_ms=float("inf"))
+
+    def frame():
+        profiler.frame()
+        for name in PHASES:
+            with profiler.phase(name):
+                pass
+
+    phase = profiler.phase("update")
+    def one_phase():
+        with phase:
+            pass
+
+    result = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "phases": len(PHASES)}
+    result["record_us"] = {
+        "empty_loop": per_call_us(lambda: None, args.calls),
+        "phase": per_call_us(one_phase, args.calls),
+        "frame_with_phases": per_call_us(frame, args.calls),
+    }
+
+    frame_budget_us = 1_000_000 / FPS
+    result["record_us"]["share_of_frame_budget"] = round(result["record_us"]["frame_with_phases"] / frame_budget_us, 5)
+
+    times = []
+    for _ in range(600):
+        frame()
+        t = time.perf_counter()
+        profiler.draw(screen)
+        times.append(time.perf_counter() - t)
+    times = np.array(times) * 1000
+    result["overlay_ms"] = {"p50": round(float(np.percentile(times, 50)), 3),
+                            "p99": round(float(np.percentile(times, 99)), 3)}
+
+    profiler.hitch_ms = 1
+    profiler.frame()
+    time.sleep(0.005)
+    t = time.perf_counter()
+    profiler.frame()
+    hitch_ms = (time.perf_counter() - t) * 1000
+    time.sleep(0.5)
+    path = profiler.last_dump_path
+    dumped = np.loadtxt(path, delimiter=",", ndmin=2) if path and os.path.exists(path) else None
+    result["hitch"] = {
+        "frame_call_ms": round(hitch_ms, 3),
+        "dumped_rows": None if dumped is None else len(dumped),
+        "dumped_columns": None if dumped is None else dumped.shape[1],
+        "last_row_ms": None if dumped is None else round(float(dumped[-1, 0]), 1),
+    }
+
+    pygame.quit()
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+QR codes in a running game: what it costs to make one, and what it does to the frames around it.
+
+    render      the old way (qrcode -> PIL image -> PNG in a BytesIO -> pygame.image.load -> scale) vs
+                gamelib.qr.render_qr (the matrix written straight into the surface's pixels), and a QRCache hit
+    frames      a 60 fps loop (like ReflexGame.run) asked for a QR code part way through - made right there in the
+                loop, the old way, vs awaited from gamelib.qr.QRCache in a task while the loop keeps going
+
+Payloads are the size of a Lightning invoice and of a Cashu token, made up fresh each time so nothing is cached.
+
+Prints one JSON object (append it to a file with --output). No display needed - runs on SDL's dummy video driver.
+The old way needs Pillow (qrcode uses it to make images); without it only the new way is measured.
+
+    python3 benchqr.py --repeats 20
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import string
+import asyncio
+import argparse
+from io import BytesIO
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # gamelib is at the repo top
+
+import numpy as np
+import pygame
+import qrcode
+
+from gamelib.qr import QRCache, render_qr
+
+try:
+    import PIL # only for the old way
+except ImportError:
+    PIL = None
+
+SIZE = 250
+FPS = 60
+PAYLOADS = {"invoice": 300, "token": 900} # characters
+
+
+def payload(length: int) -> str:
+    return "".join(random.choices(string.ascii_lowercase + string.digits, k=length))
+
+
+def old_qr_surface(data: str) -> pygame.Surface:
+    """ arcade_game.make_qr_surface before gamelib.qr """
+    qr = qrcode.QRCode(version=1, box_size=5, border=2)
+    qr.add_data(data)
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+    qr_bytes = BytesIO()
+    qr_img.save(qr_bytes, format='PNG')
+    qr_bytes.seek(0)
+    return pygame.transform.scale(pygame.image.load(qr_bytes), (SIZE, SIZE))
+
+
+def ms(seconds: list) -> dict:
+    return {"p50": round(float(np.percentile(seconds, 50)) * 1000, 2), "max": round(float(np.max(seconds)) * 1000, 2)}
+
+
+def time_render(make, length: int, repeats: int) -> dict:
+    times = []
+    for _ in range(repeats):
+        data = payload(length)
+        t = time.perf_counter()
+        make(data)
+        times.append(time.perf_counter() - t)
+    return ms(times)
+
+
+async def frames(screen, length: int, off_loop: bool, cache: QRCache) -> dict:
+    """ a 60 fps loop that asks for a QR code on frame 30 - the frame times from then until it's on screen """
+    clock = pygame.time.Clock()
+    data = payload(length)
+    qr = None
+    task = None
+    asked_at = ready_at = None
+    times = []
+    last = time.perf_counter()
+    for frame in range(120):
+        if frame == 30:
+            asked_at = time.perf_counter()
+            if off_loop:
+                task = asyncio.create_task(cache.surface(data, SIZE))
+            else:
+                qr = old_qr_surface(data)
+        if task is not None and task.done():
+            qr = task.result()
+
+        screen.fill((20, 20, 40))
+        if qr is not None:
+            screen.blit(qr, (275, 150))
+        pygame.display.flip()
+        clock.tick(FPS)
+        await asyncio.sleep(0)
+
+        now = time.perf_counter()
+        if asked_at is not None and ready_at is None:
+            times.append(now - last)
+            if qr is not None:
+                ready_at = now
+        last = now
+
+    return {
+        "frame_ms": ms(times),
+        "frames_over_1.5x_budget": sum(t > 1.5 / FPS for t in times),
+        "on_screen_after_ms": round((ready_at - asked_at) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QR code rendering: PNG round trip vs pixel array, in and off the loop")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    cache = QRCache()
+
+    result = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "size": SIZE, "pillow": PIL is not None}
+    for name, length in PAYLOADS.items():
+        hit = payload(length)
+        cache.render(hit, SIZE)
+        measured = {
+            "render_ms": {
+                "png_round_trip": time_render(old_qr_surface, length, args.repeats) if PIL else None,
+                "pixel_array": time_render(lambda data: render_qr(data, SIZE), length, args.repeats),
+                "cache_hit": time_render(lambda data: cache.get(hit, SIZE), length, args.repeats),
+            },
+            "frames_in_loop": asyncio.run(frames(screen, length, False, cache)) if PIL else None,
+            "frames_off_loop": asyncio.run(frames(screen, length, True, cache)),
+        }
+        result[name] = measured
+
+    pygame.quit()
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
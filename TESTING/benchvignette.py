@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+The vignette's cost per frame - the old full size image vs fishyfrens.view.vignette.
+
+    image       v1cleanhuge.png scaled 2x, with a colorkey, blitted whole with BLEND_RGBA_MULT (how it used to be drawn)
+    parametric  Vignette - a patch worked out at setup in the screen's format, with no colorkey, blitted with
+                BLEND_RGB_MULT only where it's on the screen and isn't white
+
+Both are drawn centered on the same points (middle of the screen, a corner, and random places in between) onto the
+same busy background, and the mean difference between their results is reported too (the image leaves the
+screen's corners undimmed when the center is near the opposite corner).
+
+Prints one JSON object (append it to a file with --output).
+
+    python3 benchvignette.py --frames 300
+    python3 benchvignette.py --width 1920 --height 1080
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "GAMES"))
+
+from fishyfrens.config import MY_DIR
+from fishyfrens.view.vignette import Vignette
+
+
+def image_vignette() -> pygame.Surface:
+    surface = pygame.image.load(os.path.join(MY_DIR, "resources", "img", "vignette", "v1cleanhuge.png")).convert_alpha()
+    surface = pygame.transform.scale(surface, (surface.get_width() * 2, surface.get_height() * 2))
+    surface.set_colorkey((255, 255, 255))
+    return surface
+
+
+def draw_image(screen: pygame.Surface, surface: pygame.Surface, center):
+    screen.blit(surface, (center[0] - surface.get_width() // 2, center[1] - surface.get_height() // 2), special_flags=pygame.BLEND_RGBA_MULT)
+
+
+def background(screen: pygame.Surface) -> pygame.Surface:
+    rng = np.random.default_rng(1)
+    pixels = rng.integers(0, 256, (*screen.get_size(), 3), dtype=np.uint8)
+    return pygame.surfarray.make_surface(pixels).convert(screen)
+
+
+def time_frames(screen: pygame.Surface, back: pygame.Surface, draw, centers: list) -> list:
+    times = []
+    for center in centers:
+        screen.blit(back, (0, 0))
+        t = time.perf_counter()
+        draw(center)
+        times.append(time.perf_counter() - t)
+    return times
+
+
+def summary(seconds: list) -> dict:
+    ms = np.array(seconds) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def difference(screen: pygame.Surface, back: pygame.Surface, image: pygame.Surface, vignette: Vignette, center) -> float:
+    """ mean absolute difference (0-255) between the two ways of drawing it """
+    screen.blit(back, (0, 0))
+    draw_image(screen, image, center)
+    a = pygame.surfarray.array3d(screen).astype(np.int16)
+    screen.blit(back, (0, 0))
+    vignette.draw(screen, center)
+    b = pygame.surfarray.array3d(screen).astype(np.int16)
+    return float(np.abs(a - b).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="vignette cost per frame")
+    parser.add_argument("--width", type=int, default=1440)
+    parser.add_argument("--height", type=int, default=900)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    back = background(screen)
+
+    rng = np.random.default_rng(2)
+    centers = [(args.width // 2, args.height // 2), (0, 0)]
+    centers += [(int(x), int(y)) for x, y in zip(rng.integers(0, args.width, args.frames), rng.integers(0, args.height, args.frames))]
+    centers = centers[:args.frames]
+
+    t = time.perf_counter()
+    image = image_vignette()
+    image_setup = time.perf_counter() - t
+
+    t = time.perf_counter()
+    vignette = Vignette()
+    vignette.build(screen)
+    parametric_setup = time.perf_counter() - t
+
+    # once each to warm up
+    time_frames(screen, back, lambda c: draw_image(screen, image, c), centers[:10])
+    time_frames(screen, back, lambda c: vignette.draw(screen, c), centers[:10])
+
+    old = time_frames(screen, back, lambda c: draw_image(screen, image, c), centers)
+    new = time_frames(screen, back, lambda c: vignette.draw(screen, c), centers)
+
+    result = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "screen": [args.width, args.height],
+        "frames": len(centers),
+        "image": {"setup_ms": round(image_setup * 1000, 1), **summary(old)},
+        "parametric": {"setup_ms": round(parametric_setup * 1000, 1), "patch": list(vignette.patch.get_size()), **summary(new)},
+        "speedup": round(float(np.median(old) / np.median(new)), 1),
+        "mean_difference": {
+            "center": round(difference(screen, back, image, vignette, centers[0]), 2),
+            "corner": round(difference(screen, back, image, vignette, centers[1]), 2),
+        },
+    }
+
+    pygame.quit()
+
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+The volume knob without the hardware - lnarcade.control.controlmanager driven by a FakeEncoder and a FakeMixer.
+
+Spins the fake knob in quick bursts (like a hand flicking it) and reports:
+
+    - detents turned vs detents the volume moved by (none should be lost)
+    - how many mixer updates that took (a burst should be one)
+    - the time from a burst's first detent to its mixer update
+
+and, for comparison, what one volume change costs as a fork per step (`os.system`, like the old loop did) vs a line
+written to a long-lived process's pipe (like AmixerMixer). `cat` stands in for amixer, which may not be installed.
+
+Prints one JSON object (append it to a file with --output).
+
+    python3 benchvolume.py --bursts 20 --detents 8
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+import subprocess
+
+import numpy as np
+
+from lnarcade.control.controlmanager import ControlManager
+from lnarcade.control.encoder import FakeEncoder
+from lnarcade.control.mixer import FakeMixer
+from lnarcade.config import VOLUME_STEP
+
+
+class TimedMixer(FakeMixer):
+    """FakeMixer that also remembers when each change arrived"""
+
+    def __init__(self, volume: int):
+        super().__init__(volume)
+        self.times = []
+
+    def set_volume(self, percent: int):
+        self.times.append(time.perf_counter())
+        super().set_volume(percent)
+
+
+def spin(encoder: FakeEncoder, bursts: int, detents: int, gap: float) -> list:
+    """turn the knob - returns (start time, detents) for each burst"""
+    turned = []
+    for i in range(bursts):
+        # up, down, up... so the volume never hits 0 or 100 and no detent is clamped away
+        direction = 1 if i % 2 == 0 else -1
+        started = time.perf_counter()
+        for _ in range(detents):
+            encoder.turn(direction)
+            time.sleep(0.002) # a fast flick - a few milliseconds a detent
+        turned.append((started, direction * detents))
+        time.sleep(gap)
+    return turned
+
+
+def step_cost(rounds: int) -> dict:
+    """milliseconds per volume change - a shell per change vs a write to a pipe"""
+    t = time.perf_counter()
+    for _ in range(rounds):
+        os.system("true")
+    fork = (time.perf_counter() - t) / rounds
+
+    process = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
+    t = time.perf_counter()
+    for i in range(rounds):
+        process.stdin.write(f"sset 'Master' {i % 100}%\n")
+        process.stdin.flush()
+    pipe = (time.perf_counter() - t) / rounds
+    process.stdin.close()
+    process.wait()
+
+    return {"fork_ms": round(fork * 1000, 3), "pipe_ms": round(pipe * 1000, 4), "speedup": round(fork / pipe)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="volume knob with a fake encoder and mixer")
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--detents", type=int, default=8, help="detents per burst")
+    parser.add_argument("--gap", type=float, default=0.2, help="seconds between bursts")
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    encoder = FakeEncoder()
+    mixer = TimedMixer(50)
+    manager = ControlManager(encoder, mixer)
+    thread = threading.Thread(target=manager.run, daemon=True)
+    thread.start()
+
+    turned = spin(encoder, args.bursts, args.detents, args.gap)
+    time.sleep(0.2)
+    manager.stop()
+    thread.join(2)
+
+    moved = sum(abs(b - a) for a, b in zip([50] + mixer.history, mixer.history)) // VOLUME_STEP
+    latency = [next((t for t in mixer.times if t >= started), float("nan")) - started for started, _ in turned]
+
+    result = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "bursts": args.bursts,
+        "detents_turned": args.bursts * args.detents,
+        "detents_applied": manager.detents,
+        "volume_steps_moved": int(moved),
+        "mixer_updates": manager.mixer_updates,
+        "encoder_reads": encoder.reads,
+        "burst_to_update_ms": {
+            "p50": round(float(np.nanpercentile(latency, 50)) * 1000, 1),
+            "max": round(float(np.nanmax(latency)) * 1000, 1),
+        },
+        "step_cost": step_cost(50),
+    }
+
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
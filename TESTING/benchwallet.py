@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+What a game pays to use the wallet: opening it in every game process vs asking the launcher's wallet daemon
+(arcade_walletd.py). Runs against TESTING/standinmint.py - or a real mint with --mint (it makes unpaid quotes there).
+
+    startup     a fresh game process until it has its first invoice - import, open the wallet, fetch the
+                mint's keysets, request a quote (in-process) vs import the client, connect, request a quote
+    requests    one quote-state check at a time from an open wallet - plain cashu Wallet (a new HTTP client
+                every call), PooledWallet (one kept-alive client) and through the daemon
+
+Prints one JSON object (append it to a file with --output). Needs cashu installed.
+
+    python3 benchwallet.py --launches 5 --requests 50
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT) # the arcade_* modules live at the top of the repo
+
+from standinmint import start as start_mint, wait_for
+
+IN_PROCESS = """
+import time, asyncio
+start = time.perf_counter()
+from arcade_walletd import WalletService
+async def main():
+    service = WalletService({mint!r})
+    await service.start()
+    await service.request_mint(100)
+asyncio.run(main())
+print(time.perf_counter() - start)
+"""
+
+THROUGH_DAEMON = """
+import time, asyncio
+start = time.perf_counter()
+from arcade_wallet_client import WalletClient
+async def main():
+    client = await WalletClient.connect({path!r})
+    await client.request_mint(100)
+asyncio.run(main())
+print(time.perf_counter() - start)
+"""
+
+
+def ms(seconds: list) -> dict:
+    return {"p50": round(float(np.percentile(seconds, 50)) * 1000, 1), "max": round(float(np.max(seconds)) * 1000, 1)}
+
+
+def launch(script: str, cwd: str) -> float:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+async def request_times(wallet, quote_id: str, requests: int) -> list:
+    times = []
+    for _ in range(requests):
+        t = time.perf_counter()
+        await wallet.get_mint_quote(quote_id)
+        times.append(time.perf_counter() - t)
+    return times
+
+
+async def compare_requests(mint: str, path: str, requests: int) -> dict:
+    from cashu.wallet.wallet import Wallet
+    from arcade_walletd import PooledWallet
+    from arcade_wallet_client import WalletClient
+
+    result = {}
+    for name, cls in (("cashu_wallet", Wallet), ("pooled_wallet", PooledWallet)):
+        wallet = await cls.with_db(mint, db=tempfile.mkdtemp())
+        await wallet.load_mint()
+        quote = await wallet.request_mint(100)
+        result[name] = ms(await request_times(wallet, quote.quote, requests))
+
+    client = await WalletClient.connect(path)
+    quote = await client.request_mint(100)
+    result["daemon"] = ms(await request_times(client, quote.quote, requests))
+    client.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="in-process wallet vs the wallet daemon")
+    parser.add_argument("--launches", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--mint", default=None, help="mint URL (default: start a stand-in mint)")
+    parser.add_argument("--port", type=int, default=3338, help="stand-in mint port")
+    parser.add_argument("--output", default=None, help="append the JSON result to this file")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp()
+    processes = []
+    mint = args.mint
+    if mint is None:
+        mint = f"http://127.0.0.1:{args.port}"
+        processes.append(start_mint(args.port, "--manual", cwd=work))
+
+    path = os.path.join(work, "wallet.sock")
+    processes.append(subprocess.Popen([sys.executable, "-m", "arcade_walletd", path, mint], cwd=work,
+                                      env=dict(os.environ, PYTHONPATH=ROOT),
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    def connect_daemon():
+        sock = socket.socket(socket.AF_UNIX)
+        sock.connect(path)
+        return sock
+    wait_for(connect_daemon, "wallet daemon")
+
+    try:
+        # a fresh wallet directory each launch, like a game's first run - the daemon's is warm
+        in_process = [launch(IN_PROCESS.format(mint=mint), tempfile.mkdtemp()) for _ in range(args.launches)]
+        through_daemon = [launch(THROUGH_DAEMON.format(path=path), work) for _ in range(args.launches)]
+        requests = asyncio.run(compare_requests(mint, path, args.requests))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    result = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mint": mint,
+        "startup_to_first_quote_ms": {"in_process": ms(in_process), "daemon": ms(through_daemon)},
+        "quote_check_ms": requests,
+    }
+
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
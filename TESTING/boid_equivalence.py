@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Compare the NumPy BoidSwarm against the reference per-object Boid math.
+
+The reference path updates agents one at a time, so later agents flock against neighbors that already moved this frame.
+To get an exact comparison the reference agents here flock against a frozen snapshot of the previous frame instead
+(with a grid rebuilt per agent, so the snapshot of the agent itself isn't one of its neighbors).
+
+Agents are spread over a playfield `playfield_scale` screens wide and tall, so plenty of them are off the screen in
+the near and far LodTiers.
+
+    SDL_VIDEODRIVER=dummy python3 boid_equivalence.py [num_agents] [frames] [playfield_scale]
+"""
+
+import os
+import sys
+import copy
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from fishyfrens.app import App
+App.get_instance()
+
+from gamelib.globals import SCREEN_WIDTH, SCREEN_HEIGHT
+
+from fishyfrens.config import LOD_FAR_INTERVAL
+from fishyfrens.actor import AgentType, LodTier
+from fishyfrens.actor.agent import Agent
+from fishyfrens.actor.singletons import create_player, player
+from fishyfrens.actor.swarm import SwarmGroup, update_neighbor_grid
+from fishyfrens.actor.spatialgrid import SpatialHashGrid
+from fishyfrens.view.camera import camera
+
+
+class Snapshot(pygame.sprite.Sprite):
+    def __init__(self, agent):
+        super().__init__()
+        self.agent = agent
+        self.position = pygame.Vector2(agent.position)
+        self.velocity = pygame.Vector2(agent.velocity)
+
+
+def reference_step(agents):
+    snapshot = [Snapshot(a) for a in agents]
+    cell_size = max(a.max_sight for a in agents) // 2
+    grid = SpatialHashGrid()
+    for a in agents:
+        if a.dead:
+            continue
+        if a.lod() == LodTier.FAR:
+            a.far_ticks += 1
+            if a.far_ticks % LOD_FAR_INTERVAL == 0:
+                a.position += a.velocity * LOD_FAR_INTERVAL
+                a.handle_walls()
+            continue
+        others = [s for s in snapshot if s.agent is not a]
+        grid.rebuild([(s.position.x, s.position.y) for s in others], others,
+                     camera().playfield_width, camera().playfield_height, cell_size)
+        a.update_steering(grid)
+        a.handle_walls()
+
+
+def main(num_agents: int = 300, frames: int = 20, playfield_scale: int = 4):
+    random.seed(1)
+    camera().resize(SCREEN_WIDTH * playfield_scale, SCREEN_HEIGHT * playfield_scale)
+    create_player("myca")
+    camera().target = player()
+
+    reference = []
+    for i in range(num_agents):
+        agent = Agent(random.choice([AgentType.KRILL, AgentType.FISH, AgentType.KRAKEN]))
+        agent.target = player()
+        reference.append(agent)
+
+    # pygame sprites can't be deep copied, so copy the boid state onto fresh agents instead
+    group = SwarmGroup()
+    vectorized = []
+    for a in reference:
+        clone = Agent(a.type)
+        clone.subtype, clone.image, clone.size = a.subtype, a.image, a.size
+        for name in ("position", "velocity", "max_speed", "max_force", "decay_rate", "max_sight", "behavior_type", "vel_coef"):
+            setattr(clone, name, copy.copy(getattr(a, name)))
+        clone.target = player()
+        group.add(clone)
+        vectorized.append(clone)
+
+    worst = 0
+    neighbor_grid = SpatialHashGrid()
+    for frame in range(frames):
+        reference_step(reference)
+        group.swarm.step(update_neighbor_grid(neighbor_grid, group))
+
+        error = max(
+            max((r.position - v.position).length(), (r.velocity - v.velocity).length())
+            for r, v in zip(reference, vectorized)
+        )
+        worst = max(worst, error)
+        print(f"frame {frame:3d}  max error: {error:.3e}")
+
+    print(f"{num_agents} agents, {frames} frames, worst error: {worst:.3e}")
+    return worst
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
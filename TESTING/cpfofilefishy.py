@@ -23,7 +23,7 @@ cProfile.run('App.get_instance().start()', sort='cumtime')
 # cProfile.run('App.get_instance().start()', sort=('cumtime', 'calls'))
 
 TODO = """
-{} add cacheing to gamelib.text
+{x} add cacheing to gamelib.text
 
 {} change mask on 'crab' to his mouth, adjust speed (quicker when closer)
 
@@ -34,6 +34,6 @@ TODO = """
 
 {} optimize draw functions... no more blitting, just draw the sprites directly to the screen {} <-- these were suggested from copilot *shrug*
 - store the sprites in a list, then draw them all at once (?) {} <-- these were suggested from copilot *shrug*
-{{}} what I really want to do is store any rotated imates and only recalculate them when the angle changes
+{x} what I really want to do is store any rotated imates and only recalculate them when the angle changes (actor/rotationcache.py)
 
 """
\ No newline at end of file
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+How flock neighbor queries scale with the number of agents: brute force vs the SpatialHashGrid.
+
+Agents are spread over a level-2 sized playfield (4x a 1440x900 screen) and every agent looks for neighbors within
+the krill flock radius (max_sight 250 // 2). Half of the queries wrap around the edges like BoundaryBehaviour.Wrap.
+Grid results are checked against the brute force answer before timing.
+
+No display needed:
+
+    python3 spatialgrid_benchmark.py [max_agents]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from fishyfrens.actor.spatialgrid import SpatialHashGrid
+
+
+WIDTH = 1440 * 4
+HEIGHT = 900 * 4
+RADIUS = 250 // 2
+AGENT_COUNTS = (100, 300, 1000, 3000, 10000)
+REPEATS = 5
+
+
+def brute_force_pairs(positions, radius, wrap):
+    """ the old way - every agent against every other agent (chunked so 10,000 agents fit in memory) """
+    found = []
+    for start in range(0, len(positions), 512):
+        offset = positions[start:start + 512, None, :] - positions[None, :, :]
+        w = wrap[start:start + 512, None]
+        offset[..., 0] -= np.where(w, WIDTH * np.round(offset[..., 0] / WIDTH), 0)
+        offset[..., 1] -= np.where(w, HEIGHT * np.round(offset[..., 1] / HEIGHT), 0)
+        q, j = np.nonzero(np.hypot(offset[..., 0], offset[..., 1]) < radius)
+        found.append(np.stack([q + start, j], axis=1))
+    return np.concatenate(found)
+
+
+def as_set(pairs):
+    return set(map(tuple, pairs.tolist()))
+
+
+def timed(function, *args):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(max_agents: int = AGENT_COUNTS[-1]):
+    rng = np.random.default_rng(1)
+    grid = SpatialHashGrid()
+
+    print(f"playfield {WIDTH}x{HEIGHT}, radius {RADIUS}, best of {REPEATS}")
+    print(f"{'agents':>8} {'brute force ms':>15} {'grid build ms':>14} {'grid query ms':>14} {'pairs':>9} {'speedup':>8}")
+
+    for n in AGENT_COUNTS:
+        if n > max_agents:
+            break
+        positions = rng.uniform((0, 0), (WIDTH, HEIGHT), size=(n, 2))
+        wrap = np.arange(n) % 2 == 0
+        radius = np.full(n, RADIUS)
+
+        brute_time, expected = timed(brute_force_pairs, positions, RADIUS, wrap)
+        build_time, _ = timed(grid.rebuild, positions, list(range(n)), WIDTH, HEIGHT, RADIUS)
+        query_time, (q, j, offset, distance) = timed(grid.pairs, positions, radius, wrap)
+
+        if as_set(np.stack([q, j], axis=1)) != as_set(expected):
+            raise Exception(f"grid and brute force disagree for {n} agents")
+
+        grid_time = build_time + query_time
+        print(f"{n:>8} {brute_time * 1000:>15.2f} {build_time * 1000:>14.2f} {query_time * 1000:>14.2f} {len(q):>9} {brute_time / grid_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+A local Cashu mint for trying arcade_payments offline - the cashu package's own mint on its FakeWallet
+Lightning backend, so nothing leaves the machine and no sats are real.
+
+Every invoice it hands out "gets paid" --pay-after seconds later, and the mint pushes that to websocket
+subscribers (NUT-17) just like a real one. With --no-websocket it stops advertising mint quote subscriptions,
+so clients have to fall back to polling. With --manual nothing is paid until someone asks:
+
+    curl -X POST http://127.0.0.1:3338/standin/pay/<quote id>
+
+--quote-ttl makes quotes expire sooner than the invoice's hour. Like any nutshell mint it asks its Lightning backend about an unpaid
+invoice at most every --check-every seconds (nutshell's default is 10), however often a client polls. --latency
+holds every answer back a little, like a mint across the internet rather than on localhost.
+
+    python3 standinmint.py --port 3338 --pay-after 3
+    ARCADE_MINT_URL=http://127.0.0.1:3338 python3 ../arcade_game.py
+
+Needs `pip install cashu` (it brings the mint, fastapi and uvicorn along). The bench scripts start one with start().
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+
+
+def wait_for(connect, what: str, seconds: float = 30):
+    """ call connect() until it stops raising OSError - for a server that's still starting up """
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            connect().close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{what} didn't start")
+
+
+def start(port: int, *options: str, cwd: str = None) -> subprocess.Popen:
+    """ run a stand-in mint on `port` (with this script's command line options) and wait until it answers """
+    command = [sys.executable, os.path.abspath(__file__), "--port", str(port), *options]
+    mint = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=cwd or tempfile.mkdtemp())
+    try:
+        wait_for(lambda: socket.create_connection(("127.0.0.1", port), 0.2), "stand-in mint")
+    except RuntimeError:
+        mint.kill()
+        raise
+    return mint
+
+
+def main():
+    parser = argparse.ArgumentParser(description="local stand-in Cashu mint (FakeWallet backend)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3338)
+    parser.add_argument("--pay-after", type=float, default=3.0, help="seconds until an invoice is paid")
+    parser.add_argument("--manual", action="store_true", help="only pay invoices through POST /standin/pay/<quote>")
+    parser.add_argument("--quote-ttl", type=int, default=None, help="seconds until a quote expires")
+    parser.add_argument("--check-every", type=int, default=10, help="seconds between backend checks of a quote")
+    parser.add_argument("--no-websocket", action="store_true", help="don't offer mint quote subscriptions")
+    parser.add_argument("--latency", type=float, default=0, help="milliseconds added to every HTTP answer")
+    parser.add_argument("--data", default=None, help="mint database directory (default: a temp dir)")
+    args = parser.parse_args()
+
+    # cashu reads its settings from the environment when it's first imported
+    os.environ["MINT_BACKEND_BOLT11_SAT"] = "FakeWallet"
+    os.environ.setdefault("MINT_PRIVATE_KEY", "arcade-stand-in-mint")
+    os.environ["MINT_DATABASE"] = args.data or tempfile.mkdtemp(prefix="standinmint-")
+    os.environ["MINT_LISTEN_HOST"] = args.host
+    os.environ["MINT_LISTEN_PORT"] = str(args.port)
+    os.environ["FAKEWALLET_BRR"] = "TRUE"
+    # manual: the automatic payment is still scheduled, but only happens in a few decades
+    os.environ["FAKEWALLET_DELAY_INCOMING_PAYMENT"] = str(1e9 if args.manual else args.pay_after)
+    if args.quote_ttl is not None:
+        os.environ["MINT_QUOTE_TTL"] = str(args.quote_ttl)
+    os.environ["MINT_QUOTE_BACKEND_CHECK_RATE_LIMIT"] = str(args.check_every)
+
+    import uvicorn
+    from cashu.lightning.base import PaymentStatus, PaymentStatusResult
+    from cashu.lightning.fake import FakeWallet
+
+    # FakeWallet "pays" an invoice the moment anyone asks for its status - only say so once it's really paid,
+    # so polling sees the same delay the websocket does
+    async def get_invoice_status(self, checking_id: str) -> PaymentStatus:
+        if checking_id in [i.payment_hash for i in self.paid_invoices_incoming]:
+            return PaymentStatus(result=PaymentStatusResult.SETTLED)
+        return PaymentStatus(result=PaymentStatusResult.PENDING)
+
+    FakeWallet.get_invoice_status = get_invoice_status
+    FakeWallet.supports_incoming_payment_stream = not args.no_websocket
+
+    from cashu.core.base import Method, Unit
+    from cashu.mint.app import app
+    from cashu.mint.startup import ledger
+
+    if args.latency:
+        import asyncio
+
+        @app.middleware("http")
+        async def far_away(request, call_next):
+            await asyncio.sleep(args.latency / 1000)
+            return await call_next(request)
+
+    @app.post("/standin/pay/{quote_id}")
+    async def pay(quote_id: str):
+        """pay a quote's invoice now - the player scanning the QR code"""
+        quote = await ledger.crud.get_mint_quote(quote_id=quote_id, db=ledger.db)
+        backend = ledger.backends[Method.bolt11][Unit.sat]
+        invoice = next((i for i in backend.created_invoices if quote and i.payment_hash == quote.checking_id), None)
+        if invoice is None:
+            return {"paid": False}
+        await backend.mark_invoice_paid(invoice, delay=False)
+        return {"paid": True}
+
+    paying = "on POST /standin/pay/<quote>" if args.manual else f"after {args.pay_after}s"
+    print(f"stand-in mint on http://{args.host}:{args.port} - invoices paid {paying}, "
+          f"websocket {'off' if args.no_websocket else 'on'}, {args.latency:g} ms latency, data in {os.environ['MINT_DATABASE']}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
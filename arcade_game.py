@@ -2,18 +2,31 @@
 
 import pygame
 import asyncio
-import qrcode
 import random
 import time
-from io import BytesIO
+from gamelib.qr import qr_cache
+from gamelib.profiler import configure_profiler, profiler
 from arcade_payments import (
     create_payment_request,
-    check_payment_received,
+    resume_session,
+    station_session_id,
+    start_invoice_pool,
+    wait_for_credits,
+    InvoiceExpired,
     use_credit,
     payout_winnings_as_token,
+    start_payout_reserve,
     end_session
 )
 
+CREDITS_PER_PAYMENT = 5
+WIN_AMOUNT_SATS = 500
+QR_SIZE = 250
+
+def make_qr_surface(data: str) -> pygame.Surface:
+    """QR code of `data` as a QR_SIZE surface - waits for it, so only from a worker thread (the invoice pool's)"""
+    return qr_cache().render(data, QR_SIZE)
+
 class ReflexGame:
     def __init__(self):
         pygame.init()
@@ -22,6 +35,10 @@ class ReflexGame:
         self.state = "INSERT_COINS"  # INSERT_COINS, WAITING_PAYMENT, PLAYING, COUNTDOWN, GAME_OVER
         self.credits = 0
         self.invoice_qr = None
+        self.payment_data = None
+        self.payment_task = None
+        self.resume_task = None
+        self.session_id = station_session_id("reflex")  # credits left on this cabinet outlive a crash
         
         # Game state
         self.round = 0
@@ -32,40 +49,50 @@ class ReflexGame:
         self.countdown_start = 0
         self.best_time = None
         
-    async def show_payment_screen(self, num_credits=5):
-        """Display QR code for payment"""
+    async def show_payment_screen(self, num_credits=CREDITS_PER_PAYMENT):
+        """Display QR code for payment, then wait in background for it to be paid"""
         self.state = "WAITING_PAYMENT"
+        self.invoice_qr = None
+        self.payment_data = None
         
-        # Generate invoice
-        payment_data = await create_payment_request(num_credits)
-        
-        # Create QR code (smaller size)
-        qr = qrcode.QRCode(version=1, box_size=5, border=2)
-        qr.add_data(payment_data['invoice'])
-        qr.make(fit=True)
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to pygame surface
-        qr_bytes = BytesIO()
-        qr_img.save(qr_bytes, format='PNG')
-        qr_bytes.seek(0)
-        self.invoice_qr = pygame.image.load(qr_bytes)
-        
-        # Scale to reasonable size (250x250)
-        self.invoice_qr = pygame.transform.scale(self.invoice_qr, (250, 250))
+        # Generate invoice - ready-made from the invoice pool, usually
+        try:
+            payment_data = await create_payment_request(num_credits, self.session_id)
+        except Exception as e:
+            print(f"Couldn't get an invoice: {e}")
+            self.state = "INSERT_COINS"
+            return
+        self.invoice_qr = payment_data['qr'] or await qr_cache().surface(payment_data['invoice'], QR_SIZE)
         
         # Store payment data for display
         self.payment_data = payment_data
+        await self.check_payment_loop()
     
     async def check_payment_loop(self):
-        """Poll for payment in background"""
-        while self.state == "WAITING_PAYMENT":
-            paid, credits = await check_payment_received()
-            if paid:
-                self.credits = credits
-                self.state = "PLAYING"
-                break
-            await asyncio.sleep(2)  # Check every 2 seconds
+        """Wait in background for the mint to confirm the payment"""
+        try:
+            credits = await wait_for_credits()
+        except InvoiceExpired:
+            # the QR code on screen can't be paid any more - back to inserting coins for a fresh one
+            if self.state == "WAITING_PAYMENT":
+                self.invoice_qr = None
+                self.payment_data = None
+                self.state = "INSERT_COINS"
+            return
+        if self.state == "WAITING_PAYMENT":
+            self.credits = credits
+            self.state = "PLAYING"
+    
+    async def resume(self):
+        """Pick up the credits (and invoices still being paid) this cabinet had when the game last stopped"""
+        try:
+            credits = await resume_session(self.session_id)
+        except Exception as e:
+            print(f"Couldn't resume the session: {e}")
+            return
+        if credits > 0 and self.state == "INSERT_COINS":
+            self.credits = credits
+            self.state = "PLAYING"
     
     async def start_game(self):
         """Start a reflex game (deduct credit)"""
@@ -104,24 +131,13 @@ class ReflexGame:
             else:
                 self.start_round()
     
-    async def handle_win(self, win_amount_sats=500):
+    async def handle_win(self, win_amount_sats=WIN_AMOUNT_SATS):
         """Player won! Show payout QR"""
         # Generate Cashu token for winnings
         token = await payout_winnings_as_token(win_amount_sats)
         
-        # Create QR code (smaller size)
-        qr = qrcode.QRCode(version=1, box_size=5, border=2)
-        qr.add_data(token)
-        qr.make(fit=True)
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-        
-        qr_bytes = BytesIO()
-        qr_img.save(qr_bytes, format='PNG')
-        qr_bytes.seek(0)
-        qr_surface = pygame.image.load(qr_bytes)
-        qr_surface = pygame.transform.scale(qr_surface, (250, 250))
-        
-        self.win_qr = qr_surface
+        # made in a worker thread - frames keep coming meanwhile
+        self.win_qr = await qr_cache().surface(token, QR_SIZE)
         self.win_amount = win_amount_sats
     
     async def run(self):
@@ -129,16 +145,28 @@ class ReflexGame:
         clock = pygame.time.Clock()
         running = True
         
+        # Keep invoices (and their QR codes) ready, so inserting coins doesn't wait on the mint
+        start_invoice_pool(denominations=(CREDITS_PER_PAYMENT,), render=make_qr_surface)
+        # ...and the winner's token, so a win doesn't wait on it either
+        start_payout_reserve((WIN_AMOUNT_SATS,))
+        # credits paid for before a crash or restart
+        self.resume_task = asyncio.create_task(self.resume())
+        
+        # a frame over 2.5 budgets writes the last 10 seconds of frame times to a file - see gamelib.profiler
+        configure_profiler("reflex", fps=60)
+        
         while running:
+            profiler().frame()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
                         if self.state == "INSERT_COINS":
-                            # Player wants to insert coins
-                            await self.show_payment_screen(num_credits=5)
-                            asyncio.create_task(self.check_payment_loop())
+                            # Player wants to insert coins - shown from the next frame on. The state changes now,
+                            # so a bouncing button's second press in the same batch doesn't ask for a second invoice
+                            self.state = "WAITING_PAYMENT"
+                            self.payment_task = asyncio.create_task(self.show_payment_screen())
                         elif self.state == "PLAYING":
                             # Player clicked for reflex test
                             self.handle_click()
@@ -169,19 +197,24 @@ class ReflexGame:
                     self.target_start_time = time.time()  # Reset to actual show time
             
             # Render based on state
-            if self.state == "WAITING_PAYMENT":
-                self.render_payment_screen()
-            elif self.state == "COUNTDOWN":
-                self.render_countdown()
-            elif self.state == "PLAYING":
-                self.render_game()
-            elif self.state == "GAME_OVER":
-                self.render_game_over()
-            elif self.state == "INSERT_COINS":
-                self.render_insert_coins_screen()
+            with profiler().phase("draw"):
+                if self.state == "WAITING_PAYMENT":
+                    self.render_payment_screen()
+                elif self.state == "COUNTDOWN":
+                    self.render_countdown()
+                elif self.state == "PLAYING":
+                    self.render_game()
+                elif self.state == "GAME_OVER":
+                    self.render_game_over()
+                elif self.state == "INSERT_COINS":
+                    self.render_insert_coins_screen()
             
-            pygame.display.flip()
-            clock.tick(60)
+            with profiler().phase("flip"):
+                pygame.display.flip()
+            with profiler().phase("tick"):
+                clock.tick(60)
+            with profiler().phase("tasks"):
+                await asyncio.sleep(0)  # let background tasks (payment watcher) run between frames
         
         end_session()
         pygame.quit()
@@ -200,6 +233,13 @@ class ReflexGame:
             qr_x = (800 - 250) // 2
             self.screen.blit(self.invoice_qr, (qr_x, 150))
         
+        if not self.payment_data:
+            # no ready-made invoice - waiting on the mint for one
+            small_font = pygame.font.Font(None, 32)
+            creating = small_font.render("Creating invoice...", True, (180, 180, 180))
+            self.screen.blit(creating, creating.get_rect(center=(400, 275)))
+            return
+        
         # Payment info
         small_font = pygame.font.Font(None, 32)
         amount_text = small_font.render(f"Amount: {self.payment_data['amount_sats']} sats", True, (255, 255, 255))
@@ -0,0 +1,179 @@
+# arcade_ledger.py - Durable credit ledger (SQLite, WAL)
+
+import os
+import sqlite3
+import time
+
+# next to the cashu wallet (arcade_wallet/wallet.sqlite3)
+LEDGER_PATH = os.path.join("arcade_wallet", "ledger.sqlite3")
+
+# how long a writer waits for another process's write to finish before giving up
+BUSY_TIMEOUT_MS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,          -- a play session, or a player if the game has logins
+    credits INTEGER NOT NULL DEFAULT 0 CHECK (credits >= 0),
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    closed_at REAL                        -- NULL while the session is open
+);
+CREATE TABLE IF NOT EXISTS quotes (
+    quote_id TEXT PRIMARY KEY,            -- mint quote the player was asked to pay
+    session_id TEXT NOT NULL REFERENCES sessions (session_id),
+    invoice TEXT NOT NULL,
+    amount_sats INTEGER NOT NULL,
+    credits INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL,                      -- when the invoice stops being payable, if the mint said
+    credited_at REAL                      -- NULL until paid and credited
+);
+CREATE TABLE IF NOT EXISTS entries (
+    entry_id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions (session_id),
+    kind TEXT NOT NULL CHECK (kind IN ('credit', 'debit', 'refund')),
+    credits INTEGER NOT NULL,
+    quote_id TEXT,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_session ON entries (session_id);
+CREATE INDEX IF NOT EXISTS quotes_pending ON quotes (session_id) WHERE credited_at IS NULL;
+"""
+
+# every statement is a constant with ? parameters, so sqlite3's statement cache prepares each one once
+# per connection and reuses it
+OPEN_SESSION = """
+INSERT INTO sessions (session_id, created_at, updated_at) VALUES (?, ?, ?)
+ON CONFLICT (session_id) DO UPDATE SET closed_at = NULL, updated_at = excluded.updated_at
+"""
+CLOSE_SESSION = "UPDATE sessions SET closed_at = ?, updated_at = ? WHERE session_id = ?"
+BALANCE = "SELECT credits FROM sessions WHERE session_id = ?"
+OPEN_SESSIONS = "SELECT session_id, credits FROM sessions WHERE closed_at IS NULL OR credits > 0"
+ADD_QUOTE = """
+INSERT OR IGNORE INTO quotes (quote_id, session_id, invoice, amount_sats, credits, created_at, expires_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+PENDING_QUOTES = """
+SELECT quote_id, invoice, amount_sats, expires_at FROM quotes WHERE session_id = ? AND credited_at IS NULL
+"""
+DROP_QUOTE = "DELETE FROM quotes WHERE quote_id = ? AND credited_at IS NULL"
+MARK_QUOTE_CREDITED = "UPDATE quotes SET credited_at = ? WHERE quote_id = ? AND credited_at IS NULL"
+ADD_CREDITS = "UPDATE sessions SET credits = credits + ?, updated_at = ? WHERE session_id = ? RETURNING credits"
+TAKE_CREDITS = """
+UPDATE sessions SET credits = credits - ?, updated_at = ? WHERE session_id = ? AND credits >= ? RETURNING credits
+"""
+ADD_ENTRY = "INSERT INTO entries (session_id, kind, credits, quote_id, at) VALUES (?, ?, ?, ?, ?)"
+
+
+class CreditLedger:
+    """
+    Credits per session, kept on disk so a crash doesn't lose what a player paid for.
+    Every change is one short transaction, logged in `entries`.
+
+    Any number of game processes can open the same file - WAL mode lets them read while one writes,
+    and writers queue up (BEGIN IMMEDIATE + busy timeout) instead of failing.
+    A connection belongs to the thread that opened it.
+    """
+
+    def __init__(self, path: str = LEDGER_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # autocommit - transactions are started explicitly below
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, cached_statements=64)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")  # WAL + NORMAL: durable across app crashes, one fsync per checkpoint
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+
+    def _write(self, work):
+        """Run `work(db)` in one write transaction and return what it returns"""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(self.db)
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+        return result
+
+    @staticmethod
+    def _add(db, session_id: str, credits: int, now: float) -> int:
+        rows = db.execute(ADD_CREDITS, (credits, now, session_id)).fetchall()
+        if not rows:
+            raise ValueError(f"No session {session_id}")
+        return rows[0][0]
+
+    def open_session(self, session_id: str):
+        """Start (or reopen) a session - its credits carry over"""
+        now = time.time()
+        self.db.execute(OPEN_SESSION, (session_id, now, now))
+
+    def close_session(self, session_id: str):
+        """Mark the session finished - unspent credits stay on it"""
+        now = time.time()
+        self.db.execute(CLOSE_SESSION, (now, now, session_id))
+
+    def balance(self, session_id: str) -> int:
+        row = self.db.execute(BALANCE, (session_id,)).fetchone()
+        return row[0] if row else 0
+
+    def open_sessions(self) -> list[tuple[str, int]]:
+        """(session_id, credits) of sessions still open or with credits left - what to pick up after a crash"""
+        return self.db.execute(OPEN_SESSIONS).fetchall()
+
+    def add_quote(self, session_id: str, quote_id: str, invoice: str, amount_sats: int, credits: int,
+                  expires_at: float = None):
+        """Remember a quote the session is waiting on, so it can be watched again after a restart"""
+        self.db.execute(ADD_QUOTE, (quote_id, session_id, invoice, amount_sats, credits, time.time(), expires_at))
+
+    def pending_quotes(self, session_id: str) -> list[tuple[str, str, int, float]]:
+        """(quote_id, invoice, amount_sats, expires_at) of the session's quotes not yet credited"""
+        return self.db.execute(PENDING_QUOTES, (session_id,)).fetchall()
+
+    def drop_quote(self, quote_id: str):
+        """Forget a quote that expired unpaid - it isn't watched again after a restart"""
+        self.db.execute(DROP_QUOTE, (quote_id,))
+
+    def credit(self, session_id: str, credits: int, quote_id: str = None) -> int:
+        """
+        Add credits - returns the new balance.
+        With a quote_id (one added with add_quote) it happens once per quote: crediting an already
+        credited quote changes nothing.
+        """
+        def work(db):
+            now = time.time()
+            if quote_id is not None and db.execute(MARK_QUOTE_CREDITED, (now, quote_id)).rowcount == 0:
+                return db.execute(BALANCE, (session_id,)).fetchone()[0]
+            balance = self._add(db, session_id, credits, now)
+            db.execute(ADD_ENTRY, (session_id, "credit", credits, quote_id, now))
+            return balance
+        return self._write(work)
+
+    def debit(self, session_id: str, credits: int = 1) -> int:
+        """
+        Take credits - returns the new balance.
+        Raises ValueError if there aren't enough (nothing is taken).
+        """
+        def work(db):
+            now = time.time()
+            rows = db.execute(TAKE_CREDITS, (credits, now, session_id, credits)).fetchall()
+            if not rows:
+                raise ValueError("No credits available")
+            db.execute(ADD_ENTRY, (session_id, "debit", -credits, None, now))
+            return rows[0][0]
+        return self._write(work)
+
+    def refund(self, session_id: str, credits: int = 1) -> int:
+        """Give back credits taken for a game that didn't happen - returns the new balance"""
+        def work(db):
+            now = time.time()
+            balance = self._add(db, session_id, credits, now)
+            db.execute(ADD_ENTRY, (session_id, "refund", credits, None, now))
+            return balance
+        return self._write(work)
+
+    def close(self):
+        self.db.close()
@@ -1,135 +1,495 @@
 # arcade_payments.py - Single module for all payment logic
 
 import asyncio
-from cashu.wallet.wallet import Wallet
-from dataclasses import dataclass
+import json
+import os
+import socket
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
 import time
 
+from arcade_ledger import CreditLedger
+from arcade_wallet_client import MINT_URL, QUOTE_PAID, QUOTE_ISSUED, WalletClient
+
+try:
+    import websockets  # comes with cashu - used to hear about payments the moment they land (NUT-17)
+except ImportError:
+    websockets = None
+
 @dataclass
 class GameSession:
-    """Simple in-memory session (no database needed)"""
-    credits: int = 0
+    """The payment the game is waiting on - the credits themselves live in the ledger"""
+    session_id: str = ""  # ledger key - a play session, or a player
     invoice: str = ""
     quote_id: str = ""
     amount_sats: int = 0
     ln_address: str = ""  # Optional: for refunds/payouts
     created_at: float = 0
+    expires_at: float = 0  # when the invoice stops being payable (0: the mint didn't say)
+    paid_at: float = 0  # when the mint told us the invoice was paid
+    paid_via: str = ""  # "websocket" or "polling"
+    credits_received: asyncio.Event = field(default_factory=asyncio.Event)  # set once the credits are in the ledger
+    expired: asyncio.Event = field(default_factory=asyncio.Event)  # set if the invoice expired unpaid
+    watcher: asyncio.Task = None  # waits for the payment in the background
+
+class InvoiceExpired(Exception):
+    """The invoice the game was waiting on expired unpaid - ask for a new one"""
+
+@dataclass
+class PooledInvoice:
+    """A mint quote made ahead of time, waiting for a player to insert coins"""
+    quote_id: str
+    invoice: str
+    amount_sats: int
+    num_credits: int
+    expires_at: float
+    qr: object = None  # whatever the pool's render() made of the invoice - a pygame surface in the games
     
-# Global state (single player)
+# Global state (one session per game process - the ledger holds them all)
 current_session = None
-wallet = None
+wallet = None  # the launcher's wallet daemon (a WalletClient), or the wallet itself if there's no daemon
+wallet_lock = asyncio.Lock()
+credit_ledger = None
+invoice_pool = None
+watching = {}  # quote_id -> its GameSession, while the watcher runs - until the quote is credited or expires
 
-MINT_URL = "https://mint.minibits.cash/Bitcoin"
 SATS_PER_CREDIT = 100
 
+# which cabinet this is - station_session_id() keys a game's credits by it, so they outlive the process
+STATION_ID = os.getenv("ARCADE_STATION_ID") or socket.gethostname()
+
+# when the mint can't push quote updates we ask about the quote instead - quickly at first, backing off to
+# every couple of seconds (mints only re-check an unpaid invoice every few seconds anyway - nutshell: 10)
+QUOTE_POLL_FIRST_SECONDS = 0.5
+QUOTE_POLL_BACKOFF = 1.5
+QUOTE_POLL_MAX_SECONDS = 2.0
+
+# ready-made invoices per credit denomination
+INVOICE_POOL_DENOMINATIONS = (5,)
+INVOICE_POOL_SIZE = 2
+# replace a pooled invoice this long before it expires - the player needs time to pay it
+INVOICE_POOL_REFRESH_BEFORE_EXPIRY_SECONDS = 120
+# for mints that don't say when their quotes expire
+INVOICE_POOL_DEFAULT_LIFETIME_SECONDS = 600
+# wait before trying again when the mint couldn't make a quote
+INVOICE_POOL_RETRY_SECONDS = 10
+
 async def init_wallet():
-    """Initialize Cashu wallet once at startup"""
+    """
+    Connect to the launcher's wallet daemon once at startup - or, if there's no daemon
+    (the game was started on its own), open the Cashu wallet in this process.
+    If the daemon has gone away since, connect again (the launcher restarts it) - or open the
+    wallet in this process if it isn't back.
+    """
     global wallet
-    if wallet is None:
-        wallet = await Wallet.with_db(MINT_URL, db="arcade_wallet")
-        await wallet.load_mint()
+    async with wallet_lock:
+        if isinstance(wallet, WalletClient) and wallet.closed:
+            print("Wallet daemon went away - reconnecting")
+            wallet.close()
+            wallet = None
+        if wallet is None:
+            try:
+                wallet = await WalletClient.connect()
+            except OSError:
+                print("No wallet daemon - opening the wallet in this process")
+                from arcade_walletd import WalletService  # imports cashu - slow
+                wallet = WalletService(MINT_URL)
+                await wallet.start()
     return wallet
 
-async def create_payment_request(num_credits: int) -> dict:
+def init_ledger() -> CreditLedger:
+    """Open the credit ledger once (arcade_wallet/ledger.sqlite3, shared with other games)"""
+    global credit_ledger
+    if credit_ledger is None:
+        credit_ledger = CreditLedger()
+    return credit_ledger
+
+class InvoicePool:
+    """
+    Keeps `size` unpaid invoices (with their QR codes already rendered) ready for each denomination,
+    so "insert coins" doesn't wait on the mint. Invoices close to expiring are swapped for fresh ones
+    in the background; take() never waits.
+
+    `render(invoice) -> qr` runs in a worker thread, off the game loop.
+    """
+
+    def __init__(self, denominations=INVOICE_POOL_DENOMINATIONS, size: int = INVOICE_POOL_SIZE, render=None):
+        self.size = size
+        self.render = render
+        self.ready = {num_credits: deque() for num_credits in denominations}  # oldest first
+        self.wanted = asyncio.Event()  # wakes the refill task when an invoice is taken
+        self.task = None
+
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.expired = 0  # thrown away unused
+        self.failures = 0
+
+    def start(self):
+        """Start refilling in the background - needs a running event loop"""
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def take(self, num_credits: int):
+        """A ready invoice for `num_credits`, or None if there isn't one (a miss)"""
+        ready = self.ready.get(num_credits)
+        now = time.time()
+        while ready:
+            invoice = ready.popleft()
+            if invoice.expires_at - now > INVOICE_POOL_REFRESH_BEFORE_EXPIRY_SECONDS:
+                self.hits += 1
+                self.wanted.set()
+                return invoice
+            self.expired += 1
+        self.misses += 1
+        self.wanted.set()
+        return None
+
+    async def make(self, num_credits: int) -> PooledInvoice:
+        amount_sats = num_credits * SATS_PER_CREDIT
+        await init_wallet()
+        mint_quote = await wallet.request_mint(amount_sats)
+        invoice = PooledInvoice(
+            quote_id=mint_quote.quote,
+            invoice=mint_quote.request,
+            amount_sats=amount_sats,
+            num_credits=num_credits,
+            expires_at=mint_quote.expiry or time.time() + INVOICE_POOL_DEFAULT_LIFETIME_SECONDS,
+        )
+        if self.render:
+            invoice.qr = await asyncio.to_thread(self.render, invoice.invoice)
+        return invoice
+
+    async def run(self):
+        await init_wallet()
+        while True:
+            self.wanted.clear()  # before the work - an invoice taken meanwhile wakes the next wait straight away
+            failed = False
+            for num_credits, ready in self.ready.items():
+                while ready and ready[0].expires_at - time.time() <= INVOICE_POOL_REFRESH_BEFORE_EXPIRY_SECONDS:
+                    ready.popleft()
+                    self.expired += 1
+                while len(ready) < self.size:
+                    try:
+                        ready.append(await self.make(num_credits))
+                        self.created += 1
+                    except Exception as e:
+                        print(f"Pre-generating invoice failed: {e}")
+                        self.failures += 1
+                        failed = True
+                        break
+
+            # sleep until the oldest invoice is due for replacement, or one is taken
+            due = [ready[0].expires_at for ready in self.ready.values() if ready]
+            wait = min(due, default=time.time()) - INVOICE_POOL_REFRESH_BEFORE_EXPIRY_SECONDS - time.time()
+            if failed:
+                wait = min(wait, INVOICE_POOL_RETRY_SECONDS) if due else INVOICE_POOL_RETRY_SECONDS
+            try:
+                await asyncio.wait_for(self.wanted.wait(), max(wait, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        asked = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / asked if asked else None,
+            "created": self.created,
+            "expired": self.expired,
+            "failures": self.failures,
+            "ready": {num_credits: len(ready) for num_credits, ready in self.ready.items()},
+        }
+
+def start_invoice_pool(denominations=INVOICE_POOL_DENOMINATIONS, size: int = INVOICE_POOL_SIZE, render=None) -> InvoicePool:
+    """
+    Start keeping invoices ready for the given credit denominations - call once the game's event loop is running.
+    `render(invoice)` makes the QR code to show (called in a worker thread).
     """
-    Generate Lightning invoice for credits.
-    Returns invoice string and QR code data.
+    global invoice_pool
+    if invoice_pool is None:
+        invoice_pool = InvoicePool(denominations, size, render)
+        invoice_pool.start()
+    return invoice_pool
+
+async def create_payment_request(num_credits: int, session_id: str = None) -> dict:
+    """
+    Generate Lightning invoice for credits - instantly if the invoice pool has one ready.
+    The credits go to `session_id` (a player, say), or else the current session, or else a new one.
+    Returns invoice string and QR code data ("qr" is None without a pool renderer).
     """
     global current_session
     
-    await init_wallet()
-    amount_sats = num_credits * SATS_PER_CREDIT
-    
-    # Request Lightning invoice from mint
-    mint_quote = await wallet.request_mint(amount_sats)
-    
-    # Create simple session (no database)
+    init_ledger()
+    if session_id is None:
+        session_id = current_session.session_id if current_session else uuid.uuid4().hex
+
+    pooled = invoice_pool.take(num_credits) if invoice_pool else None
+    if pooled is None:
+        # Request Lightning invoice from mint
+        await init_wallet()
+        amount_sats = num_credits * SATS_PER_CREDIT
+        mint_quote = await wallet.request_mint(amount_sats)
+        pooled = PooledInvoice(
+            quote_id=mint_quote.quote,
+            invoice=mint_quote.request,
+            amount_sats=amount_sats,
+            num_credits=num_credits,
+            expires_at=mint_quote.expiry or 0,
+        )
+        if invoice_pool and invoice_pool.render:
+            pooled.qr = await asyncio.to_thread(invoice_pool.render, pooled.invoice)
+
+    # an earlier invoice keeps its watcher - the player may still pay it, and its credits go to its session
+    credit_ledger.open_session(session_id)
+    credit_ledger.add_quote(session_id, pooled.quote_id, pooled.invoice, pooled.amount_sats, num_credits,
+                            pooled.expires_at or None)
     current_session = GameSession(
-        credits=0,
-        invoice=mint_quote.request,
-        quote_id=mint_quote.quote,
-        amount_sats=amount_sats,
-        created_at=time.time()
+        session_id=session_id,
+        invoice=pooled.invoice,
+        quote_id=pooled.quote_id,
+        amount_sats=pooled.amount_sats,
+        created_at=time.time(),
+        expires_at=pooled.expires_at,
     )
+    watch(current_session)
     
     return {
-        "invoice": mint_quote.request,
-        "amount_sats": amount_sats,
-        "num_credits": num_credits
+        "invoice": pooled.invoice,
+        "amount_sats": pooled.amount_sats,
+        "num_credits": num_credits,
+        "session_id": session_id,
+        "qr": pooled.qr,
     }
 
-async def check_payment_received() -> tuple[bool, int]:
+def station_session_id(game: str) -> str:
+    """The session a game's credits go to on this cabinet - the same every run, so resume_session() finds them"""
+    return f"{game}@{STATION_ID}"
+
+def watch(session: GameSession) -> GameSession:
+    """Start the session's watcher - or, if its quote is already watched, return the session watching it"""
+    if session.quote_id in watching:
+        return watching[session.quote_id]
+    watching[session.quote_id] = session
+    session.watcher = asyncio.create_task(confirm_payment(session))
+    session.watcher.add_done_callback(lambda _: watching.pop(session.quote_id, None))
+    return session
+
+async def resume_session(session_id: str) -> int:
     """
-    Check if invoice was paid. Call this in your game loop.
-    Returns (paid: bool, credits: int)
+    Pick a session back up after a restart: its credits are still in the ledger, and
+    invoices it was waiting on are watched again. Returns the credits it has.
     """
     global current_session
-    
-    if not current_session:
-        return False, 0
-    
-    if current_session.credits > 0:
-        return True, current_session.credits
-    
-    # Try to mint (will succeed if invoice paid)
+    init_ledger()
+    await init_wallet()
+    credit_ledger.open_session(session_id)
+    current_session = GameSession(session_id=session_id, created_at=time.time())
+    for quote_id, invoice, amount_sats, expires_at in credit_ledger.pending_quotes(session_id):
+        current_session = watch(GameSession(
+            session_id=session_id,
+            invoice=invoice,
+            quote_id=quote_id,
+            amount_sats=amount_sats,
+            created_at=time.time(),
+            expires_at=expires_at or 0,
+        ))
+    return credit_ledger.balance(session_id)
+
+def quote_paid(state: str) -> bool:
+    return state in (QUOTE_PAID, QUOTE_ISSUED)
+
+async def wait_for_quote_by_websocket(quote_id: str):
+    """
+    Subscribe to the quote (NUT-17) and wait for the mint to say it's paid.
+    The mint sends the quote's current state right after subscribing, so a payment that
+    beat the subscription isn't missed.
+    """
+    ws_url = wallet.url.replace("https://", "wss://", 1).replace("http://", "ws://", 1).rstrip("/") + "/v1/ws"
+    async with websockets.connect(ws_url) as ws:
+        await ws.send(json.dumps({
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "subscribe",
+            "params": {"kind": "bolt11_mint_quote", "filters": [quote_id], "subId": quote_id},
+        }))
+        async for message in ws:
+            message = json.loads(message)
+            if "error" in message:
+                raise RuntimeError(f"mint refused the subscription: {message['error']}")
+            payload = message.get("params", {}).get("payload")  # notifications - not the subscribe reply
+            if payload and payload.get("quote") == quote_id and quote_paid(payload.get("state")):
+                return
+    raise ConnectionError("mint closed the websocket")
+
+async def wait_for_quote_by_polling(quote_id: str):
+    """Ask the mint about the quote (a GET, not a mint attempt) with a growing delay until it's paid"""
+    delay = QUOTE_POLL_FIRST_SECONDS
+    while True:
+        try:
+            await init_wallet()
+            quote = await wallet.get_mint_quote(quote_id)
+            if quote_paid(quote.state):
+                return
+        except Exception as e:
+            print(f"Checking quote failed: {e}")
+        await asyncio.sleep(delay)
+        delay = min(delay * QUOTE_POLL_BACKOFF, QUOTE_POLL_MAX_SECONDS)
+
+async def wait_for_quote(session: GameSession):
+    if websockets and wallet.websocket_mint_quote:
+        try:
+            await wait_for_quote_by_websocket(session.quote_id)
+            session.paid_via = "websocket"
+            return
+        except Exception as e:
+            print(f"Payment subscription failed, polling instead: {e}")
+    await wait_for_quote_by_polling(session.quote_id)
+    session.paid_via = "polling"
+
+async def confirm_payment(session: GameSession):
+    """
+    Background task for one session: wait until its invoice is paid, mint once, and
+    credit the ledger - then tell the game through `session.credits_received`.
+    """
+    timeout = session.expires_at - time.time() if session.expires_at else None
+    try:
+        await asyncio.wait_for(wait_for_quote(session), timeout)
+    except asyncio.TimeoutError:
+        # expired - one last look in case it was paid at the last moment (a paid invoice has to be minted)
+        delay = QUOTE_POLL_FIRST_SECONDS
+        while True:
+            try:
+                await init_wallet()
+                quote = await wallet.get_mint_quote(session.quote_id)
+                break
+            except Exception as e:
+                print(f"Checking expired quote failed, retrying: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * QUOTE_POLL_BACKOFF, QUOTE_POLL_MAX_SECONDS)
+        if not quote_paid(quote.state):
+            print(f"Invoice {session.quote_id} expired unpaid")
+            credit_ledger.drop_quote(session.quote_id)
+            session.expired.set()
+            return
+    session.paid_at = time.time()
+
+    # paid - minting can still hit a network blip, and the credits are the player's, so keep at it
+    delay = QUOTE_POLL_FIRST_SECONDS
+    while True:
+        try:
+            await init_wallet()
+            await wallet.mint(session.amount_sats, quote_id=session.quote_id)
+            break
+        except Exception as e:
+            # minted already - before a crash, say
+            try:
+                if (await wallet.get_mint_quote(session.quote_id)).state == QUOTE_ISSUED:
+                    break
+            except Exception:
+                pass
+            print(f"Minting paid quote failed, retrying: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * QUOTE_POLL_BACKOFF, QUOTE_POLL_MAX_SECONDS)
+
+    credit_ledger.credit(session.session_id, session.amount_sats // SATS_PER_CREDIT, session.quote_id)
+    session.credits_received.set()
+
+async def wait_for_credits(timeout: float = None) -> int:
+    """
+    Wait until the current invoice is paid and return the session's credits.
+    Raises InvoiceExpired if it expires unpaid, asyncio.TimeoutError after `timeout` seconds,
+    ValueError if there's no session.
+    """
+    session = current_session
+    if not session:
+        raise ValueError("No payment requested")
+    paid = asyncio.ensure_future(session.credits_received.wait())
+    expired = asyncio.ensure_future(session.expired.wait())
     try:
-        await wallet.mint(current_session.amount_sats, quote_id=current_session.quote_id)
-        current_session.credits = current_session.amount_sats // SATS_PER_CREDIT
-        return True, current_session.credits
-    except:
+        done, _ = await asyncio.wait((paid, expired), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        paid.cancel()
+        expired.cancel()
+    if not done:
+        raise asyncio.TimeoutError()
+    if not session.credits_received.is_set():
+        raise InvoiceExpired(f"Invoice {session.quote_id} expired unpaid")
+    return credit_ledger.balance(session.session_id)
+
+async def check_payment_received() -> tuple[bool, int]:
+    """
+    Check if invoice was paid - no network, the background watcher does the asking.
+    Returns (paid: bool, credits: int)
+    """
+    if not current_session or not current_session.credits_received.is_set():
         return False, 0
+    return True, credit_ledger.balance(current_session.session_id)
 
 def use_credit() -> int:
     """
     Deduct one credit for a game.
     Returns remaining credits.
     """
-    global current_session
-    
-    if not current_session or current_session.credits < 1:
+    if not current_session:
         raise ValueError("No credits available")
-    
-    current_session.credits -= 1
-    return current_session.credits
+    return credit_ledger.debit(current_session.session_id)
+
+def refund_credit(credits: int = 1) -> int:
+    """
+    Give back credits for a game that couldn't be played.
+    Returns remaining credits.
+    """
+    if not current_session:
+        raise ValueError("No session")
+    return credit_ledger.refund(current_session.session_id, credits)
 
 async def payout_winnings(amount_sats: int, ln_address: str) -> bool:
     """
     Pay winnings to Lightning address.
     Returns True if successful.
     """
-    from routstr.payment.lnurl import raw_send_to_lnurl
-    from routstr.wallet import get_proofs_per_mint_and_unit
-    
     await init_wallet()
-    
-    # Get available proofs
-    proofs = get_proofs_per_mint_and_unit(wallet, MINT_URL, "sat", not_reserved=True)
-    
-    # Select proofs for payout
-    send_proofs, _ = await wallet.select_to_send(
-        proofs, amount_sats, set_reserved=True, include_fees=False
-    )
-    
-    # Send to Lightning address
-    try:
-        await raw_send_to_lnurl(wallet, send_proofs, ln_address, "sat")
-        return True
-    except Exception as e:
-        print(f"Payout failed: {e}")
-        return False
+    return await wallet.pay_lnurl(amount_sats, ln_address)
 
 async def payout_winnings_as_token(amount_sats: int) -> str:
     """
     Alternative: Return winnings as Cashu token (show QR code).
-    Player scans with their Cashu wallet.
+    Player scans with their Cashu wallet. Ready-made if the prize is one start_payout_reserve() was told about.
     """
-    from routstr.wallet import send_token
-    
     await init_wallet()
-    token = await send_token(amount_sats, "sat")
-    return token
+    return await wallet.payout_token(amount_sats)
+
+async def reserve_payouts(prizes) -> dict:
+    """Have the wallet keep tokens ready for these prize amounts (sats). Returns the reserve's stats."""
+    await init_wallet()
+    return await wallet.reserve_payouts(list(prizes))
+
+def start_payout_reserve(prizes) -> asyncio.Task:
+    """
+    Ask for prize tokens to be kept ready, in the background - call once the game's event loop is running.
+    Winners then get their token without waiting on the mint.
+    """
+    return asyncio.create_task(reserve_payouts(prizes))
+
+async def payout_reserve_stats() -> dict:
+    """Ready, handed-out-but-unclaimed and claimed prize tokens (from the wallet's status)"""
+    await init_wallet()
+    return (await wallet.status())["payout_reserve"]
 
 def end_session():
-    """Clear current session"""
+    """
+    Clear current session (unspent credits stay in the ledger under its session_id). Its invoice is
+    still watched while this process runs - paid, it's credited to the session.
+    """
     global current_session
-    current_session = None
\ No newline at end of file
+    if current_session:
+        credit_ledger.close_session(current_session.session_id)
+    current_session = None
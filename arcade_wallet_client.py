@@ -0,0 +1,142 @@
+# arcade_wallet_client.py - Talk to the launcher's wallet daemon (no cashu import needed)
+
+"""
+The launcher runs one wallet daemon (arcade_walletd.py) for the whole cabinet: one cashu wallet with the mint's
+keysets already loaded and its HTTP connections kept open. Games reach it over a Unix socket with WalletClient,
+which has the same methods as the daemon's WalletService - arcade_payments uses whichever it gets.
+
+One JSON message per line, answered by id (requests on one connection can overlap):
+
+    game   -> daemon    {"id": 1, "op": "request_mint", "args": {"amount": 500}}
+    daemon -> game      {"id": 1, "result": {"quote": "...", "request": "lnbc...", ...}}
+    daemon -> game      {"id": 2, "error": "quote not found"}
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+MINT_URL = os.getenv("ARCADE_MINT_URL", "https://mint.minibits.cash/Bitcoin")  # TESTING/standinmint.py for offline
+
+# a mint quote's states (NUT-04)
+QUOTE_UNPAID = "UNPAID"
+QUOTE_PAID = "PAID"
+QUOTE_ISSUED = "ISSUED"
+
+def socket_path() -> str:
+    """Where the daemon listens - ARCADE_WALLET_SOCKET if it's set (the launcher sets it for its games)"""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.getenv("ARCADE_WALLET_SOCKET") or os.path.join(runtime_dir, f"cashuarcade-wallet-{os.getuid()}.sock")
+
+@dataclass
+class Quote:
+    """A mint quote - an invoice that turns into ecash once it's paid"""
+    quote: str
+    request: str  # the Lightning invoice
+    amount: int
+    state: str
+    expiry: Optional[int] = None  # unix time, if the mint said
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+class WalletError(Exception):
+    """The daemon's wallet couldn't do what was asked (the message is the daemon's)"""
+
+class WalletClient:
+    """The daemon's wallet, from a game - connect() once, then call it like WalletService"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count(1)
+        self.waiting = {}  # id -> future for the answer
+        self.listener = asyncio.create_task(self.listen())
+        self.url = None
+        self.websocket_mint_quote = False
+
+    @classmethod
+    async def connect(cls, path: str = None) -> "WalletClient":
+        """Raises OSError if no daemon is listening"""
+        reader, writer = await asyncio.open_unix_connection(path or socket_path())
+        client = cls(reader, writer)
+        info = await client.call("info")
+        client.url = info["mint_url"]
+        client.websocket_mint_quote = info["websocket_mint_quote"]
+        return client
+
+    async def listen(self):
+        try:
+            while line := await self.reader.readline():
+                message = json.loads(line)
+                future = self.waiting.pop(message["id"], None)
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(WalletError(message["error"]))
+                else:
+                    future.set_result(message["result"])
+        finally:
+            # daemon gone - nobody's answering the rest
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("wallet daemon went away"))
+            self.waiting.clear()
+
+    @property
+    def closed(self) -> bool:
+        """The daemon went away (or close() was called) - connect again for a working client"""
+        return self.listener.done()
+
+    async def call(self, op: str, **args):
+        if self.closed:
+            raise ConnectionError("wallet daemon went away")
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        try:
+            self.writer.write((json.dumps({"id": request_id, "op": op, "args": args}) + "\n").encode())
+            await self.writer.drain()
+        except OSError:
+            # the socket broke before the listener saw it - this client is done either way
+            self.waiting.pop(request_id, None)
+            self.close()
+            raise ConnectionError("wallet daemon went away")
+        return await future
+
+    async def request_mint(self, amount: int) -> Quote:
+        return Quote(**await self.call("request_mint", amount=amount))
+
+    async def get_mint_quote(self, quote_id: str) -> Quote:
+        return Quote(**await self.call("get_mint_quote", quote_id=quote_id))
+
+    async def mint(self, amount: int, quote_id: str) -> int:
+        """Mint a paid quote's ecash into the wallet - returns the amount minted"""
+        return await self.call("mint", amount=amount, quote_id=quote_id)
+
+    async def balance(self) -> int:
+        return await self.call("balance")
+
+    async def send_token(self, amount: int) -> str:
+        return await self.call("send_token", amount=amount)
+
+    async def pay_lnurl(self, amount: int, ln_address: str) -> bool:
+        return await self.call("pay_lnurl", amount=amount, ln_address=ln_address)
+
+    async def payout_token(self, amount: int) -> str:
+        """A winner's token - from the daemon's prize reserve, usually"""
+        return await self.call("payout_token", amount=amount)
+
+    async def reserve_payouts(self, amounts: list) -> dict:
+        return await self.call("reserve_payouts", amounts=list(amounts))
+
+    async def status(self) -> dict:
+        return await self.call("status")
+
+    def close(self):
+        self.listener.cancel()
+        self.writer.close()
@@ -0,0 +1,508 @@
+# arcade_walletd.py - The cabinet's one cashu wallet, served to games over a Unix socket
+
+"""
+The launcher starts this once (lnarcade.utilities.walletd) instead of every game opening the wallet database and
+fetching the mint's keysets itself:
+
+    python -m arcade_walletd [socket path] [mint url]
+
+It keeps the keysets loaded (refreshed every KEYSET_REFRESH_SECONDS), keeps its HTTP connections to the mint open,
+and is the only process writing arcade_wallet/wallet.sqlite3. Games talk to it with
+arcade_wallet_client.WalletClient - the protocol is described there.
+
+Without a daemon (a game run on its own), arcade_payments uses WalletService in-process instead.
+"""
+
+import asyncio
+import bisect
+import json
+import os
+import signal
+import sys
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+from cashu.core.base import Method
+from cashu.wallet.crud import get_reserved_proofs, update_proof
+from cashu.wallet.wallet import Wallet
+
+from arcade_wallet_client import MINT_URL, Quote, socket_path
+
+# how often the mint's keysets are fetched again (they rarely change - a rotated keyset is also picked up on demand)
+KEYSET_REFRESH_SECONDS = 3600
+# how soon to try again when the mint couldn't be reached
+KEYSET_RETRY_SECONDS = 10
+# the daemon goes away with the launcher - checked this often
+PARENT_CHECK_SECONDS = 2
+
+# prize tokens kept ready per amount (sats) - games add theirs with reserve_payouts()
+PAYOUT_RESERVE_DENOMINATIONS = ()
+PAYOUT_RESERVE_SIZE = 2
+# how often handed-out prize tokens are checked with the mint (have the winners claimed them?)
+PAYOUT_RESERVE_CHECK_SECONDS = 60
+# how soon to try topping up again when the balance was short or the mint couldn't be reached
+PAYOUT_RESERVE_RETRY_SECONDS = 30
+# send_id tags on the wallet's reserved proofs - the reserve survives a restart in the wallet database
+RESERVE_SEND_ID = "arcade-reserve-"
+PAYOUT_SEND_ID = "arcade-payout-"
+
+# payout latency histogram bounds (seconds) - how long a winner waited, for the launcher's /metrics page
+PAYOUT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+SERVED_OPS = ("request_mint", "get_mint_quote", "mint", "balance", "send_token", "pay_lnurl", "payout_token",
+              "reserve_payouts", "status")
+
+
+class PooledWallet(Wallet):
+    """
+    A cashu Wallet that keeps the first HTTP client it's given. cashu makes a new httpx.AsyncClient for every call
+    to the mint (a new connection each time - and a TLS handshake); keeping one reuses its open connections.
+    """
+
+    @property
+    def httpx(self):
+        return self.__dict__.get("pooled_httpx")
+
+    @httpx.setter
+    def httpx(self, client):
+        if self.__dict__.get("pooled_httpx") is None:
+            self.__dict__["pooled_httpx"] = client
+
+
+@dataclass
+class ReserveToken:
+    """A prize token - its proofs are reserved in the wallet, tagged with `send_id`"""
+    send_id: str
+    amount: int
+    token: str
+    proofs: list = field(default_factory=list)
+    made_at: float = 0
+    handed_out_at: float = 0
+
+
+class PayoutReserve:
+    """
+    Keeps `size` ready-made Cashu tokens for each prize amount, so a winner's token doesn't wait on coin selection
+    and a swap with the mint. Topped up in the background from the wallet's balance; take() just hands one over.
+
+    Tokens that were handed out are checked with the mint every so often until the winner claims (swaps) them -
+    stats() counts the ones still out there.
+    """
+
+    def __init__(self, service: "WalletService", denominations=PAYOUT_RESERVE_DENOMINATIONS,
+                 size: int = PAYOUT_RESERVE_SIZE):
+        self.service = service
+        self.size = size
+        self.held = {amount: deque() for amount in denominations}  # oldest first
+        self.handed_out = {}  # send_id -> ReserveToken, until it's claimed
+        self.wanted = asyncio.Event()  # wakes the top-up task
+        self.short = False  # the last top-up found too little balance
+        self.task = None
+
+        self.hits = 0
+        self.misses = 0
+        self.made = 0
+        self.failures = 0
+        self.claimed = 0
+        self.claimed_sats = 0
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def add(self, denominations):
+        """Keep tokens ready for these amounts too"""
+        for amount in denominations:
+            self.held.setdefault(amount, deque())
+        self.wanted.set()
+
+    async def tag(self, proofs: list, send_id: str):
+        """Reserve the proofs under `send_id` in the wallet database - in one transaction"""
+        async with self.service.wallet.db.connect() as conn:
+            for proof in proofs:
+                await update_proof(proof, reserved=True, send_id=send_id, conn=conn)
+        for proof in proofs:
+            proof.reserved = True
+            proof.send_id = send_id
+
+    async def load(self):
+        """Pick up the tokens made (and handed out) before a restart"""
+        by_send_id = {}
+        for proof in await get_reserved_proofs(db=self.service.wallet.db):
+            if proof.send_id and proof.send_id.startswith((RESERVE_SEND_ID, PAYOUT_SEND_ID)):
+                by_send_id.setdefault(proof.send_id, []).append(proof)
+        for send_id, proofs in by_send_id.items():
+            reserve_token = ReserveToken(
+                send_id=send_id,
+                amount=sum(proof.amount for proof in proofs),
+                token=await self.service.wallet.serialize_proofs(proofs),
+                proofs=proofs,
+                made_at=float(proofs[0].time_reserved or 0),
+            )
+            if send_id.startswith(PAYOUT_SEND_ID):
+                reserve_token.handed_out_at = reserve_token.made_at
+                self.handed_out[send_id] = reserve_token
+            else:
+                self.held.setdefault(reserve_token.amount, deque()).append(reserve_token)
+
+    async def split(self, amount: int):
+        """
+        Proofs worth exactly `amount` from the balance, reserved as a prize token - None if the balance is short.
+        Swaps with the mint if the wallet doesn't have the right proofs. Call holding `service.spending`.
+        """
+        wallet = self.service.wallet
+        await wallet.load_proofs(reload=True)
+        proofs = [proof for proof in wallet.proofs if not proof.reserved]
+        if sum(proof.amount for proof in proofs) < amount:
+            return None
+        send_proofs, _ = await wallet.select_to_send(proofs, amount)
+        send_id = RESERVE_SEND_ID + uuid.uuid4().hex
+        await self.tag(send_proofs, send_id)
+        return ReserveToken(send_id=send_id, amount=amount, token=await wallet.serialize_proofs(send_proofs),
+                            proofs=send_proofs, made_at=time.time())
+
+    async def make(self, amount: int):
+        async with self.service.spending:
+            return await self.split(amount)
+
+    def take(self, amount: int):
+        """A ready token worth `amount`, or None if there isn't one (a miss) - hand_out() it next"""
+        held = self.held.get(amount)
+        self.wanted.set()
+        if not held:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return held.popleft()
+
+    async def hand_out(self, reserve_token: ReserveToken) -> str:
+        """
+        Mark the token as given to a player - one UPDATE, so it's never given twice, even after a restart -
+        and track it until it's claimed
+        """
+        send_id = PAYOUT_SEND_ID + uuid.uuid4().hex
+        await self.service.wallet.db.execute(
+            "UPDATE proofs SET send_id = :send_id, time_reserved = :now WHERE send_id = :reserve_send_id",
+            {"send_id": send_id, "now": int(time.time()), "reserve_send_id": reserve_token.send_id},
+        )
+        reserve_token.send_id = send_id
+        reserve_token.handed_out_at = time.time()
+        self.handed_out[send_id] = reserve_token
+        return reserve_token.token
+
+    async def reconcile(self):
+        """Ask the mint which handed-out tokens have been claimed, and drop those from the wallet"""
+        wallet = self.service.wallet
+        proofs = [proof for payout in self.handed_out.values() for proof in payout.proofs]
+        spent = {proof.secret for proof in await wallet.get_spent_proofs_check_states_batched(proofs)}
+        for send_id, payout in list(self.handed_out.items()):
+            if all(proof.secret in spent for proof in payout.proofs):
+                await wallet.invalidate(payout.proofs)
+                del self.handed_out[send_id]
+                self.claimed += 1
+                self.claimed_sats += payout.amount
+
+    async def run(self):
+        await self.load()
+        next_check = 0
+        while True:
+            self.wanted.clear()  # before the work - a token taken meanwhile wakes the next wait straight away
+            self.short = False
+            failed = False
+            for amount, held in list(self.held.items()):
+                while len(held) < self.size:
+                    try:
+                        reserve_token = await self.make(amount)
+                    except Exception as e:
+                        print(f"Making prize token failed: {e}")
+                        self.failures += 1
+                        failed = True
+                        break
+                    if reserve_token is None:
+                        self.short = True
+                        break
+                    held.append(reserve_token)
+                    self.made += 1
+
+            if self.handed_out and time.time() >= next_check:
+                try:
+                    await self.reconcile()
+                except Exception as e:
+                    print(f"Checking handed-out prize tokens failed: {e}")
+                next_check = time.time() + PAYOUT_RESERVE_CHECK_SECONDS
+
+            # sleep until a token is taken, a payment comes in, or it's time to retry or check again
+            waits = []
+            if self.short or failed:
+                waits.append(PAYOUT_RESERVE_RETRY_SECONDS)
+            if self.handed_out:
+                waits.append(next_check - time.time())
+            try:
+                await asyncio.wait_for(self.wanted.wait(), max(min(waits), 0) if waits else None)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        now = time.time()
+        asked = self.hits + self.misses
+        unclaimed = self.handed_out.values()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / asked if asked else None,
+            "made": self.made,
+            "failures": self.failures,
+            "short_of_balance": self.short,
+            "ready": {amount: len(held) for amount, held in self.held.items()},
+            "ready_sats": sum(token.amount for held in self.held.values() for token in held),
+            "unclaimed": len(unclaimed),
+            "unclaimed_sats": sum(payout.amount for payout in unclaimed),
+            "oldest_unclaimed_seconds": max((now - payout.handed_out_at for payout in unclaimed), default=None),
+            "claimed": self.claimed,
+            "claimed_sats": self.claimed_sats,
+        }
+
+
+class WalletService:
+    """The wallet itself - served by the daemon, or used in-process when there isn't one"""
+
+    def __init__(self, mint_url: str = MINT_URL, db: str = "arcade_wallet"):
+        self.url = mint_url
+        self.db = db
+        self.wallet = None
+        self.websocket_mint_quote = False  # can the mint push quote updates (NUT-17)?
+        self.keysets_loaded_at = None
+        self.started_at = time.time()
+        self.requests = Counter()  # by op
+        self.payments_received = 0
+        self.sats_received = 0
+        self.payouts_made = Counter()  # by kind - "token" or "lightning"
+        self.sats_paid_out = Counter()
+        self.payout_seconds = {}  # kind -> [count per bucket (the last is +Inf), sum]
+        self.ready = asyncio.Event()
+        # minting and spending pick secrets and proofs from the wallet's state - one at a time
+        self.spending = asyncio.Lock()
+        self.payouts = PayoutReserve(self)
+
+    async def start(self):
+        self.wallet = await PooledWallet.with_db(self.url, db=self.db)
+        await self.load_keysets()
+        self.payouts.start()
+        self.ready.set()
+
+    async def load_keysets(self) -> bool:
+        """Fetch the mint's keysets and info - False if the mint couldn't be reached"""
+        await self.wallet.load_mint()  # logs and carries on if the mint is unreachable
+        if not any(keyset.active for keyset in self.wallet.keysets.values()):
+            return False
+        self.keysets_loaded_at = time.time()
+        mint_info = getattr(self.wallet, "mint_info", None)
+        self.websocket_mint_quote = bool(mint_info and mint_info.supports_websocket_mint_quote(Method.bolt11, self.wallet.unit))
+        return True
+
+    @staticmethod
+    def quote(mint_quote) -> Quote:
+        return Quote(
+            quote=mint_quote.quote,
+            request=mint_quote.request,
+            amount=mint_quote.amount,
+            state=mint_quote.state.value,
+            expiry=mint_quote.expiry,
+        )
+
+    async def request_mint(self, amount: int) -> Quote:
+        return self.quote(await self.wallet.request_mint(amount))
+
+    async def get_mint_quote(self, quote_id: str) -> Quote:
+        return self.quote(await self.wallet.get_mint_quote(quote_id))
+
+    async def mint(self, amount: int, quote_id: str) -> int:
+        """Mint a paid quote's ecash into the wallet - returns the amount minted"""
+        async with self.spending:
+            proofs = await self.wallet.mint(amount, quote_id=quote_id)
+        self.payouts.wanted.set()  # more balance - the prize reserve may be waiting on it
+        minted = sum(proof.amount for proof in proofs)
+        self.payments_received += 1
+        self.sats_received += minted
+        return minted
+
+    def paid_out(self, kind: str, amount: int, started: float):
+        counts, _ = self.payout_seconds.setdefault(kind, [[0] * (len(PAYOUT_LATENCY_BUCKETS) + 1), 0])
+        seconds = time.perf_counter() - started
+        counts[bisect.bisect_left(PAYOUT_LATENCY_BUCKETS, seconds)] += 1
+        self.payout_seconds[kind][1] += seconds
+        self.payouts_made[kind] += 1
+        self.sats_paid_out[kind] += amount
+
+    async def balance(self) -> int:
+        await self.wallet.load_proofs(reload=True)
+        return self.wallet.available_balance.amount
+
+    async def send_token(self, amount: int) -> str:
+        """A Cashu token worth `amount` from the wallet's balance (its proofs are reserved until it's claimed)"""
+        async with self.spending:
+            await self.wallet.load_proofs(reload=True)
+            proofs = [proof for proof in self.wallet.proofs if not proof.reserved]
+            send_proofs, _ = await self.wallet.select_to_send(proofs, amount, set_reserved=True)
+            return await self.wallet.serialize_proofs(send_proofs)
+
+    async def payout_token(self, amount: int) -> str:
+        """A winner's Cashu token worth `amount` - ready-made from the prize reserve, usually"""
+        started = time.perf_counter()
+        reserve_token = self.payouts.take(amount)
+        if reserve_token is None:
+            async with self.spending:
+                # a top-up that was under way may have just made one
+                held = self.payouts.held.get(amount)
+                reserve_token = held.popleft() if held else await self.payouts.split(amount)
+            if reserve_token is None:
+                raise ValueError(f"Balance too low for a {amount} sat payout")
+        token = await self.payouts.hand_out(reserve_token)
+        self.paid_out("token", amount, started)
+        return token
+
+    async def reserve_payouts(self, amounts: list) -> dict:
+        """Keep prize tokens ready for these amounts (sats) - returns the reserve's stats"""
+        self.payouts.add(amounts)
+        return self.payouts.stats()
+
+    async def pay_lnurl(self, amount: int, ln_address: str) -> bool:
+        """Pay `amount` to a Lightning address - True if it went through"""
+        from routstr.payment.lnurl import raw_send_to_lnurl
+
+        started = time.perf_counter()
+        async with self.spending:
+            await self.wallet.load_proofs(reload=True)
+            proofs = [proof for proof in self.wallet.proofs if not proof.reserved]
+            send_proofs, _ = await self.wallet.select_to_send(proofs, amount, set_reserved=True, include_fees=False)
+            try:
+                await raw_send_to_lnurl(self.wallet, send_proofs, ln_address, "sat")
+            except Exception as e:
+                print(f"Payout failed: {e}")
+                return False
+        self.paid_out("lightning", amount, started)
+        return True
+
+    async def status(self) -> dict:
+        return {
+            "mint_url": self.url,
+            "keysets": [keyset.id for keyset in self.wallet.keysets.values() if keyset.active],
+            "keysets_loaded_at": self.keysets_loaded_at,
+            "websocket_mint_quote": self.websocket_mint_quote,
+            "uptime_seconds": time.time() - self.started_at,
+            "requests": dict(self.requests),
+            "payout_reserve": self.payouts.stats(),
+            "payments": {
+                "received": self.payments_received,
+                "sats_received": self.sats_received,
+                "payouts": dict(self.payouts_made),
+                "sats_paid_out": dict(self.sats_paid_out),
+                "payout_seconds": {
+                    kind: {"buckets": list(PAYOUT_LATENCY_BUCKETS), "counts": counts, "sum": total}
+                    for kind, (counts, total) in self.payout_seconds.items()
+                },
+            },
+        }
+
+    def close(self):
+        self.payouts.stop()
+
+
+
+###########################################
+# the daemon
+###########################################
+async def answer(service: WalletService, request: dict, send):
+    op = request.get("op")
+    try:
+        await service.ready.wait()
+        if op == "info":
+            result = {"mint_url": service.url, "websocket_mint_quote": service.websocket_mint_quote}
+        elif op in SERVED_OPS:
+            result = await getattr(service, op)(**request.get("args", {}))
+        else:
+            raise ValueError(f"unknown op '{op}'")
+        if isinstance(result, Quote):
+            result = result.to_dict()
+        response = {"id": request.get("id"), "result": result}
+    except Exception as e:
+        response = {"id": request.get("id"), "error": str(e) or e.__class__.__name__}
+    service.requests[op] += 1
+    await send(response)
+
+
+async def handle(service: WalletService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """One game's connection - each request is answered as soon as it's done, so a slow one doesn't hold up the rest"""
+    writing = asyncio.Lock()
+    pending = set()
+
+    async def send(message: dict):
+        async with writing:
+            writer.write((json.dumps(message) + "\n").encode())
+            await writer.drain()
+
+    try:
+        while line := await reader.readline():
+            task = asyncio.create_task(answer(service, json.loads(line), send))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+    except (ConnectionError, json.JSONDecodeError) as e:
+        print(f"Dropping wallet client: {e}")
+    finally:
+        for task in pending:
+            task.cancel()
+        writer.close()
+
+
+async def serve(path: str, mint_url: str):
+    service = WalletService(mint_url)
+
+    # listen right away - games that connect while the mint is loading just wait for their answers
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(lambda reader, writer: handle(service, reader, writer), path)
+    os.chmod(path, 0o600)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, stopping.set)
+
+    parent = os.getppid()
+    await service.start()
+    print(f"Wallet daemon on {path} for {mint_url} (keysets {'loaded' if service.keysets_loaded_at else 'not loaded yet'})",
+          flush=True)
+
+    next_refresh = time.time() + (KEYSET_REFRESH_SECONDS if service.keysets_loaded_at else KEYSET_RETRY_SECONDS)
+    while not stopping.is_set():
+        try:
+            await asyncio.wait_for(stopping.wait(), PARENT_CHECK_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        if os.getppid() != parent:
+            break
+        if time.time() >= next_refresh:
+            loaded = await service.load_keysets()
+            next_refresh = time.time() + (KEYSET_REFRESH_SECONDS if loaded else KEYSET_RETRY_SECONDS)
+
+    server.close()
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def main():
+    # Ctrl-C in the launcher's terminal is for the launcher - we go when it tells us to (SIGTERM) or when it's gone
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    path = sys.argv[1] if len(sys.argv) > 1 else socket_path()
+    mint_url = sys.argv[2] if len(sys.argv) > 2 else MINT_URL
+    asyncio.run(serve(path, mint_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Lazy, shared images and sounds.
+
+    handle = assets().image(path, scale=2)     # nothing is decoded yet
+    assets().preload([handle, ...])            # decode in the background (say, while the splash screen is up)
+    surface = handle.get()                     # ready - or loaded right now if it wasn't preloaded
+
+Asking for the same file (with the same options) twice gives the same handle. Loaded assets are kept for as long
+as the process runs - a game's images and sounds are all in use from its first level to its last.
+
+Images can also be kept on disk after they're converted and scaled (set `cache_dir`) - the next start maps the raw
+pixels straight into a surface with mmap instead of decoding and scaling the PNG again.
+"""
+
+import os
+import mmap
+import struct
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import logging
+logger = logging.getLogger()
+
+import pygame
+
+
+ASSET_WORKERS = 2
+
+# raw pixel files: width and height, then the pixels
+HEADER = struct.Struct("<II")
+PIXEL_FORMAT = "BGRA"
+
+
+
+class Asset:
+    """ A handle to something that's loaded on first use - see AssetManager """
+
+    def __init__(self, manager: 'AssetManager', key: tuple, loader):
+        self.manager = manager
+        self.key = key
+        self.loader = loader
+
+        self.value = None
+        self.future = None
+        self.lock = threading.Lock()
+
+
+    @property
+    def loaded(self) -> bool:
+        return self.value is not None
+
+
+    def get(self):
+        """ the loaded thing - waits for a background load in flight, or loads it right here """
+        if self.value is not None:
+            self.manager.hits += 1
+            return self.value
+
+        with self.lock:
+            future = self.future
+        if future is not None and not future.cancelled():
+            future.result()
+            if self.value is not None:
+                return self.value
+
+        self._load()
+        return self.value
+
+
+    def _load(self):
+        with self.lock:
+            if self.value is not None:
+                return
+            self.value = self.loader()
+            self.manager.loads += 1
+
+
+
+
+class AssetManager:
+    def __init__(self, cache_dir: str = None, workers: int = ASSET_WORKERS):
+        self.cache_dir = cache_dir # None - no disk cache
+        self.assets = {}
+        self.pool = None
+        self.workers = workers
+        self.lock = threading.Lock()
+
+        # counters
+        self.loads = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.preloads = 0
+
+
+    def handle(self, key: tuple, loader) -> Asset:
+        """ the handle for `key` (made with `loader` the first time) """
+        with self.lock:
+            asset = self.assets.get(key)
+            if asset is None:
+                asset = Asset(self, key, loader)
+                self.assets[key] = asset
+        return asset
+
+
+    def image(self, path: str, alpha: bool = True, scale: float = 1, colorkey: tuple = None) -> Asset:
+        """ an image, converted for the display (needs the display mode set before it's loaded) and scaled """
+        key = ("image", os.path.abspath(path), alpha, scale, colorkey)
+        return self.handle(key, lambda: self._load_image(key[1], alpha, scale, colorkey))
+
+
+    def sound(self, path: str) -> Asset:
+        """ a pygame.mixer.Sound (needs the mixer initialized before it's loaded) """
+        key = ("sound", os.path.abspath(path))
+        return self.handle(key, lambda: pygame.mixer.Sound(key[1]))
+
+
+    def preload(self, assets: list):
+        """ start loading these in the background - get() waits for any that aren't done yet """
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="assets")
+
+        for asset in assets:
+            with asset.lock:
+                if asset.value is not None or asset.future is not None:
+                    continue
+                asset.future = self.pool.submit(self._preload, asset)
+                self.preloads += 1
+
+
+    def _preload(self, asset: Asset):
+        try:
+            asset._load()
+        except Exception as e:
+            # get() on the main thread will try again (and raise)
+            logger.error(f"preloading {asset.key} failed: {e}")
+        finally:
+            with asset.lock:
+                asset.future = None
+
+
+    def wait(self):
+        """ block until everything preloaded so far has loaded """
+        for asset in list(self.assets.values()):
+            future = asset.future
+            if future is not None:
+                future.result()
+
+
+    def shutdown(self):
+        """ drop whatever hasn't started preloading and wait for the rest (before pygame.quit()) """
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+        for asset in list(self.assets.values()):
+            with asset.lock:
+                asset.future = None
+
+
+    def stats(self) -> dict:
+        return {
+            "assets": len(self.assets),
+            "loaded": sum(asset.loaded for asset in self.assets.values()),
+            "loads": self.loads,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "preloads": self.preloads,
+        }
+
+
+    ###########################################
+    def _load_image(self, path: str, alpha: bool, scale: float, colorkey: tuple) -> pygame.Surface:
+        cached = self._cache_path(path, scale) if alpha and self.cache_dir else None
+        surface = self._read_cached(cached) if cached else None
+
+        if surface is None:
+            surface = pygame.image.load(path)
+            surface = surface.convert_alpha() if alpha else surface.convert()
+            if scale != 1:
+                surface = pygame.transform.scale(surface, (int(surface.get_width() * scale), int(surface.get_height() * scale)))
+            if cached:
+                self._write_cached(cached, surface)
+
+        if colorkey is not None:
+            surface.set_colorkey(colorkey)
+        return surface
+
+
+    def _cache_path(self, path: str, scale: float) -> str:
+        """ keyed by the file's path and mtime, the scale, and the display's pixel format """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        key = f"{path}|{mtime}|{scale}|{display_masks()}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".raw")
+
+
+    def _read_cached(self, cached: str) -> pygame.Surface:
+        try:
+            with open(cached, "rb") as f:
+                # copy-on-write - the surface can be drawn on without touching the file
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return None # not cached yet
+
+        width, height = HEADER.unpack_from(mapped)
+        pixels = memoryview(mapped)[HEADER.size:]
+        if len(pixels) != width * height * 4:
+            return None
+
+        # the surface reads the mapped file directly - pages are read in as they're touched
+        surface = pygame.image.frombuffer(pixels, (width, height), PIXEL_FORMAT)
+        if surface.get_masks() != display_masks():
+            surface = surface.convert_alpha()
+        self.disk_hits += 1
+        return surface
+
+
+    def _write_cached(self, cached: str, surface: pygame.Surface):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write then rename so a half written file is never read back
+            temp = f"{cached}.{threading.get_ident()}.tmp"
+            with open(temp, "wb") as f:
+                f.write(HEADER.pack(*surface.get_size()))
+                f.write(pygame.image.tobytes(surface, PIXEL_FORMAT))
+            os.replace(temp, cached)
+        except OSError as e:
+            logger.warning(f"could not cache {cached}: {e}")
+
+
+
+_display_masks = None
+
+def display_masks() -> tuple:
+    """ the channel masks convert_alpha() gives on this display """
+    global _display_masks
+    if _display_masks is None:
+        _display_masks = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha().get_masks()
+    return _display_masks
+
+
+
+###########################################
+_assets = None
+
+def assets() -> AssetManager:
+    """ the one AssetManager for the game """
+    global _assets
+    if _assets is None:
+        _assets = AssetManager()
+    return _assets
@@ -0,0 +1,267 @@
+import os
+import time
+import tempfile
+import threading
+
+import logging
+logger = logging.getLogger()
+
+import numpy as np
+import pygame
+
+from gamelib.text import text_cache
+
+
+PROFILER_FRAMES = 600 # frames kept - 10 seconds at 60 fps
+PROFILER_MAX_PHASES = 15 # columns in the ring buffer after the frame total
+HITCH_FACTOR = 2.5 # a frame longer than this many frame budgets is a hitch
+HITCH_DUMP_COOLDOWN_SECONDS = 10 # at most one hitch dump this often, so a stutter doesn't fill the disk
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), "arcade-profiles") # override with ARCADE_PROFILE_DIR
+
+GRAPH_SIZE = (360, 120)
+GRAPH_BACKGROUND = (0, 0, 0, 160)
+GRAPH_LINE = (120, 220, 120)
+GRAPH_BUDGET = (220, 200, 60)
+GRAPH_HITCH = (230, 70, 70)
+GRAPH_PERCENTILES = {50: (90, 160, 230), 95: (200, 130, 230), 99: (230, 120, 150)}
+GRAPH_TEXT = (230, 230, 230)
+OVERLAY_REFRESH_FRAMES = 15 # how often the overlay's percentiles are worked out again
+
+
+
+###########################################
+class Phase:
+    """ times one phase of the frame - made once per phase name, so `with profiler.phase("update"):` allocates nothing """
+
+    __slots__ = ("profiler", "column", "started")
+
+    def __init__(self, profiler: "FrameProfiler", column: int):
+        self.profiler = profiler
+        self.column = column
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.current[self.column] += time.perf_counter() - self.started
+        return False
+
+
+
+class FrameProfiler:
+    """
+    Where each frame's time went, for the last `frames` frames.
+
+    Call frame() once at the top of the game loop and wrap the phases in between:
+
+        profiler().frame()
+        with profiler().phase("events"):
+            ...
+        with profiler().phase("update"):
+            ...
+
+    A phase entered more than once in a frame (an update run several ticks by a FixedTimestep) adds up, and phases
+    can nest - "collisions" inside "update" is counted in both. The frame total is top of the loop to top of the
+    loop, so it includes the clock.tick() sleep.
+
+    Frames go into a preallocated NumPy ring buffer (milliseconds, one row per frame, column 0 the total) - nothing
+    is allocated per frame. A frame longer than `hitch_ms` is a hitch: the buffer is written to a CSV file (in a
+    thread, so the frame after a hitch isn't a hitch too), the hitching frame last. dump() does the same on demand.
+    draw() overlays a graph of the frame times with their p50 / p95 / p99.
+    """
+
+    def __init__(self, name: str = "game", frames: int = PROFILER_FRAMES, fps: float = None, hitch_ms: float = None,
+                 dump_dir: str = None):
+        self.name = name
+        self.fps = fps
+        self.budget_ms = 1000 / fps if fps else None
+        self.hitch_ms = hitch_ms if hitch_ms is not None else (HITCH_FACTOR * self.budget_ms if fps else None)
+        self.dump_dir = dump_dir or os.getenv("ARCADE_PROFILE_DIR", PROFILE_DIR)
+
+        self.ms = np.zeros((frames, PROFILER_MAX_PHASES + 1), dtype=np.float32)
+        self.index = 0 # the row the next frame goes in
+        self.count = 0 # rows filled
+        self.frames = 0
+
+        self.phase_names = []
+        self.phases = {} # name -> Phase
+        self.current = [0.0] * (PROFILER_MAX_PHASES + 1) # this frame's seconds per column (0 unused)
+        self.zeros = [0.0] * (PROFILER_MAX_PHASES + 1)
+        self.frame_started = None
+
+        self.hitches = 0
+        self.dumps = 0
+        self.last_hitch_dump = 0
+        self.last_dump_path = None
+
+        self.graph = None
+        self.overlay_lines = []
+        self.overlay_percentiles = {} # the frame total's
+        self.overlay_refreshed = None
+
+
+    def phase(self, name: str) -> Phase:
+        phase = self.phases.get(name)
+        if phase is None:
+            if len(self.phase_names) == PROFILER_MAX_PHASES:
+                raise ValueError(f"FrameProfiler keeps at most {PROFILER_MAX_PHASES} phases - '{name}' is one too many")
+            self.phase_names.append(name)
+            phase = Phase(self, len(self.phase_names))
+            self.phases[name] = phase
+        return phase
+
+
+    def frame(self):
+        """ end the last frame (recording it) and start the next one """
+        now = time.perf_counter()
+        if self.frame_started is not None:
+            current = self.current
+            current[0] = now - self.frame_started
+            row = self.ms[self.index]
+            row[:] = current
+            row *= 1000
+            current[:] = self.zeros
+
+            self.index = (self.index + 1) % len(self.ms)
+            self.count = min(self.count + 1, len(self.ms))
+            self.frames += 1
+
+            if self.hitch_ms is not None and row[0] > self.hitch_ms:
+                self.hitch(float(row[0]))
+        else:
+            # after a reset() - drop what a phase that was open across it added
+            self.current[:] = self.zeros
+        self.frame_started = now
+
+
+    def reset(self):
+        """
+        forget the time since the last frame() - call it after the loop blocks on purpose (building a level, switching
+        views) so the loading isn't recorded, or dumped, as a hitch. The frame it's called in isn't recorded.
+        """
+        self.frame_started = None
+        self.current[:] = self.zeros
+
+
+    def hitch(self, frame_ms: float):
+        self.hitches += 1
+        if time.time() - self.last_hitch_dump < HITCH_DUMP_COOLDOWN_SECONDS:
+            return
+        self.last_hitch_dump = time.time()
+        path = self.dump("hitch")
+        logger.warning(f"{self.name}: {frame_ms:.1f} ms frame (hitch over {self.hitch_ms:.1f} ms) - last {self.count} frames in {path}")
+
+
+    def recorded(self) -> np.ndarray:
+        """ a copy of the recorded frames, oldest first - [frame, column] in ms """
+        columns = len(self.phase_names) + 1
+        if self.count < len(self.ms):
+            return self.ms[:self.count, :columns].copy()
+        return np.roll(self.ms[:, :columns], -self.index, axis=0)
+
+
+    def dump(self, reason: str = "manual") -> str:
+        """ write the recorded frames to a CSV file (in a thread) - returns its path """
+        frames = self.recorded()
+        path = os.path.join(self.dump_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{self.dumps}-{reason}.csv")
+        header = (f"{self.name} frame profile ({reason}), {len(frames)} frames, fps {self.fps}, times in ms\n"
+                  + ",".join(["frame"] + self.phase_names))
+        self.dumps += 1
+        self.last_dump_path = path
+        threading.Thread(target=self._write, args=(path, frames, header), daemon=True).start()
+        return path
+
+
+    def _write(self, path: str, frames: np.ndarray, header: str):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.savetxt(path, frames, fmt="%.3f", delimiter=",", header=header)
+        except OSError as e:
+            logger.error(f"Could not write frame profile {path}: {e}")
+
+
+    def percentiles(self, percentiles=(50, 95, 99)) -> dict:
+        """ {"frame": {50: ms, ...}, phase: {...}} over the recorded frames """
+        if self.count == 0:
+            return {}
+        columns = len(self.phase_names) + 1
+        values = np.percentile(self.ms[:self.count, :columns], percentiles, axis=0)
+        return {name: dict(zip(percentiles, values[:, column].tolist()))
+                for column, name in enumerate(["frame"] + self.phase_names)}
+
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "hitches": self.hitches,
+            "dumps": self.dumps,
+            "last_dump": self.last_dump_path,
+            "ms": self.percentiles(),
+        }
+
+
+
+    ###########################################
+    # overlay
+    ###########################################
+    def draw(self, surface: pygame.Surface, position=(10, 10)):
+        """ the frame time graph and each phase's p50 / p95 / p99 - call it last thing in the view's draw() """
+        if self.count == 0:
+            return
+
+        if self.graph is None:
+            self.graph = pygame.Surface(GRAPH_SIZE, pygame.SRCALPHA)
+        graph = self.graph
+        width, height = GRAPH_SIZE
+        if self.overlay_refreshed is None or self.frames - self.overlay_refreshed >= OVERLAY_REFRESH_FRAMES:
+            self.overlay_refreshed = self.frames
+            percentiles = self.percentiles()
+            self.overlay_percentiles = percentiles["frame"]
+            self.overlay_lines = [f"{name}: {ms[50]:.1f} / {ms[95]:.1f} / {ms[99]:.1f} ms"
+                                  for name, ms in percentiles.items()]
+            self.overlay_lines[0] = f"{self.overlay_lines[0]}  (p50 / p95 / p99, {self.hitches} hitches)"
+
+        # the graph's top is twice the budget (or the slowest frame, without one)
+        frames = self.recorded()[:, 0]
+        top = 2 * self.budget_ms if self.budget_ms else max(float(frames.max()), 1)
+        graph.fill(GRAPH_BACKGROUND)
+        if self.budget_ms:
+            y = height - height * self.budget_ms / top
+            pygame.draw.line(graph, GRAPH_BUDGET, (0, y), (width, y))
+        # short ticks on the right for the percentiles
+        for percentile, ms in self.overlay_percentiles.items():
+            y = height - 1 - min(ms / top, 1) * (height - 1)
+            pygame.draw.line(graph, GRAPH_PERCENTILES[percentile], (width - 24, y), (width, y), 2)
+        if len(frames) > 1:
+            xs = np.linspace(0, width - 1, len(self.ms))[-len(frames):]
+            ys = height - 1 - np.minimum(frames / top, 1) * (height - 1)
+            pygame.draw.lines(graph, GRAPH_LINE, False, np.column_stack((xs, ys)).tolist())
+        if self.hitch_ms is not None and frames[-1] > self.hitch_ms:
+            pygame.draw.rect(graph, GRAPH_HITCH, graph.get_rect(), 2)
+        surface.blit(graph, position)
+
+        x, y = position[0], position[1] + height + 4
+        for line in self.overlay_lines:
+            text = text_cache().render(line, None, 20, GRAPH_TEXT)
+            surface.blit(text, (x, y))
+            y += text.get_height()
+
+
+
+_profiler = None
+
+def profiler() -> FrameProfiler:
+    """ this process's FrameProfiler - configure_profiler() first to name it and give it a frame budget """
+    global _profiler
+    if _profiler is None:
+        _profiler = FrameProfiler()
+    return _profiler
+
+
+def configure_profiler(name: str, fps: float = None, **kwargs) -> FrameProfiler:
+    """ set up this process's FrameProfiler (the launcher, or a game) - call before the game loop starts """
+    global _profiler
+    _profiler = FrameProfiler(name, fps=fps, **kwargs)
+    return _profiler
@@ -0,0 +1,182 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pygame
+import qrcode
+
+from gamelib.text import surface_bytes
+
+
+QR_CACHE_BYTES = 4 * 1024 * 1024 # finished QR codes kept around (a 250x250 one is 250 KB), least recently used out first
+QR_WORKERS = 1 # threads making QR codes - one keeps them from competing with the game loop for the GIL
+QR_BORDER = 2 # quiet zone, in modules
+QR_DARK = (0, 0, 0)
+QR_LIGHT = (255, 255, 255)
+
+
+###########################################
+def qr_matrix(payload: str) -> np.ndarray:
+    """ the QR code of `payload` as a square bool array (True = dark), quiet zone included """
+    qr = qrcode.QRCode(border=QR_BORDER)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return np.array(qr.get_matrix(), dtype=bool)
+
+
+def render_qr(payload: str, size: int) -> pygame.Surface:
+    """
+    The QR code of `payload` as a size x size surface - the matrix is written straight into the surface's pixels,
+    each module a whole number of pixels wide (centered, with light left over round the edge) so it scans cleanly.
+
+    Slow for long payloads (a Lightning invoice or a Cashu token) - QRCache runs it in a worker thread.
+    """
+    matrix = qr_matrix(payload)
+    modules = len(matrix)
+    scale = size // modules
+    if scale >= 1:
+        pixels = np.repeat(np.repeat(matrix, scale, axis=0), scale, axis=1)
+    else:
+        # smaller than one pixel per module - nearest neighbour, it won't scan but it won't crash either
+        index = np.arange(size) * modules // size
+        pixels = matrix[index][:, index]
+
+    rgb = np.empty(pixels.shape + (3,), dtype=np.uint8)
+    rgb[pixels] = QR_DARK
+    rgb[~pixels] = QR_LIGHT
+
+    surface = pygame.Surface((size, size))
+    surface.fill(QR_LIGHT)
+    offset = (size - len(pixels)) // 2
+    # surfarray is indexed [x][y] - the matrix is [row][column]
+    pygame.surfarray.blit_array(surface.subsurface((offset, offset, len(pixels), len(pixels))), rgb.transpose(1, 0, 2))
+    return surface
+
+
+
+###########################################
+class QRCache:
+    """
+    QR code surfaces made in a worker thread, kept least recently used first once they take up more than `budget`
+    bytes. Keyed by (payload, size). The surfaces are shared, so don't draw onto them.
+
+    From a game loop, either poll - get() returns None until the QR code is ready - or await surface() in a task.
+    Asking again for one that's still being made waits on the same work.
+    """
+
+    def __init__(self, budget: int = QR_CACHE_BYTES, workers: int = QR_WORKERS):
+        self.budget = budget
+        self.surfaces = OrderedDict()
+        self.bytes = 0
+        self.pending = {} # (payload, size) -> Future
+        self.lock = threading.Lock() # the workers store what they made
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qr")
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_seconds = 0
+
+
+    def request(self, payload: str, size: int = 250) -> Future:
+        """ a Future for the surface - already done if it was cached """
+        key = (payload, size)
+        with self.lock:
+            surface = self.surfaces.get(key)
+            if surface is not None:
+                self.hits += 1
+                self.surfaces.move_to_end(key)
+                future = Future()
+                future.set_result(surface)
+                return future
+
+            future = self.pending.get(key)
+            if future is None:
+                self.misses += 1
+                future = self.executor.submit(self._make, key)
+                self.pending[key] = future
+            return future
+
+
+    def get(self, payload: str, size: int = 250):
+        """ the surface if it's ready, else None (and it's on its way) - never waits """
+        future = self.request(payload, size)
+        return future.result() if future.done() else None
+
+
+    async def surface(self, payload: str, size: int = 250) -> pygame.Surface:
+        """ the surface, made without holding up the event loop """
+        return await asyncio.wrap_future(self.request(payload, size))
+
+
+    def render(self, payload: str, size: int = 250) -> pygame.Surface:
+        """ the surface, waiting for it here - for code that's already off the game loop (a worker thread) """
+        return self.request(payload, size).result()
+
+
+    def _make(self, key) -> pygame.Surface:
+        started = time.perf_counter()
+        try:
+            surface = render_qr(*key)
+        except Exception:
+            with self.lock:
+                self.pending.pop(key, None)
+            raise
+        with self.lock:
+            self.pending.pop(key, None) # in the same breath as caching it, so nobody asks in between and makes it again
+            self.render_seconds += time.perf_counter() - started
+            size = surface_bytes(surface)
+            if size <= self.budget:
+                self.surfaces[key] = surface
+                self.bytes += size
+                while self.bytes > self.budget:
+                    _, evicted = self.surfaces.popitem(last=False)
+                    self.bytes -= surface_bytes(evicted)
+                    self.evictions += 1
+        return surface
+
+
+    def clear(self):
+        with self.lock:
+            self.surfaces.clear()
+            self.bytes = 0
+
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_seconds = 0
+
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.surfaces),
+            "bytes": self.bytes,
+            "budget": self.budget,
+            "pending": len(self.pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+            "render_seconds": self.render_seconds,
+        }
+
+
+_qr_cache = None
+
+def qr_cache() -> QRCache:
+    """ the one QRCache for the process """
+    global _qr_cache
+    if _qr_cache is None:
+        _qr_cache = QRCache()
+    return _qr_cache
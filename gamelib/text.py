@@ -1,9 +1,121 @@
+from collections import OrderedDict
+
 import pygame
 
 from gamelib.globals import *
 
 
-def text(surface: pygame.Surface, text, position, font_size=36, color=(255, 255, 255), center=False, font_name='Arial'):
+TEXT_CACHE_BYTES = 8 * 1024 * 1024 # rendered text kept around, before the least recently used is thrown out
+
+
+###########################################
+_fonts = {}
+
+def get_font(name: str = None, size: int = 36, bold: bool = False) -> pygame.font.Font:
+    """ SysFont is slow (it searches the system fonts) - load each (name, size, bold) once
+
+        name=None is pygame's default font, like SysFont(None, size)
+    """
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size, bold=bold)
+        _fonts[key] = font
+    return font
+
+
+
+###########################################
+class TextCache:
+    """
+    Rendered text surfaces, least recently used thrown out first once they take up more than `budget` bytes.
+
+    Keyed by (string, font, color, antialias) - text that doesn't change from frame to frame (labels, menus, a score
+    that hasn't moved) is rendered once. The surfaces are shared, so don't draw onto them.
+    """
+
+    def __init__(self, budget: int = TEXT_CACHE_BYTES):
+        self.budget = budget
+        self.surfaces = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def render(self, string: str, font_name: str = None, font_size: int = 36, color=(255, 255, 255), antialias: bool = True, bold: bool = False) -> pygame.Surface:
+        color = tuple(pygame.Color(color))
+        key = (string, font_name, font_size, bold, color, antialias)
+
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = get_font(font_name, font_size, bold).render(string, antialias, color)
+        size = surface_bytes(surface)
+        if size > self.budget:
+            return surface # too big to keep
+
+        self.surfaces[key] = surface
+        self.bytes += size
+        while self.bytes > self.budget:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.bytes -= surface_bytes(evicted)
+            self.evictions += 1
+
+        return surface
+
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes = 0
+
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.surfaces),
+            "bytes": self.bytes,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+
+def surface_bytes(surface: pygame.Surface) -> int:
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+_text_cache = None
+
+def text_cache() -> TextCache:
+    """ the one TextCache shared by the launcher and games """
+    global _text_cache
+    if _text_cache is None:
+        _text_cache = TextCache()
+    return _text_cache
+
+
+
+###########################################
+def text(surface: pygame.Surface, text, position, font_size=36, color=(255, 255, 255), center=False, font_name='Arial', bold=False):
     """
     A helper function to draw text on a Pygame surface.
 
@@ -13,13 +125,11 @@ def text(surface: pygame.Surface, text, position, font_size=36, color=(255, 255,
     :param font_name: The name of the font to use
     :param font_size: The size of the font
     :param color: The color of the text
+    :param bold: Bold text
     """
-    font = pygame.font.SysFont(font_name, font_size)
-    text_surface = font.render(text, True, color)
+    text_surface = text_cache().render(str(text), font_name, font_size, color, True, bold)
     if center:
         text_rect = text_surface.get_rect(center=position)
         surface.blit(text_surface, text_rect)
     else:
         surface.blit(text_surface, position)
-
-#TODO can I do bold please?
@@ -0,0 +1,64 @@
+import time
+
+
+class FixedTimestep:
+    """
+    Fixed-timestep accumulator - decouples how often a view simulates from how often it is drawn.
+
+    Each rendered frame, advance() adds the real time that passed and says how many whole ticks of 1 / tick_rate
+    seconds to simulate. What's left over is `alpha` - how far (0 to 1) the frame is between the last tick and the
+    next one - so draw() can interpolate instead of snapping to tick positions.
+
+    If a frame took so long that more than max_steps ticks are due, only max_steps are run and the rest of the time
+    is dropped (the game slows down rather than spiralling into ever longer frames).
+
+    A View opts in by setting `self.timestep = FixedTimestep(...)` - see gamelib.viewstate.ViewManager.update()
+    """
+
+    def __init__(self, tick_rate: float = 60, max_steps: int = 5):
+        self.tick_rate = tick_rate
+        self.dt = 1 / tick_rate
+        self.max_steps = max_steps
+
+        self.accumulator = 0
+        self.last_time = None
+        self.alpha = 1
+
+        self.ticks = 0
+        self.dropped_time = 0
+
+
+    def reset(self):
+        """ forget the time since the last frame (call when the view is switched to) """
+        self.accumulator = 0
+        self.last_time = None
+        self.alpha = 1
+
+
+    def advance(self, now: float = None) -> int:
+        """ how many ticks to simulate for this frame """
+        now = time.perf_counter() if now is None else now
+
+        if self.last_time is None:
+            # first frame after a reset - simulate one tick so there is something to draw
+            self.last_time = now
+            self.accumulator = 0
+            self.alpha = 1
+            self.ticks += 1
+            return 1
+
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        steps = int(self.accumulator // self.dt)
+        if steps > self.max_steps:
+            self.dropped_time += (steps - self.max_steps) * self.dt
+            steps = self.max_steps
+
+        self.accumulator -= steps * self.dt
+        # anything still owed after dropping is carried into the next frame, but never more than one tick's worth
+        self.accumulator = min(self.accumulator, self.dt)
+        self.alpha = min(1, self.accumulator / self.dt)
+
+        self.ticks += steps
+        return steps
@@ -1,4 +1,15 @@
+from gamelib.profiler import profiler
+
+
 class View:
+    # set to a gamelib.timestep.FixedTimestep to have update() called at a fixed tick rate instead of once per frame
+    # draw() can then use self.timestep.alpha to interpolate between the last two ticks
+    timestep = None
+
+    # set by draw() to the list of rects it changed, for an app loop that only updates those parts of the display
+    # None means "assume everything changed" - an empty list means nothing did
+    dirty_rects = None
+
     def __init__(self):
         pass
 
@@ -27,12 +38,25 @@ class ViewManager:
     def run_view(self, name):
         self.current_state = self.states[name]
         self.states[name].setup()
+        if self.states[name].timestep is not None:
+            self.states[name].timestep.reset()
+        # setting the view up was loading, not a slow frame
+        profiler().reset()
 
     def handle_event(self, event):
         self.current_state.handle_event(event)
 
     def update(self):
-        self.current_state.update()
+        view = self.current_state
+        if view.timestep is None:
+            view.update()
+            return
+
+        for _ in range(view.timestep.advance()):
+            view.update()
+            # the view switched to another one partway through - that one starts fresh next frame
+            if self.current_state is not view:
+                break
 
     # def draw(self, screen):
     #     self.current_state.draw(screen)
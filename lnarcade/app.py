@@ -1,3 +1,4 @@
+import os
 import platform
 import threading
 import subprocess
@@ -10,7 +11,9 @@ import pygame
 
 from gamelib.singleton import Singleton
 from gamelib.logger import setup_logging
-from lnarcade.config import MY_DIR, DOT_ENV_PATH, create_default_dot_env, FPS
+from gamelib.profiler import configure_profiler, profiler
+from lnarcade.config import MY_DIR, DOT_ENV_PATH, create_default_dot_env, FPS, WALLET_DAEMON
+from lnarcade.backend.metrics import metrics
 
 APP_SCREEN: pygame.Surface = None
 SCREEN_HEIGHT = None
@@ -19,7 +22,6 @@ SCREEN_WIDTH = None
 
 class App(Singleton):
     screen = None
-    process: subprocess.Popen = None
 
 
     @classmethod
@@ -82,9 +84,11 @@ class App(Singleton):
         pygame.display.set_caption("Lightning Arcade")
         pygame.mouse.set_visible(False)
 
-        app.process = None
+        from lnarcade.utilities.supervisor import GameSupervisor
+        app.supervisor = GameSupervisor()
 
         app.clock = pygame.time.Clock()
+        configure_profiler("launcher", fps=FPS)
 
         from lnarcade.view import ViewStateManager
         app.manager = ViewStateManager()
@@ -105,6 +109,8 @@ class App(Singleton):
         else:
             app.controlmanager = None
 
+        app.walletd = None
+
         from lnarcade.backend.server import ArcadeServerPage
         app.backend = ArcadeServerPage( DOT_ENV_PATH )
         app.backend_thread = threading.Thread(target=app.backend.start_server)
@@ -117,6 +123,9 @@ class App(Singleton):
         logger.debug("App.get_instance().start()")
 
         self.backend_thread.start()
+        if os.getenv("WALLET_DAEMON", str(WALLET_DAEMON)).lower() == "true":
+            from lnarcade.utilities.walletd import WalletDaemon
+            self.walletd = WalletDaemon()
         if self.controlmanager is not None:
             self.control_thread.start()
         else:
@@ -129,18 +138,29 @@ class App(Singleton):
         try:
             running = True
             while running:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running = False
-                    if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                        running = False
-                    self.manager.handle_event(event)
-
-                self.manager.update()
-                self.manager.draw()
-
-                pygame.display.flip()
-                self.clock.tick(FPS)
+                profiler().frame()
+                with profiler().phase("events"):
+                    for event in pygame.event.get():
+                        if event.type == pygame.QUIT:
+                            running = False
+                        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                            running = False
+                        self.manager.handle_event(event)
+
+                with profiler().phase("update"):
+                    self.manager.update()
+                with profiler().phase("draw"):
+                    self.manager.draw()
+
+                with profiler().phase("flip"):
+                    dirty_rects = self.manager.current_state.dirty_rects
+                    if dirty_rects is None:
+                        pygame.display.flip()
+                    elif dirty_rects:
+                        pygame.display.update(dirty_rects)
+                with profiler().phase("tick"):
+                    self.clock.tick(FPS)
+                metrics().frame(self.clock.get_time(), self.clock.get_rawtime())
 
         except KeyboardInterrupt:
             logger.warning("KeyboardInterrupt")
@@ -154,13 +174,18 @@ class App(Singleton):
         self.stop()
 
 
+    @property
+    def process(self) -> subprocess.Popen:
+        """The running game, if there is one."""
+        return self.supervisor.process
+
+
     def kill_running_process(self):
-        if self.process is None:
+        if not self.supervisor.running:
             logger.warning("No process to kill")
             return
 
-        self.process.terminate()
-        self.process = None
+        self.supervisor.stop()
 
 
     # def get_ip_addr(self):
@@ -170,14 +195,19 @@ class App(Singleton):
     # def stop(self, force: bool = False):
     def stop(self):
         logger.debug("App.get_instance().stop(): quitting pygame and joining threads...")
+        from lnarcade.utilities.thumbnails import thumbnail_loader
+        thumbnail_loader().shutdown()
+        self.supervisor.close()
+        if self.walletd is not None:
+            self.walletd.close()
         pygame.quit()
         if self.controlmanager is not None:
+            self.controlmanager.stop()
             self.control_thread.join(0.1)
-            # self.controlmanager.stop() # TODO stop or join:
 
         if self.backend_thread is not None:
+            self.backend.stop()
             self.backend_thread.join(0.1)
-            # self.backend.stop() # TODO stop or join:
 
         logger.debug("App.get_instance().stop() - DONE - END")
         exit(0)
@@ -0,0 +1,174 @@
+"""
+What the launcher counts for the backend's /metrics page (lnarcade.backend.server).
+
+Recording has to be cheap enough for the render loop: a frame is two deque appends, a launch or an exit a few
+counter bumps (from the supervisor's threads). Everything that costs anything - percentiles, formatting - happens
+when the page is asked for, on the backend's thread.
+
+Formatted in the Prometheus text format:
+
+    # TYPE arcade_game_launches_total counter
+    arcade_game_launches_total{game="Fishy Frens"} 3
+"""
+
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+
+# frames kept for the FPS and frame time numbers - a minute at the launcher's 10 fps
+FRAME_WINDOW = 600
+
+# how long a game takes to start (Popen, or a fork from the zygote)
+LAUNCH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+class Histogram:
+    """Prometheus-style: a count per upper bound (cumulative when formatted), the sum and the count"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # the last one is +Inf
+        self.sum = 0
+        self.count = 0
+
+
+    def observe(self, value: float):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+    def cumulative(self) -> list:
+        """[(le, count)] - le is a string, "+Inf" last"""
+        total = 0
+        result = []
+        for le, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            result.append((str(le), total))
+        return result
+
+
+
+class LauncherMetrics:
+    def __init__(self):
+        self.started = time.time()
+
+        self.frame_seconds = deque(maxlen=FRAME_WINDOW) # frame to frame, sleeping included
+        self.frame_work_seconds = deque(maxlen=FRAME_WINDOW) # the frame's own work, without the sleep
+
+        self.launch_seconds = Histogram(LAUNCH_BUCKETS)
+        self.launches = Counter() # game -> launches
+        self.forked = Counter() # game -> launches forked from the zygote
+        self.play_seconds = Counter() # game -> seconds
+        self.exits = Counter() # (game, "ok" | "error" | "timeout") -> exits
+
+
+    def frame(self, frame_ms: int, work_ms: int):
+        """ one rendered frame - pygame.time.Clock's get_time() and get_rawtime() """
+        self.frame_seconds.append(frame_ms / 1000)
+        self.frame_work_seconds.append(work_ms / 1000)
+
+
+    def game_launched(self, run):
+        self.launches[run.name] += 1
+        if run.forked:
+            self.forked[run.name] += 1
+        if run.launch_seconds is not None:
+            self.launch_seconds.observe(run.launch_seconds)
+
+
+    def game_exited(self, run):
+        self.play_seconds[run.name] += run.wall_seconds or 0
+        outcome = "timeout" if run.timed_out else "ok" if run.exit_code == 0 else "error"
+        self.exits[(run.name, outcome)] += 1
+
+
+    def fps(self) -> float:
+        frames = list(self.frame_seconds)
+        return len(frames) / sum(frames) if frames and sum(frames) else 0
+
+
+    def frame_work_quantiles(self, quantiles=(0.5, 0.95, 0.99)) -> dict:
+        frames = list(self.frame_work_seconds)
+        if not frames:
+            return {}
+        return dict(zip(quantiles, np.quantile(frames, quantiles)))
+
+
+
+_metrics = None
+
+def metrics() -> LauncherMetrics:
+    """The launcher's one LauncherMetrics"""
+    global _metrics
+    if _metrics is None:
+        _metrics = LauncherMetrics()
+    return _metrics
+
+
+
+###########################################
+# Prometheus text format
+###########################################
+def label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def labels(**kwargs) -> str:
+    if not kwargs:
+        return ""
+    return "{" + ",".join(f'{key}="{label_value(value)}"' for key, value in kwargs.items()) + "}"
+
+
+class Exposition:
+    """Builds a /metrics page - one metric (HELP, TYPE and its samples) at a time"""
+
+    def __init__(self):
+        self.lines = []
+        self.described = set()
+
+
+    def describe(self, name: str, kind: str, help: str):
+        """ HELP and TYPE - once per metric, however many times its samples are added """
+        if name in self.described:
+            return
+        self.described.add(name)
+        self.lines.append(f"# HELP {name} {help}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+
+    def metric(self, name: str, kind: str, help: str, samples):
+        """ samples: [(labels dict, value)] or a bare value """
+        if not isinstance(samples, (list, tuple)):
+            samples = [({}, samples)]
+        self.describe(name, kind, help)
+        for sample_labels, value in samples:
+            self.lines.append(f"{name}{labels(**sample_labels)} {number(value)}")
+
+
+    def histogram(self, name: str, help: str, buckets: list, total: float, count: int, **sample_labels):
+        """ buckets: [(le, cumulative count)] - call it again with other labels for more of the same histogram """
+        self.describe(name, "histogram", help)
+        for le, cumulative in buckets:
+            self.lines.append(f"{name}_bucket{labels(**sample_labels, le=le)} {cumulative}")
+        self.lines.append(f"{name}_sum{labels(**sample_labels)} {number(total)}")
+        self.lines.append(f"{name}_count{labels(**sample_labels)} {count}")
+
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def number(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
@@ -1,31 +1,354 @@
 """
-Backend server for arcade monitoring and admin control.
+Backend server for arcade monitoring and admin control - a small asyncio HTTP server on its own thread, so nothing
+it does holds up the launcher's render loop.
 
-TODO: Implement using Streamlit or Flask for:
-- Game statistics and monitoring
-- Credit/coin management
-- Remote configuration
-- System health monitoring
+    GET  /metrics               Prometheus text format - launcher FPS and frame times, game launches, launch
+                                latency, play time and exits per game, the text cache, and (from the wallet daemon)
+                                payments received, payouts and their latency, and the prize token reserve
+    GET  /api/status            JSON - free play, the installed games, what's running, the last few runs
+    POST /api/games/reload      JSON - forget the manifest index and re-read every game's manifest
+    POST /api/free_play         JSON - {"enabled": true/false}, or no body to toggle. Saved to config.env too
+    POST /api/profile           JSON - write the launcher's last frames (gamelib.profiler) to a CSV file
+
+POSTs need "Authorization: Bearer <ADMIN_TOKEN>" when ADMIN_TOKEN is set in config.env - without one they're only
+answered for requests from the cabinet itself.
+
+The numbers come from lnarcade.backend.metrics, which the render loop and the supervisor's threads only append to;
+everything the launcher's main thread has to do itself (re-reading manifests) is handed to it as a pygame event.
 """
 
+import os
+import json
+import asyncio
+import ipaddress
+from collections import Counter
+from concurrent.futures import Future
+
 import logging
 logger = logging.getLogger()
 
+import dotenv
+import pygame
+
+from lnarcade.config import BACKEND_HOST, BACKEND_PORT
+from lnarcade.backend.metrics import Exposition, metrics
+from gamelib.profiler import profiler
+
+
+# posted (with a `reply` Future for the number of games) for the game menu to re-read every manifest
+RELOAD_GAMES = pygame.event.custom_type()
+
+REQUEST_TIMEOUT_SECONDS = 5
+MAX_BODY_BYTES = 64 * 1024
+# how long /metrics waits on the wallet daemon before leaving its numbers out
+WALLET_TIMEOUT_SECONDS = 1
+# how long a reload waits for the launcher's main thread to get to it
+RELOAD_TIMEOUT_SECONDS = 5
+RECENT_RUNS = 10
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+               503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str = None):
+        super().__init__(message or STATUS_TEXT.get(status, ""))
+        self.status = status
+
+
+def free_play() -> bool:
+    return os.getenv("FREE_PLAY", "True").lower() == "true"
+
 
 class ArcadeServerPage:
-    """Placeholder backend server class."""
-    
-    def __init__(self, env_path: str):
+    def __init__(self, env_path: str, host: str = None, port: int = None):
         self.env_path = env_path
+        self.host = host or os.getenv("BACKEND_HOST", BACKEND_HOST)
+        self.port = int(port or os.getenv("BACKEND_PORT", BACKEND_PORT))
+        self.admin_token = os.getenv("ADMIN_TOKEN") or None
+        self.loop = None
+        self.stopping = None
+        self.wallet = None # arcade_wallet_client.WalletClient, connected when /metrics first needs it
+        self.requests = Counter() # (method, path, status)
         logger.debug(f"ArcadeServerPage initialized with env_path: {env_path}")
-    
+
+
     def start_server(self):
-        """Start the backend server (not implemented)."""
-        logger.info("Backend server thread started (no-op)")
-        # TODO: Implement actual server
-        pass
-    
+        """Serve until stop() - runs on the backend thread."""
+        try:
+            asyncio.run(self.serve())
+        except OSError as e:
+            logger.error(f"Backend server couldn't listen on {self.host}:{self.port}: {e}")
+
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        logger.info(f"Backend server on http://{self.host}:{self.port} (/metrics, /api/status)")
+        async with server:
+            await self.stopping.wait()
+        if self.wallet is not None:
+            self.wallet.close()
+
+
     def stop(self):
-        """Stop the backend server (not implemented)."""
-        logger.info("Backend server stopping (no-op)")
-        pass
+        """Stop serving - from any thread."""
+        logger.info("Backend server stopping")
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+
+
+
+    ###########################################
+    # HTTP
+    ###########################################
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One request per connection"""
+        method, path = "-", "-"
+        try:
+            method, path, headers, body = await asyncio.wait_for(read_request(reader), REQUEST_TIMEOUT_SECONDS)
+            status, content_type, payload = await self.route(method, path, headers, body, writer.get_extra_info("peername"))
+        except HTTPError as e:
+            status, content_type, payload = e.status, "application/json", json.dumps({"error": str(e)})
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            logger.exception(f"Backend server: {method} {path} failed")
+            status, content_type, payload = 500, "application/json", json.dumps({"error": str(e)})
+
+        self.requests[(method, path, status)] += 1
+        data = payload.encode()
+        writer.write((f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                      f"Content-Type: {content_type}\r\n"
+                      f"Content-Length: {len(data)}\r\n"
+                      f"Connection: close\r\n\r\n").encode("latin-1") + data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+
+    async def route(self, method: str, path: str, headers: dict, body: bytes, peer) -> tuple:
+        """(status, content type, payload)"""
+        routes = {
+            "/metrics": ("GET", self.metrics_page),
+            "/api/status": ("GET", self.status),
+            "/api/games/reload": ("POST", self.reload_games),
+            "/api/free_play": ("POST", self.set_free_play),
+            "/api/profile": ("POST", self.dump_profile),
+        }
+        if path not in routes:
+            raise HTTPError(404)
+        allowed, handler = routes[path]
+        if method != allowed:
+            raise HTTPError(405, f"{path} takes {allowed}")
+
+        if method == "POST":
+            self.authorize(headers, peer)
+            try:
+                body = json.loads(body) if body.strip() else {}
+            except ValueError:
+                raise HTTPError(400, "body isn't JSON")
+            result = await handler(body)
+        else:
+            result = await handler()
+
+        if isinstance(result, str):
+            return 200, "text/plain; version=0.0.4; charset=utf-8", result
+        return 200, "application/json", json.dumps(result)
+
+
+    def authorize(self, headers: dict, peer):
+        if self.admin_token is not None:
+            if headers.get("authorization") != f"Bearer {self.admin_token}":
+                raise HTTPError(401, "needs Authorization: Bearer <ADMIN_TOKEN>")
+            return
+        try:
+            local = ipaddress.ip_address(peer[0]).is_loopback
+        except (TypeError, ValueError, IndexError):
+            local = False
+        if not local:
+            raise HTTPError(403, "set ADMIN_TOKEN in config.env to use the admin API from another machine")
+
+
+
+    ###########################################
+    # the pages
+    ###########################################
+    async def metrics_page(self) -> str:
+        from lnarcade.app import App
+        from lnarcade.utilities.manifest_index import manifest_index
+        from gamelib.text import text_cache
+
+        m = metrics()
+        page = Exposition()
+
+        page.metric("arcade_launcher_start_time_seconds", "gauge", "When the launcher started (unix time)", m.started)
+        page.metric("arcade_launcher_fps", "gauge", "Launcher frames per second over the last minute", m.fps())
+        page.metric("arcade_launcher_frame_work_seconds", "gauge",
+                    "Launcher frame time without the sleep, by quantile over the last minute",
+                    [({"quantile": q}, seconds) for q, seconds in m.frame_work_quantiles().items()])
+        profile = profiler().stats()
+        page.metric("arcade_launcher_phase_seconds", "gauge",
+                    "Launcher time per frame in each phase (frame is the whole frame), by quantile over the last minute",
+                    [({"phase": phase, "quantile": percentile / 100}, ms / 1000)
+                     for phase, quantiles in profile["ms"].items() for percentile, ms in quantiles.items()])
+        page.metric("arcade_launcher_hitches_total", "counter", "Launcher frames over the hitch threshold",
+                    profile["hitches"])
+        page.metric("arcade_free_play", "gauge", "1 if games are free to play", free_play())
+
+        current = App.get_instance().supervisor.current
+        page.metric("arcade_game_running", "gauge", "1 while a game is running (/api/status says which)",
+                    current is not None)
+        page.histogram("arcade_game_launch_seconds", "Time to start a game's process (or fork it from the zygote)",
+                       m.launch_seconds.cumulative(), m.launch_seconds.sum, m.launch_seconds.count)
+        page.metric("arcade_game_launches_total", "counter", "Games launched",
+                    [({"game": game}, n) for game, n in m.launches.items()])
+        page.metric("arcade_game_forked_launches_total", "counter", "Games forked from the zygote",
+                    [({"game": game}, n) for game, n in m.forked.items()])
+        page.metric("arcade_game_play_seconds_total", "counter", "Time spent in each game",
+                    [({"game": game}, seconds) for game, seconds in m.play_seconds.items()])
+        page.metric("arcade_game_exits_total", "counter", "Games that exited - ok, error (crashed) or timeout (watchdog)",
+                    [({"game": game, "outcome": outcome}, n) for (game, outcome), n in m.exits.items()])
+
+        index = manifest_index()
+        page.metric("arcade_games_installed", "gauge", "Games with a manifest", len(index.manifests))
+        page.metric("arcade_manifest_scans_total", "counter", "Game directory scans", index.scans)
+        page.metric("arcade_manifests_parsed_total", "counter", "Manifests parsed (not read from the index)", index.parsed)
+
+        cache = text_cache().stats()
+        page.metric("arcade_text_cache_hits_total", "counter", "Text renders served from the cache", cache["hits"])
+        page.metric("arcade_text_cache_misses_total", "counter", "Text renders that had to be rendered", cache["misses"])
+        page.metric("arcade_text_cache_bytes", "gauge", "Bytes of rendered text kept", cache["bytes"])
+
+        walletd = getattr(App.get_instance(), "walletd", None)
+        if walletd is not None:
+            page.metric("arcade_wallet_restarts_total", "counter", "Times the launcher started the wallet daemon again",
+                        walletd.restarts)
+        self.wallet_metrics(page, await self.wallet_status())
+        return page.text()
+
+
+    def wallet_metrics(self, page: Exposition, status: dict):
+        page.metric("arcade_wallet_up", "gauge", "1 if the wallet daemon answered", status is not None)
+        if status is None:
+            return
+
+        payments = status["payments"]
+        page.metric("arcade_payments_received_total", "counter", "Paid invoices minted", payments["received"])
+        page.metric("arcade_payment_sats_received_total", "counter", "Sats minted from paid invoices",
+                    payments["sats_received"])
+        page.metric("arcade_payouts_total", "counter", "Winnings paid out - as a token or over Lightning",
+                    [({"kind": kind}, n) for kind, n in payments["payouts"].items()])
+        page.metric("arcade_payout_sats_total", "counter", "Sats paid out",
+                    [({"kind": kind}, n) for kind, n in payments["sats_paid_out"].items()])
+        for kind, histogram in payments["payout_seconds"].items():
+            cumulative, total = [], 0
+            for le, count in zip(histogram["buckets"] + ["+Inf"], histogram["counts"]):
+                total += count
+                cumulative.append((str(le), total))
+            page.histogram("arcade_payout_seconds", "How long a winner waited for their payout", cumulative,
+                           histogram["sum"], total, kind=kind)
+
+        reserve = status["payout_reserve"]
+        page.metric("arcade_payout_reserve_ready", "gauge", "Prize tokens ready, by amount",
+                    [({"sats": amount}, n) for amount, n in reserve["ready"].items()])
+        page.metric("arcade_payout_reserve_unclaimed", "gauge", "Prize tokens handed out but not claimed yet",
+                    reserve["unclaimed"])
+        page.metric("arcade_payout_reserve_unclaimed_sats", "gauge", "Sats in unclaimed prize tokens",
+                    reserve["unclaimed_sats"])
+
+
+    async def wallet_status(self):
+        """The wallet daemon's status - None if it isn't answering"""
+        from arcade_wallet_client import WalletClient, WalletError
+
+        try:
+            if self.wallet is None:
+                self.wallet = await asyncio.wait_for(WalletClient.connect(), WALLET_TIMEOUT_SECONDS)
+            return await asyncio.wait_for(self.wallet.status(), WALLET_TIMEOUT_SECONDS)
+        except (OSError, asyncio.TimeoutError, ValueError, WalletError):
+            if self.wallet is not None:
+                self.wallet.close()
+                self.wallet = None
+            return None
+
+
+    async def status(self) -> dict:
+        from lnarcade.app import App
+        from lnarcade.utilities.manifest_index import manifest_index
+
+        supervisor = App.get_instance().supervisor
+        current = supervisor.current
+        return {
+            "free_play": free_play(),
+            "fps": metrics().fps(),
+            "games": sorted(manifest.launcher.name for manifest in list(manifest_index().manifests.values())),
+            "running": current.name if current else None,
+            "recent_runs": [
+                {"game": run.name, "started": run.started, "seconds": run.wall_seconds, "exit_code": run.exit_code,
+                 "timed_out": run.timed_out, "forked": run.forked, "launch_seconds": run.launch_seconds}
+                for run in list(supervisor.history)[-RECENT_RUNS:]
+            ],
+        }
+
+
+    async def reload_games(self, body: dict) -> dict:
+        """Have the game menu (on the main thread) forget the manifest index and read every manifest again"""
+        reply = Future()
+        pygame.event.post(pygame.event.Event(RELOAD_GAMES, reply=reply))
+        try:
+            games = await asyncio.wait_for(asyncio.wrap_future(reply), RELOAD_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise HTTPError(504, "the launcher didn't get to it in time")
+        return {"games": games}
+
+
+    async def dump_profile(self, body: dict) -> dict:
+        """The launcher's recorded frames to a file - to look at after a report of the menu stuttering"""
+        return {"path": profiler().dump("api"), "frames": profiler().count}
+
+
+    async def set_free_play(self, body: dict) -> dict:
+        enabled = body.get("enabled", not free_play())
+        if not isinstance(enabled, bool):
+            raise HTTPError(400, '"enabled" is true or false')
+        value = "True" if enabled else "False"
+        os.environ["FREE_PLAY"] = value
+        # keep it after a restart - a file write, so not on the event loop
+        await asyncio.to_thread(dotenv.set_key, self.env_path, "FREE_PLAY", value, quote_mode="never")
+        logger.info(f"FREE_PLAY set to {value} through the admin API")
+        return {"free_play": enabled}
+
+
+
+async def read_request(reader: asyncio.StreamReader) -> tuple:
+    """(method, path, headers, body) - raises HTTPError for what this server won't read"""
+    request_line = await reader.readline()
+    if not request_line:
+        raise ConnectionError("closed before a request")
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "bad request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413)
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?", 1)[0], headers, body
@@ -22,6 +22,40 @@ SCREEN_TITLE = "Lightning Arcade"
 # Default missing screenshot image
 MISSING_SCREENSHOT = os.path.join(MY_DIR, "..", "resources", "img", "missing.jpg")
 
+# Scaled screenshots and other things that are slow to rebuild - safe to delete
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+
+# Threads decoding game screenshots while the menu is already up
+THUMBNAIL_WORKERS = 4
+
+# Parsed manifests, so startup only re-reads the games that changed (see lnarcade.utilities.manifest_index)
+MANIFEST_INDEX_PATH = os.path.join(CACHE_DIR, "manifest_index.json")
+
+# How often the game menu looks for games that were added, removed or changed
+MANIFEST_RESCAN_SECONDS = 5
+
+# A game that runs longer than this is stopped (0 = no limit) - override with GAME_WATCHDOG_SECONDS in config.env
+GAME_WATCHDOG_SECONDS = 0
+
+# Each detent of the volume knob changes the volume this much (percent)
+VOLUME_STEP = 5
+
+# The ALSA mixer control the volume knob turns
+VOLUME_MIXER_CONTROL = "Master"
+
+# Run the cabinet's wallet daemon (arcade_walletd.py) for the games - override with WALLET_DAEMON in config.env
+WALLET_DAEMON = True
+
+# The backend's /metrics page and admin API (lnarcade.backend.server) - override with BACKEND_HOST / BACKEND_PORT
+# in config.env. Set BACKEND_HOST=0.0.0.0 to scrape it from another machine - and set ADMIN_TOKEN then too, which
+# the admin API's POSTs have to send as "Authorization: Bearer <token>"
+BACKEND_HOST = "127.0.0.1"
+BACKEND_PORT = 8321
+
+# The FT232H pin the volume knob's INT line is wired to (e.g. "C0") - None to poll the knob instead
+# override with ENCODER_INTERRUPT_PIN in config.env
+ENCODER_INTERRUPT_PIN = None
+
 
 def get_game_search_paths() -> List[str]:
     """
@@ -64,6 +98,16 @@ def create_default_dot_env():
         env += "FREE_PLAY=True\n\n"
         env += "# Time in seconds before auto-scrolling games (AFK mode)\n"
         env += "AFK_SCROLL_TIME=300\n\n"
+        env += "# Stop a game after this many seconds (0 = never)\n"
+        env += "GAME_WATCHDOG_SECONDS=0\n\n"
+        env += "# Run one shared cashu wallet for the games (False: each game opens the wallet itself)\n"
+        env += "WALLET_DAEMON=True\n\n"
+        env += "# Backend /metrics page and admin API (0.0.0.0 to reach it from other machines - set ADMIN_TOKEN too)\n"
+        env += "BACKEND_HOST=127.0.0.1\n"
+        env += "BACKEND_PORT=8321\n"
+        env += "# ADMIN_TOKEN=\n\n"
+        env += "# FT232H pin the volume knob's INT line is wired to (leave unset to poll the knob)\n"
+        env += "# ENCODER_INTERRUPT_PIN=C0\n\n"
         env += "# Override game search paths (colon-separated)\n"
         env += "# LNARCADE_GAME_PATHS=~/CashuArcade:~/OtherGames\n"
 
@@ -1,40 +1,70 @@
 import os
 import platform
 import time
+import threading
 import logging
 logger = logging.getLogger()
 
-class ControlManager():
-    def __init__(self):
-        self.setup_correctly = False
+from lnarcade.config import VOLUME_STEP, VOLUME_MIXER_CONTROL, ENCODER_INTERRUPT_PIN
 
-        # check if on MacOS
-        # NOTE: now done in lnarcade/app.py
-        # if platform.system() == 'Darwin':
-        #     logger.critical("ControlManager::__init__() -> ControlManager not supported on MacOS")
-        #     return
 
-        if os.getenv( "BLINKA_FT232H", None ) is None:
-            logger.critical("ControlManager::__init__() -> BLINKA_FT232H not set")
-            return
+# how long to wait for the knob before checking whether we've been stopped
+IDLE_TIMEOUT_SECONDS = 0.5
+# after the first detent of a turn, gather the rest of it for this long and make one volume change for all of it
+COALESCE_SECONDS = 0.03
 
-        try:
-            import board
-            from adafruit_seesaw import seesaw, rotaryio, digitalio
-        except ImportError:
-            logger.critical("ControlManager::__init__() -> ImportError")
-            return
 
-        self.i2c = board.I2C()
-        self.seesaw = seesaw.Seesaw(self.i2c, 0x36)
+class ControlManager():
+    """
+    Turns the volume knob into system volume changes, on its own thread (run()).
+
+    The encoder and the mixer are normally the real hardware (lnarcade.control.encoder / lnarcade.control.mixer),
+    but any pair with the same methods works - FakeEncoder and FakeMixer to try it without the hardware.
+    """
 
-        self.encoder = rotaryio.IncrementalEncoder(self.seesaw)
-        self.seesaw.pin_mode(24, self.seesaw.INPUT_PULLUP)
-        self.switch = digitalio.DigitalIO(self.seesaw, 24)
+    def __init__(self, encoder=None, mixer=None):
+        self.setup_correctly = False
+        self.stopping = threading.Event()
+
+        # counters
+        self.turns = 0 # bursts of detents, each one volume change at most
+        self.detents = 0
+        self.mixer_updates = 0
+
+        if encoder is None or mixer is None:
+            # check if on MacOS
+            # NOTE: now done in lnarcade/app.py
+            # if platform.system() == 'Darwin':
+            #     logger.critical("ControlManager::__init__() -> ControlManager not supported on MacOS")
+            #     return
+
+            if os.getenv( "BLINKA_FT232H", None ) is None:
+                logger.critical("ControlManager::__init__() -> BLINKA_FT232H not set")
+                return
+
+            if encoder is None:
+                try:
+                    from lnarcade.control.encoder import SeesawEncoder
+                    encoder = SeesawEncoder(os.getenv("ENCODER_INTERRUPT_PIN", ENCODER_INTERRUPT_PIN))
+                except ImportError:
+                    logger.critical("ControlManager::__init__() -> ImportError")
+                    return
+
+            if mixer is None:
+                from lnarcade.control.mixer import open_mixer
+                mixer = open_mixer(VOLUME_MIXER_CONTROL)
+                if mixer is None:
+                    return
+
+        self.encoder = encoder
+        self.mixer = mixer
 
         # Get current volume from the system
-        volume_query = os.popen("amixer get 'Master' | grep -m1 -o [0-9]*% | tr -d %").read().strip()
-        self.current_volume = int(volume_query)
+        try:
+            self.current_volume = self.mixer.get_volume()
+        except Exception as e:
+            logger.critical(f"ControlManager::__init__() -> can't read the volume: {e}")
+            return
 
         self.setup_correctly = True
 
@@ -45,31 +75,39 @@ class ControlManager():
             return
         else:
             logger.info("running control manager run()")
-        # return
 
+        while not self.stopping.is_set():
+            detents = self.encoder.read(IDLE_TIMEOUT_SECONDS)
+            if detents == 0:
+                continue
+
+            # a quick turn is many detents in a row - let the rest of it arrive, then change the volume once
+            time.sleep(COALESCE_SECONDS)
+            detents += self.encoder.read(0)
+            self.turn(detents)
 
-        
-        last_position = -1
-        while True:
-            position = -self.encoder.position
+        self.encoder.close()
+        self.mixer.close()
 
-            if position != last_position:
-                # print(position)
 
-                if position > last_position:
-                    self.current_volume = min(100, self.current_volume + 5)  # increase by 5%
+    def turn(self, detents: int):
+        """Change the volume by `detents` steps of VOLUME_STEP percent (positive is louder)."""
+        self.turns += 1
+        self.detents += abs(detents)
 
-                else:
-                    self.current_volume = max(0, self.current_volume - 5)  # decrease by 5%
+        volume = max(0, min(100, self.current_volume + detents * VOLUME_STEP))
+        if volume == self.current_volume:
+            return
 
-                # Adjust system volume using the 'amixer' command
-                v = f"amixer set 'Master' -- {self.current_volume}%"
-                os.system(v)
+        self.current_volume = volume
+        self.mixer.set_volume(volume)
+        self.mixer_updates += 1
+        logger.debug(f"volume {volume}% ({detents:+d} detents)")
 
-            last_position = position
 
-            # time.sleep(10)
-            time.sleep(0.1)
+    def stop(self):
+        """run() returns (and lets go of the hardware) within IDLE_TIMEOUT_SECONDS"""
+        self.stopping.set()
 
 
 
@@ -0,0 +1,106 @@
+"""
+The volume knob - how far it was turned since we last asked.
+
+Encoders count detents; positive is louder. `read(timeout)` waits up to `timeout` seconds for the knob to move
+and returns every detent turned since the last read, so a quick spin is never lost between reads - it just
+arrives as a bigger number.
+
+    SeesawEncoder   the Adafruit I2C QT rotary encoder (seesaw), over an FT232H with Blinka
+    FakeEncoder     turned from code - for trying the control manager without the hardware
+"""
+
+import time
+import threading
+
+import logging
+logger = logging.getLogger()
+
+
+SEESAW_ADDRESS = 0x36
+
+# how often the seesaw's encoder delta is read over I2C when its INT line isn't wired up
+ENCODER_POLL_SECONDS = 0.05
+# how often the INT line is checked when it is (a pin read is much cheaper than an I2C transaction)
+INTERRUPT_POLL_SECONDS = 0.005
+
+
+
+class SeesawEncoder:
+    """
+    The seesaw keeps its own count of detents since the last encoder_delta() read, so reading it less often never
+    drops a turn.
+
+    With `interrupt_pin` (the FT232H pin the encoder's INT is wired to, e.g. "C0" - it needs a pull-up, it's open
+    drain), the seesaw pulls INT low when the knob moves and I2C is only touched then. Without it the delta is
+    polled.
+
+    Raises:
+        ImportError: if Blinka or the seesaw library aren't installed
+    """
+
+    def __init__(self, interrupt_pin: str = None):
+        import board
+        from adafruit_seesaw import seesaw
+
+        self.seesaw = seesaw.Seesaw(board.I2C(), SEESAW_ADDRESS)
+        self.seesaw.encoder_delta() # forget whatever was turned before we started
+
+        self.interrupt = None
+        if interrupt_pin:
+            import digitalio
+            self.interrupt = digitalio.DigitalInOut(getattr(board, interrupt_pin))
+            self.interrupt.direction = digitalio.Direction.INPUT
+            self.seesaw.enable_encoder_interrupt()
+            logger.info(f"Volume encoder interrupt on pin {interrupt_pin}")
+
+
+    def read(self, timeout: float) -> int:
+        """Detents turned since the last read (positive is louder) - waits up to `timeout` seconds for a turn."""
+        if self.interrupt is not None:
+            deadline = time.monotonic() + timeout
+            # INT is active low
+            while self.interrupt.value:
+                if time.monotonic() >= deadline:
+                    return 0
+                time.sleep(INTERRUPT_POLL_SECONDS)
+        else:
+            time.sleep(min(timeout, ENCODER_POLL_SECONDS))
+
+        # the knob counts up turning left - the original volume script used -position
+        return -self.seesaw.encoder_delta()
+
+
+    def close(self):
+        if self.interrupt is not None:
+            self.seesaw.disable_encoder_interrupt()
+            self.interrupt.deinit()
+
+
+
+class FakeEncoder:
+    """An encoder that's turned with turn() - from a test script, another thread, the keyboard..."""
+
+    def __init__(self):
+        self.pending = 0
+        self.reads = 0
+        self.changed = threading.Condition()
+
+
+    def turn(self, detents: int):
+        """Turn the knob (positive is louder) - it's picked up by the next read()."""
+        with self.changed:
+            self.pending += detents
+            self.changed.notify_all()
+
+
+    def read(self, timeout: float) -> int:
+        with self.changed:
+            if self.pending == 0 and timeout > 0:
+                self.changed.wait(timeout)
+            detents, self.pending = self.pending, 0
+            self.reads += 1
+            return detents
+
+
+    def close(self):
+        pass
@@ -0,0 +1,135 @@
+"""
+The system volume, without starting a process for every change.
+
+    AlsaMixer       one ALSA mixer handle, kept open (needs pyalsaaudio)
+    AmixerMixer     one long-lived `amixer -s` reading commands from a pipe
+    FakeMixer       remembers what it was set to - for trying the control manager without the hardware
+
+open_mixer() picks the first of the real ones that works.
+"""
+
+import re
+import subprocess
+from typing import List
+
+import logging
+logger = logging.getLogger()
+
+
+class AlsaMixer:
+    """
+    Raises:
+        ImportError: if pyalsaaudio isn't installed
+        alsaaudio.ALSAAudioError: if there's no such control
+    """
+
+    def __init__(self, control: str):
+        import alsaaudio
+        self.control = control
+        self.mixer = alsaaudio.Mixer(control)
+
+
+    def get_volume(self) -> int:
+        # one value per channel - they move together
+        return int(self.mixer.getvolume()[0])
+
+
+    def set_volume(self, percent: int):
+        self.mixer.setvolume(percent)
+
+
+    def close(self):
+        self.mixer.close()
+
+
+
+class AmixerMixer:
+    """
+    `amixer -s` runs one command per line of its stdin, so every change is a write to a pipe instead of a fork of
+    a shell and amixer. If it dies it's started again on the next change.
+
+    Raises:
+        FileNotFoundError: if amixer isn't installed
+    """
+
+    def __init__(self, control: str):
+        self.control = control
+        self.process = None
+        self.restarts = 0
+        self._start()
+
+
+    def _start(self):
+        self.process = subprocess.Popen(
+            ["amixer", "-s", "-q"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            text=True,
+        )
+
+
+    def get_volume(self) -> int:
+        """Read once at startup with a plain `amixer get` - the long-lived one is quiet (-q)"""
+        output = subprocess.run(["amixer", "get", self.control], capture_output=True, text=True, check=True).stdout
+        match = re.search(r"\[(\d+)%\]", output)
+        if match is None:
+            raise ValueError(f"no volume in `amixer get {self.control}` output")
+        return int(match.group(1))
+
+
+    def set_volume(self, percent: int):
+        command = f"sset '{self.control}' {percent}%\n"
+        try:
+            self.process.stdin.write(command)
+            self.process.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            logger.warning("amixer went away - starting it again")
+            self.restarts += 1
+            self._start()
+            self.process.stdin.write(command)
+            self.process.stdin.flush()
+
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+
+class FakeMixer:
+    def __init__(self, volume: int = 50):
+        self.volume = volume
+        self.history: List[int] = [] # every volume it was set to
+
+
+    def get_volume(self) -> int:
+        return self.volume
+
+
+    def set_volume(self, percent: int):
+        self.volume = percent
+        self.history.append(percent)
+
+
+    def close(self):
+        pass
+
+
+
+def open_mixer(control: str):
+    """The ALSA mixer if pyalsaaudio is installed, or else a long-lived amixer - None if neither works."""
+    try:
+        return AlsaMixer(control)
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"Can't open ALSA mixer control '{control}': {e}")
+
+    try:
+        return AmixerMixer(control)
+    except OSError as e:
+        logger.critical(f"Can't start amixer: {e}")
+        return None
@@ -6,6 +6,7 @@ logger = logging.getLogger()
 
 from lnarcade.config import APP_FOLDER, get_game_search_paths
 from lnarcade.utilities.manifest import GameManifest
+from lnarcade.utilities.manifest_index import manifest_index
 
 
 def find_game_directories(search_paths: Optional[List[str]] = None) -> List[str]:
@@ -52,13 +53,14 @@ def load_game_manifests(game_dirs: Optional[List[str]] = None) -> Dict[str, Game
     Load manifests from game directories.
     
     Args:
-        game_dirs: List of game directories. If None, discovers automatically.
+        game_dirs: List of game directories. If None, discovers automatically (through the manifest index, so only
+            games that changed since the last scan are parsed again).
     
     Returns:
         Dictionary mapping game directory name to GameManifest
     """
     if game_dirs is None:
-        game_dirs = find_game_directories()
+        return manifest_index().scan()
     
     manifests = {}
     
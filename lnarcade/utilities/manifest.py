@@ -20,6 +20,8 @@ class LaunchConfig:
     args: List[str] = field(default_factory=list)
     venv: Optional[str] = None  # Path to virtual environment (relative to game dir)
     cwd: str = "."  # Working directory (relative to game dir)
+    zygote: bool = False  # Fork from the launcher's warm interpreter instead of starting a new one
+    preload: List[str] = field(default_factory=list)  # Extra modules for the warm interpreter to import
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'LaunchConfig':
@@ -28,7 +30,9 @@ class LaunchConfig:
             command=data.get("command", "python"),
             args=data.get("args", []),
             venv=data.get("venv"),
-            cwd=data.get("cwd", ".")
+            cwd=data.get("cwd", "."),
+            zygote=data.get("zygote", False),
+            preload=data.get("preload", [])
         )
     
     def to_dict(self) -> Dict[str, Any]:
@@ -37,7 +41,9 @@ class LaunchConfig:
             "command": self.command,
             "args": self.args,
             "venv": self.venv,
-            "cwd": self.cwd
+            "cwd": self.cwd,
+            "zygote": self.zygote,
+            "preload": self.preload
         }
 
 
@@ -0,0 +1,211 @@
+"""
+A persisted index of every game's parsed manifest.
+
+Scanning used to open, parse and validate every manifest.json on every launcher start. The index keeps the parsed
+manifests (and their validation errors) in a JSON file along with the mtimes they were read at:
+
+- a search path's mtime only changes when a game directory is added to it or removed from it
+- a game directory's mtime changes when a file in it is added, removed or renamed (editors save by renaming)
+- the manifest's own mtime catches edits made in place
+
+so a rescan that finds nothing new costs a couple of stat() calls per game - cheap enough to run every few seconds
+and hot-add games to the running menu.
+"""
+
+import os
+import json
+import logging
+from typing import List, Dict, Optional
+
+logger = logging.getLogger()
+
+from lnarcade.config import MANIFEST_INDEX_PATH, get_game_search_paths
+from lnarcade.utilities.manifest import GameManifest
+
+
+INDEX_VERSION = 1
+
+
+class ManifestIndex:
+    def __init__(self, path: str = MANIFEST_INDEX_PATH, search_paths: Optional[List[str]] = None):
+        self.path = path
+        self.search_paths = search_paths
+
+        # search path -> {"mtime": ..., "dirs": [...]}
+        self.directories = {}
+        # game directory -> {"dir_mtime": ..., "manifest_mtime": ..., "manifest": dict or None, "errors": [...]}
+        self.entries = {}
+        # game directory -> GameManifest - unchanged games keep the same object from scan to scan
+        self.manifests = {}
+
+        # counters
+        self.scans = 0
+        self.parsed = 0
+
+        self.load()
+
+
+    def load(self):
+        """Read the index from disk - a missing or unreadable index just means everything gets parsed."""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest index {self.path}: {e}")
+            return
+
+        if data.get("version") != INDEX_VERSION:
+            return
+
+        self.directories = data.get("directories", {})
+        self.entries = data.get("entries", {})
+
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # write then rename so a half written index is never read back
+            with open(self.path + ".tmp", "w") as f:
+                json.dump({"version": INDEX_VERSION, "directories": self.directories, "entries": self.entries}, f)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            logger.warning(f"Could not save manifest index {self.path}: {e}")
+
+
+    def clear(self):
+        """Forget everything - the next scan() parses every manifest again."""
+        self.directories = {}
+        self.entries = {}
+        self.manifests = {}
+
+
+    def scan(self) -> Dict[str, GameManifest]:
+        """
+        Bring the index up to date, re-parsing only the games that changed.
+
+        Returns:
+            Dictionary mapping game directory name to GameManifest
+        """
+        search_paths = self.search_paths if self.search_paths is not None else get_game_search_paths()
+        changed = False
+
+        game_dirs = []
+        for search_path in search_paths:
+            dirs, search_path_changed = self._game_directories(os.path.abspath(os.path.expanduser(search_path)))
+            game_dirs.extend(dirs)
+            changed |= search_path_changed
+
+        manifests = {}
+        seen = set()
+        for game_dir in game_dirs:
+            seen.add(game_dir)
+            manifest, game_changed = self._manifest(game_dir)
+            changed |= game_changed
+            if manifest is not None:
+                manifests[os.path.basename(game_dir)] = manifest
+
+        # forget the games that are gone
+        for game_dir in set(self.entries) - seen:
+            logger.info(f"Game removed: {game_dir}")
+            del self.entries[game_dir]
+            self.manifests.pop(game_dir, None)
+            changed = True
+
+        if changed:
+            self.save()
+
+        if self.scans == 0:
+            logger.info(f"Successfully loaded {len(manifests)} game manifests ({self.parsed} parsed, the rest from the index)")
+        self.scans += 1
+        return manifests
+
+
+    def _game_directories(self, search_path: str) -> tuple:
+        """The subdirectories of a search path - (dirs, changed)"""
+        try:
+            mtime = os.stat(search_path).st_mtime_ns
+        except OSError:
+            if self.scans == 0:
+                logger.warning(f"Game search path does not exist: {search_path}")
+            return [], self.directories.pop(search_path, None) is not None
+
+        cached = self.directories.get(search_path)
+        if cached is not None and cached["mtime"] == mtime:
+            return cached["dirs"], False
+
+        try:
+            dirs = sorted(entry.path for entry in os.scandir(search_path) if entry.is_dir())
+        except OSError as e:
+            logger.error(f"Can't read game search path {search_path}: {e}")
+            return [], False
+
+        self.directories[search_path] = {"mtime": mtime, "dirs": dirs}
+        return dirs, True
+
+
+    def _manifest(self, game_dir: str) -> tuple:
+        """The game's manifest, parsed again only if the game changed - (manifest or None, changed)"""
+        manifest_path = os.path.join(game_dir, "manifest.json")
+        try:
+            dir_mtime = os.stat(game_dir).st_mtime_ns
+            manifest_mtime = os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            # not a game (or not any more)
+            had_entry = self.entries.pop(game_dir, None) is not None
+            self.manifests.pop(game_dir, None)
+            return None, had_entry
+
+        entry = self.entries.get(game_dir)
+        if entry is not None and entry["dir_mtime"] == dir_mtime and entry["manifest_mtime"] == manifest_mtime:
+            if entry["manifest"] is None:
+                return None, False
+            manifest = self.manifests.get(game_dir)
+            if manifest is None:
+                manifest = GameManifest.from_dict(entry["manifest"], game_dir)
+                self.manifests[game_dir] = manifest
+            return manifest, False
+
+        self.parsed += 1
+        manifest = GameManifest.from_file(manifest_path)
+        if manifest is None:
+            logger.warning(f"Failed to load manifest from {manifest_path}")
+            # remember that it's broken so it isn't parsed (and complained about) again until it changes
+            self.entries[game_dir] = {"dir_mtime": dir_mtime, "manifest_mtime": manifest_mtime, "manifest": None, "errors": []}
+            self.manifests.pop(game_dir, None)
+            return None, True
+
+        # Validate manifest
+        is_valid, errors = manifest.validate()
+        if not is_valid:
+            logger.warning(f"Invalid manifest in {game_dir}:")
+            for error in errors:
+                logger.warning(f"  - {error}")
+            # Still include it, but log the issues
+
+        if entry is None and self.scans > 0:
+            logger.info(f"Game added: {manifest.launcher.name} ({game_dir})")
+        else:
+            logger.debug(f"Loaded manifest for '{manifest.launcher.name}' from {game_dir}")
+
+        self.entries[game_dir] = {
+            "dir_mtime": dir_mtime,
+            "manifest_mtime": manifest_mtime,
+            "manifest": manifest.to_dict(),
+            "errors": errors,
+        }
+        self.manifests[game_dir] = manifest
+        return manifest, True
+
+
+
+###########################################
+_index = None
+
+def manifest_index() -> ManifestIndex:
+    """The launcher's one ManifestIndex"""
+    global _index
+    if _index is None:
+        _index = ManifestIndex()
+    return _index
@@ -0,0 +1,278 @@
+"""
+Runs one game at a time without blocking the launcher.
+
+The game is started with Popen (or forked from the zygote, see lnarcade.utilities.zygote) and watched by a
+monitor thread, which:
+
+- samples the game's memory use while it runs
+- gets its exit code and CPU time from wait4() (including any processes it started and waited for)
+- terminates it if it runs longer than the watchdog timeout (and kills it if it won't go)
+- posts a GAME_EXITED event when it's gone - the launcher gets its display back on the main thread
+
+Finished runs are kept in `history` for the backend to report on, and counted in lnarcade.backend.metrics.
+"""
+
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import logging
+logger = logging.getLogger()
+
+import pygame
+
+from lnarcade.backend.metrics import metrics
+
+
+# posted (with a `run` attribute) when a launched game exits
+GAME_EXITED = pygame.event.custom_type()
+
+POLL_SECONDS = 0.25
+KILL_GRACE_SECONDS = 5 # after asking a game to stop, how long before it's killed
+HISTORY_LENGTH = 100
+
+
+@dataclass
+class GameRun:
+    """One launch of a game - the numbers are filled in as it runs and when it exits."""
+    name: str
+    args: List[str]
+    pid: int = None
+    started: float = field(default_factory=time.time)
+    launch_seconds: float = None # starting the process (or forking it from the zygote)
+    wall_seconds: float = None
+    exit_code: int = None
+    peak_rss_kb: int = None
+    user_seconds: float = None
+    system_seconds: float = None
+    timed_out: bool = False
+    forked: bool = False # from the zygote
+
+    @property
+    def running(self) -> bool:
+        return self.wall_seconds is None
+
+    @property
+    def cpu_seconds(self) -> Optional[float]:
+        if self.user_seconds is None:
+            return None
+        return self.user_seconds + self.system_seconds
+
+
+@dataclass
+class ExitStatus:
+    exit_code: int = None
+    user_seconds: float = None
+    system_seconds: float = None
+    maxrss_kb: int = None
+
+
+
+class LocalProcess:
+    """A game started with Popen - the launcher's own child."""
+
+    def __init__(self, args: List[str], cwd: str):
+        self.popen = subprocess.Popen(args, cwd=cwd)
+        self.pid = self.popen.pid
+
+
+    @property
+    def returncode(self) -> Optional[int]:
+        return self.popen.returncode
+
+
+    def poll(self) -> Optional[ExitStatus]:
+        """None while it's running"""
+        try:
+            pid, status, usage = os.wait4(self.pid, os.WNOHANG)
+        except ChildProcessError:
+            # somebody else reaped it - no exit code or usage for us
+            return ExitStatus()
+        if pid == 0:
+            return None
+
+        exit_code = os.waitstatus_to_exitcode(status)
+        # we reaped it - make sure Popen doesn't try to
+        self.popen.returncode = exit_code
+        return ExitStatus(exit_code, usage.ru_utime, usage.ru_stime, maxrss_kb(usage.ru_maxrss))
+
+
+    def send_signal(self, sig: int):
+        """ Popen.terminate() polls first, which could reap the game out from under the monitor - so signal it directly """
+        if self.popen.returncode is not None:
+            return
+        try:
+            os.kill(self.pid, sig)
+        except ProcessLookupError:
+            pass
+
+
+
+class GameSupervisor:
+    def __init__(self):
+        self.process = None # a LocalProcess or zygote.ForkedProcess
+        self.zygote = None # started by start_zygote() once a game opts in
+        self.current: GameRun = None
+        self.history = deque(maxlen=HISTORY_LENGTH)
+        self.lock = threading.Lock()
+
+
+    @property
+    def running(self) -> bool:
+        return self.current is not None
+
+
+    def start_zygote(self, preload: List[str]):
+        """Start the zygote (if it isn't running) - it's ready for forking a second or so later."""
+        if self.zygote is not None and self.zygote.process.poll() is None:
+            return
+        from lnarcade.utilities.zygote import Zygote
+        logger.info("Starting the zygote")
+        self.zygote = Zygote(preload)
+
+
+    def close(self):
+        if self.zygote is not None:
+            self.zygote.close()
+            self.zygote = None
+
+
+    def launch(self, name: str, args: List[str], cwd: str, timeout: float = 0, fork: bool = False) -> GameRun:
+        """
+        Start a game and return right away.
+
+        Args:
+            name: The game's display name (for logs and stats)
+            args: The command line
+            cwd: Working directory
+            timeout: Seconds before the watchdog stops the game - 0 for no limit
+            fork: Fork the game from the zygote if it's ready and can run the command (otherwise start it cold)
+
+        Returns:
+            The GameRun, which is filled in when the game exits
+
+        Raises:
+            RuntimeError: if a game is already running
+            OSError: if the game can't be started (FileNotFoundError for a missing command)
+        """
+        with self.lock:
+            if self.current is not None:
+                raise RuntimeError(f"'{self.current.name}' is already running")
+
+            launching = time.perf_counter()
+            process = None
+            if fork and self.zygote is not None:
+                process = self._fork(self.zygote, name, args, cwd)
+            if process is None:
+                process = LocalProcess(args, cwd)
+
+            run = GameRun(name, list(args), pid=process.pid, forked=not isinstance(process, LocalProcess),
+                          launch_seconds=time.perf_counter() - launching)
+            self.process = process
+            self.current = run
+        metrics().game_launched(run)
+
+        monitor = threading.Thread(target=self._monitor, args=(process, run, timeout), name=f"monitor-{process.pid}")
+        monitor.daemon = True
+        monitor.start()
+        return run
+
+
+    def _fork(self, zygote, name: str, args: List[str], cwd: str):
+        """The game forked from the zygote - or None to start it cold."""
+        from lnarcade.utilities.zygote import zygote_argv
+
+        argv = zygote_argv(args)
+        if argv is None:
+            logger.info(f"'{name}' can't be forked from the zygote ({' '.join(args)}) - starting it cold")
+            return None
+        if not zygote.poll_ready():
+            logger.info(f"Zygote isn't ready yet - starting '{name}' cold")
+            return None
+        try:
+            return zygote.fork(argv, cwd)
+        except (OSError, RuntimeError) as e:
+            logger.error(f"Zygote couldn't start '{name}' - starting it cold: {e}")
+            return None
+
+
+    def stop(self):
+        """Ask the running game to quit - the monitor kills it if it doesn't."""
+        process = self.process
+        if process is not None:
+            process.send_signal(signal.SIGTERM)
+
+
+    def _monitor(self, process, run: GameRun, timeout: float):
+        start = time.perf_counter()
+        deadline = start + timeout if timeout else None
+        terminated_at = None
+
+        while True:
+            status = process.poll()
+            if status is not None:
+                break
+
+            rss = current_peak_rss_kb(process.pid)
+            if rss is not None:
+                run.peak_rss_kb = max(run.peak_rss_kb or 0, rss)
+
+            now = time.perf_counter()
+            if terminated_at is None and deadline is not None and now > deadline:
+                logger.warning(f"Watchdog: '{run.name}' has run for {timeout} seconds - stopping it")
+                run.timed_out = True
+                process.send_signal(signal.SIGTERM)
+                terminated_at = now
+            elif terminated_at is not None and now - terminated_at > KILL_GRACE_SECONDS:
+                logger.warning(f"Watchdog: '{run.name}' didn't stop - killing it")
+                process.send_signal(signal.SIGKILL)
+                terminated_at = float("inf") # only once
+
+            time.sleep(POLL_SECONDS)
+
+        run.wall_seconds = time.perf_counter() - start
+        run.exit_code = status.exit_code
+        run.user_seconds = status.user_seconds
+        run.system_seconds = status.system_seconds
+        if status.maxrss_kb is not None:
+            run.peak_rss_kb = max(run.peak_rss_kb or 0, status.maxrss_kb)
+
+        with self.lock:
+            self.process = None
+            self.current = None
+            self.history.append(run)
+        metrics().game_exited(run)
+
+        logger.info(f"'{run.name}' exited with code {run.exit_code} after {run.wall_seconds:.1f} s"
+                    f" (cpu {run.cpu_seconds or 0:.1f} s, peak rss {(run.peak_rss_kb or 0) / 1024:.0f} MB{', forked' if run.forked else ''})")
+
+        try:
+            pygame.event.post(pygame.event.Event(GAME_EXITED, run=run))
+        except pygame.error:
+            pass # the launcher is shutting down
+
+
+
+def current_peak_rss_kb(pid: int) -> Optional[int]:
+    """The process's peak resident memory so far, where /proc has it (Linux)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def maxrss_kb(ru_maxrss: int) -> int:
+    """ru_maxrss is kilobytes on Linux, bytes on macOS"""
+    if sys.platform == "darwin":
+        return ru_maxrss // 1024
+    return ru_maxrss
@@ -0,0 +1,139 @@
+"""
+Game screenshots, scaled to the screen, decoded off the main thread.
+
+Decoding a full resolution PNG for every installed game used to hold up the launcher before the menu could
+appear. Now each screenshot is decoded and scaled by a thread pool, and the scaled pixels are kept on disk under
+CACHE_DIR - keyed by the screenshot's path, its mtime and the screen resolution - so the next start only has to
+read them back.
+
+The menu asks for a thumbnail, gets a Future, and shows a placeholder until it's done.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+logger = logging.getLogger()
+
+import pygame
+
+from lnarcade.config import CACHE_DIR, MISSING_SCREENSHOT, THUMBNAIL_WORKERS
+
+
+# raw pixels - reading them back is little more than a memcpy
+PIXEL_FORMAT = "RGB"
+
+
+class ThumbnailLoader:
+    def __init__(self, size: tuple, cache_dir: str = os.path.join(CACHE_DIR, "thumbnails"), workers: int = THUMBNAIL_WORKERS):
+        self.size = tuple(size)
+        self.cache_dir = cache_dir
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self.requests = {} # path -> (mtime, Future) - a changed screenshot is loaded again
+
+        # counters
+        self.disk_hits = 0
+        self.decoded = 0
+        self.failed = 0
+
+        self.placeholder = pygame.Surface(self.size)
+        self.placeholder.fill((0, 0, 0))
+
+
+    def request(self, path: str) -> Future:
+        """
+        Start loading the thumbnail for an image (if it isn't already).
+
+        Args:
+            path: The full size image
+
+        Returns:
+            A Future with a screen-sized Surface - not yet converted to the display format, do that on the main thread
+        """
+        path = os.path.abspath(path)
+        mtime = mtime_ns(path)
+        requested = self.requests.get(path)
+        if requested is not None and requested[0] == mtime:
+            return requested[1]
+        future = self.pool.submit(self._load, path, mtime)
+        self.requests[path] = (mtime, future)
+        return future
+
+
+    def cache_path(self, path: str, mtime: int) -> str:
+        """Where the thumbnail for this version of the image, at this resolution, lives on disk."""
+        key = f"{path}|{mtime}|{self.size[0]}x{self.size[1]}"
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.{PIXEL_FORMAT.lower()}")
+
+
+    def _load(self, path: str, mtime: int) -> pygame.Surface:
+        if mtime is None:
+            logger.warning(f"Screenshot not found: {path}, using default")
+            return self._missing(path)
+        cached = self.cache_path(path, mtime)
+
+        try:
+            with open(cached, "rb") as f:
+                surface = pygame.image.frombytes(f.read(), self.size, PIXEL_FORMAT)
+            self.disk_hits += 1
+            return surface
+        except (OSError, ValueError):
+            pass # not cached yet (or cached at a different size by an older version)
+
+        try:
+            surface = pygame.transform.scale(pygame.image.load(path), self.size)
+        except pygame.error as e:
+            logger.error(f"Error loading screenshot {path}: {e}")
+            return self._missing(path)
+
+        self.decoded += 1
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write then rename so a half written file is never read back
+            temp = f"{cached}.{threading.get_ident()}.tmp"
+            with open(temp, "wb") as f:
+                f.write(pygame.image.tobytes(surface, PIXEL_FORMAT))
+            os.replace(temp, cached)
+        except OSError as e:
+            logger.warning(f"Could not cache thumbnail for {path}: {e}")
+
+        return surface
+
+
+    def _missing(self, path: str) -> pygame.Surface:
+        """The default screenshot, for a game whose own is missing or broken."""
+        self.failed += 1
+        missing = os.path.abspath(MISSING_SCREENSHOT)
+        if path == missing:
+            return self.placeholder
+        # NOTE: loaded right here, not through the pool - waiting on the pool from inside it can deadlock
+        return self._load(missing, mtime_ns(missing))
+
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+
+def mtime_ns(path: str):
+    """None if the file isn't there"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+
+###########################################
+_loader = None
+
+def thumbnail_loader() -> ThumbnailLoader:
+    """The launcher's one ThumbnailLoader - thumbnails are the size of the screen."""
+    global _loader
+    if _loader is None:
+        from lnarcade.app import SCREEN_WIDTH, SCREEN_HEIGHT
+        _loader = ThumbnailLoader((SCREEN_WIDTH, SCREEN_HEIGHT))
+    return _loader
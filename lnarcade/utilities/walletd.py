@@ -0,0 +1,89 @@
+"""
+The cabinet's wallet daemon (arcade_walletd.py) - started with the launcher, stopped with it.
+
+One process holds the cashu wallet, the mint's keysets and open connections to the mint, so a game that takes
+payments doesn't import cashu, open the wallet database or fetch keysets over the network when it starts - it
+connects to the daemon's Unix socket (arcade_wallet_client.WalletClient).
+
+Games find the socket through ARCADE_WALLET_SOCKET, set here before any game is launched (cold launches and zygote
+forks both get the launcher's environment).
+
+A watcher thread starts the daemon again if it exits before close() - games that lose it connect again
+(arcade_payments.init_wallet).
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+
+import logging
+logger = logging.getLogger()
+
+from arcade_wallet_client import socket_path
+from lnarcade.config import DATA_DIR
+
+RESTART_FIRST_SECONDS = 1 # wait before starting a daemon that exited again - doubling while it keeps crashing
+RESTART_MAX_SECONDS = 60
+RESTART_STABLE_SECONDS = 60 # a daemon that ran this long crashed for a new reason - back to the first wait
+
+
+class WalletDaemon:
+    def __init__(self, path: str = None):
+        self.path = path or socket_path()
+        os.environ["ARCADE_WALLET_SOCKET"] = self.path
+
+        self.restarts = 0
+        self.closing = threading.Event()
+        self.lock = threading.Lock() # close() vs a restart
+        self.process = self._start()
+
+        self.watcher = threading.Thread(target=self._watch, name="walletd-watcher")
+        self.watcher.daemon = True
+        self.watcher.start()
+
+
+    def _start(self) -> subprocess.Popen:
+        # from the CashuArcade directory - the wallet lives in arcade_wallet/ there
+        process = subprocess.Popen([sys.executable, "-m", "arcade_walletd", self.path], cwd=DATA_DIR)
+        logger.info(f"Wallet daemon starting on {self.path} (pid {process.pid})")
+        return process
+
+
+    def _watch(self):
+        delay = RESTART_FIRST_SECONDS
+        while True:
+            started = time.monotonic()
+            code = self.process.wait()
+            if self.closing.is_set():
+                return
+            if time.monotonic() - started > RESTART_STABLE_SECONDS:
+                delay = RESTART_FIRST_SECONDS
+            logger.error(f"Wallet daemon exited ({code}) - starting it again in {delay} s")
+            if self.closing.wait(delay):
+                return
+            with self.lock:
+                if self.closing.is_set():
+                    return
+                self.process = self._start()
+                self.restarts += 1
+            delay = min(delay * 2, RESTART_MAX_SECONDS)
+
+
+    @property
+    def running(self) -> bool:
+        return self.process.poll() is None
+
+
+    def close(self):
+        with self.lock:
+            self.closing.set()
+        if not self.running:
+            logger.warning(f"Wallet daemon had already exited ({self.process.returncode})")
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(2)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
@@ -0,0 +1,273 @@
+"""
+A warm Python to fork games from.
+
+A cold launch starts a new interpreter that imports pygame, numpy and gamelib from scratch before the game does
+anything. The zygote is a Python the launcher starts once, which imports all of that up front and then waits. Each
+launch of a game that opts in (`"zygote": true` in its manifest's launch section) is a fork() of the zygote, so the
+game starts with those modules already loaded.
+
+The zygote never initializes pygame (no display, no mixer) - every game still does that itself, in its own process.
+
+The launcher and the zygote talk over a socketpair, one JSON message per line:
+
+    zygote   -> launcher    {"ready": true, "preload_seconds": 0.8, "failed": []}
+    launcher -> zygote      {"argv": ["-m", "fishyfrens"], "cwd": "...", "env": {...}}
+    zygote   -> launcher    {"pid": 1234}
+    zygote   -> launcher    {"exit_code": 0, "user_seconds": ..., "system_seconds": ..., "maxrss_kb": ...}
+
+The zygote reaps the game itself (it's the parent), so exit codes and CPU time arrive as the last message. One game
+runs at a time, like the launcher.
+
+Only launches the zygote can run the way Python would are forked: the system `python`/`python3` (no venv) with
+`-m module` or a script path. Anything else is launched cold.
+"""
+
+import os
+import sys
+import json
+import time
+import select
+import signal
+import socket
+import importlib
+import subprocess
+from typing import List, Optional
+
+import logging
+logger = logging.getLogger()
+
+
+# imported by the zygote before it says it's ready - games can add their own with "preload" in the manifest
+ZYGOTE_PRELOAD = [
+    "pygame",
+    "numpy",
+    "gamelib.globals",
+    "gamelib.singleton",
+    "gamelib.logger",
+    "gamelib.colors",
+    "gamelib.utils",
+    "gamelib.text",
+    "gamelib.timestep",
+    "gamelib.viewstate",
+]
+
+PYTHON_COMMANDS = ("python", "python3", sys.executable)
+
+
+def zygote_argv(args: List[str]) -> Optional[List[str]]:
+    """The part of a launch command after `python` - or None if the zygote can't run it."""
+    if len(args) < 2 or args[0] not in PYTHON_COMMANDS:
+        return None
+    if args[1] == "-m" and len(args) >= 3:
+        return args[1:]
+    if not args[1].startswith("-"):
+        return args[1:] # a script
+    return None
+
+
+
+###########################################
+# the launcher's side
+###########################################
+class Zygote:
+    def __init__(self, preload: List[str] = ZYGOTE_PRELOAD):
+        self.sock, theirs = socket.socketpair()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "lnarcade.utilities.zygote", str(theirs.fileno()), *preload],
+            pass_fds=[theirs.fileno()],
+        )
+        theirs.close()
+        self.buffer = b""
+
+        self.ready = False
+        self.preload_seconds = None
+        self.forks = 0
+
+
+    def poll_ready(self, timeout: float = 0) -> bool:
+        """Has the zygote finished importing? (waits up to `timeout` seconds to find out)"""
+        if self.ready:
+            return True
+        if self.process.poll() is not None:
+            return False
+        if not self.has_message(timeout):
+            return False
+
+        message = self.receive()
+        if message is None:
+            return False
+        self.ready = True
+        self.preload_seconds = message.get("preload_seconds")
+        if message.get("failed"):
+            logger.warning(f"Zygote couldn't preload: {', '.join(message['failed'])}")
+        logger.info(f"Zygote ready - preloaded in {self.preload_seconds:.2f} s")
+        return True
+
+
+    def fork(self, argv: List[str], cwd: str) -> 'ForkedProcess':
+        """Start a game as a fork of the zygote - `argv` is what would come after `python` on the command line."""
+        if not self.poll_ready():
+            raise RuntimeError("zygote isn't ready")
+
+        self.send({"argv": argv, "cwd": os.path.abspath(cwd), "env": dict(os.environ)})
+        message = self.receive()
+        if message is None or "pid" not in message:
+            raise RuntimeError(f"zygote didn't start the game: {message}")
+        self.forks += 1
+        return ForkedProcess(self, message["pid"])
+
+
+    def send(self, message: dict):
+        self.sock.sendall((json.dumps(message) + "\n").encode())
+
+
+    def has_message(self, timeout: float = 0) -> bool:
+        """Is there a message to receive() without waiting? (waits up to `timeout` seconds for one to start)"""
+        return b"\n" in self.buffer or bool(select.select([self.sock], [], [], timeout)[0])
+
+
+    def receive(self) -> Optional[dict]:
+        # NOTE: not sock.makefile() - a buffered reader could swallow the next message where select() can't see it
+        while b"\n" not in self.buffer:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                logger.error("Zygote went away")
+                self.ready = False
+                return None
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return json.loads(line)
+
+
+    def close(self):
+        # the zygote exits when its end of the socket closes
+        self.sock.close()
+        try:
+            self.process.wait(1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+
+class ForkedProcess:
+    """A game forked from the zygote - the same poll() / send_signal() as supervisor.LocalProcess"""
+
+    def __init__(self, zygote: Zygote, pid: int):
+        self.zygote = zygote
+        self.pid = pid
+        self.returncode = None
+
+
+    def poll(self):
+        from lnarcade.utilities.supervisor import ExitStatus
+
+        if not self.zygote.has_message():
+            return None
+
+        message = self.zygote.receive()
+        if message is None:
+            self.returncode = -1
+            return ExitStatus(None)
+
+        self.returncode = message["exit_code"]
+        return ExitStatus(message["exit_code"], message["user_seconds"], message["system_seconds"], message["maxrss_kb"])
+
+
+    def send_signal(self, sig: int):
+        if self.returncode is not None:
+            return
+        try:
+            os.kill(self.pid, sig)
+        except ProcessLookupError:
+            pass
+
+
+
+###########################################
+# the zygote's side
+###########################################
+def preload(modules: List[str]) -> List[str]:
+    """Import everything we can - returns the ones that failed."""
+    failed = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            failed.append(f"{name} ({e.__class__.__name__}: {e})")
+    return failed
+
+
+def run_game(request: dict) -> int:
+    """In the forked child - become `python <argv>` run from `cwd`, and return the exit code."""
+    import runpy
+    import traceback
+
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    os.environ.clear()
+    os.environ.update(request["env"])
+    os.chdir(request["cwd"])
+
+    argv = request["argv"]
+    try:
+        if argv[0] == "-m":
+            # like `python -m`: the current directory goes first on the path
+            sys.path.insert(0, request["cwd"])
+            sys.argv = [argv[1], *argv[2:]]
+            runpy.run_module(argv[1], run_name="__main__", alter_sys=True)
+        else:
+            sys.path.insert(0, os.path.dirname(os.path.abspath(argv[0])))
+            sys.argv = list(argv)
+            runpy.run_path(argv[0], run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def serve(fd: int, modules: List[str]):
+    sock = socket.socket(fileno=fd)
+    reader = sock.makefile("r")
+
+    def send(message: dict):
+        sock.sendall((json.dumps(message) + "\n").encode())
+
+    # Ctrl-C in the launcher's terminal is for the launcher - we go when the socket closes
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    start = time.perf_counter()
+    failed = preload(modules)
+    send({"ready": True, "preload_seconds": time.perf_counter() - start, "failed": failed})
+
+    for line in reader:
+        request = json.loads(line)
+
+        pid = os.fork()
+        if pid == 0:
+            reader.close()
+            sock.close()
+            code = run_game(request)
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code & 0xFF if code >= 0 else 1)
+
+        send({"pid": pid})
+        _, status, usage = os.wait4(pid, 0)
+        send({
+            "exit_code": os.waitstatus_to_exitcode(status),
+            "user_seconds": usage.ru_utime,
+            "system_seconds": usage.ru_stime,
+            "maxrss_kb": usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss,
+        })
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]), sys.argv[2:])
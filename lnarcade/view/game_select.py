@@ -4,42 +4,54 @@ import time
 import logging
 logger = logging.getLogger()
 
-from dataclasses import dataclass
-import subprocess
+from dataclasses import dataclass, field
+from concurrent.futures import Future
 
 
 import pygame
 
 from lnarcade.app import App, APP_SCREEN, SCREEN_WIDTH, SCREEN_HEIGHT
-from lnarcade.config import APP_FOLDER, MY_DIR, MISSING_SCREENSHOT
+from lnarcade.config import APP_FOLDER, MY_DIR, MANIFEST_RESCAN_SECONDS, GAME_WATCHDOG_SECONDS
 from lnarcade.colors import *
 from lnarcade.utilities.find_games import load_game_manifests
 from lnarcade.utilities.manifest import GameManifest
+from lnarcade.utilities.thumbnails import thumbnail_loader
+from lnarcade.utilities.manifest_index import manifest_index
+from lnarcade.utilities.supervisor import GameRun, GAME_EXITED
+from lnarcade.utilities.zygote import ZYGOTE_PRELOAD
+from lnarcade.backend.server import RELOAD_GAMES
 from lnarcade.view import ViewState
 from lnarcade.view.error import ErrorModalView
 
+from gamelib.text import text_cache
+
 
 
 @dataclass
 class GameListItem:
     game_dir_name: str  # Directory name of the game
     manifest: GameManifest  # Full manifest object
-    image: pygame.Surface = None
+    thumbnail: Future = field(default=None, repr=False)
+    _background: pygame.Surface = field(default=None, repr=False)
 
     def __post_init__(self):
-        """Load the game screenshot image."""
-        screenshot_path = self.manifest.get_screenshot_path()
-        
-        try:
-            if os.path.exists(screenshot_path):
-                self.image = pygame.image.load(screenshot_path)
-            else:
-                logger.warning(f"Screenshot not found: {screenshot_path}, using default")
-                self.image = pygame.image.load(MISSING_SCREENSHOT)
-        except pygame.error as e:
-            logger.error(f"Error loading screenshot {screenshot_path}: {e}")
-            self.image = pygame.image.load(MISSING_SCREENSHOT)
-    
+        """Start loading the game screenshot image in the background."""
+        self.thumbnail = thumbnail_loader().request(self.manifest.get_screenshot_path())
+
+    @property
+    def ready(self) -> bool:
+        """The screenshot has finished loading."""
+        return self._background is not None or self.thumbnail.done()
+
+    @property
+    def background(self) -> pygame.Surface:
+        """The screenshot scaled to fill the screen - or a placeholder until it's loaded."""
+        if self._background is None:
+            if not self.thumbnail.done():
+                return thumbnail_loader().placeholder
+            self._background = self.thumbnail.result().convert()
+        return self._background
+
     @property
     def game_name(self) -> str:
         """Get the display name of the game."""
@@ -76,21 +88,24 @@ class GameSelectView(ViewState):
         manifests = load_game_manifests()
         logger.info(f"Loaded {len(manifests)} game manifests")
 
-        for game_dir_name, manifest in manifests.items():
-            try:
-                game_item = GameListItem(game_dir_name, manifest)
-                self.menu_items.append(game_item)
-                logger.debug(f"Added game: {game_item.game_name}")
-            except Exception as e:
-                logger.error(f"Error creating GameListItem for {game_dir_name}: {e}")
-                continue
+        self.menu_items = self.build_menu_items(manifests)
+        self.last_rescan = time.time()
+        self.start_zygote()
 
         if not self.menu_items:
             logger.warning("No games found!")
 
+        # retained-mode drawing: the screen is only recomposed when the selection changes (see draw())
+        self.gradient = gradient_overlay(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.frame = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert() # the screen without the credits
+        self.composed_index = None
+        self.composed_ready = False # was the selected game's screenshot loaded when it was composed
+        self.flash_rect = pygame.Rect(10, 10, 0, 0)
+
 
     def setup(self):
         APP_SCREEN.fill(BLACK)
+        self.invalidate()
         
         if not self.menu_items:
             logger.warning("No games found! Add games to ~/CashuArcade/")
@@ -98,54 +113,107 @@ class GameSelectView(ViewState):
 
 
     def update(self):
+        if App.get_instance().supervisor.running:
+            return
+
         # simulate keypress
         if time.time() - self.last_input_time > int(os.getenv("AFK_SCROLL_TIME", 300)):
             # TODO: untested
             key_down_event = pygame.event.Event(pygame.KEYDOWN, {'key': pygame.K_DOWN})
             pygame.event.post(key_down_event)
 
+        # hot-add games that were installed while we're running
+        if time.time() - self.last_rescan > MANIFEST_RESCAN_SECONDS:
+            self.last_rescan = time.time()
+            self.refresh_games()
+
+
+    def build_menu_items(self, manifests: dict) -> list:
+        """One GameListItem per manifest - reusing the items (and their loaded screenshots) of unchanged games."""
+        existing = {item.game_dir_name: item for item in self.menu_items}
+
+        items = []
+        for game_dir_name, manifest in manifests.items():
+            game_item = existing.get(game_dir_name)
+            if game_item is not None and game_item.manifest is manifest:
+                items.append(game_item)
+                continue
+            try:
+                game_item = GameListItem(game_dir_name, manifest)
+                items.append(game_item)
+                logger.debug(f"Added game: {game_item.game_name}")
+            except Exception as e:
+                logger.error(f"Error creating GameListItem for {game_dir_name}: {e}")
+                continue
+        return items
+
+
+    def refresh_games(self):
+        """Rescan the game directories (cheap when nothing changed) and update the menu if anything did."""
+        items = self.build_menu_items(manifest_index().scan())
+        if len(items) == len(self.menu_items) and all(a is b for a, b in zip(items, self.menu_items)):
+            return
+
+        # stay on the same game if it's still there
+        selected = self.menu_items[self.selected_index].game_dir_name if self.menu_items else None
+        names = [item.game_dir_name for item in items]
+        self.selected_index = names.index(selected) if selected in names else 0
+        self.menu_items = items
+        logger.info(f"Game list changed - {len(items)} games")
+        self.start_zygote()
+        self.invalidate()
+
+
+    def reload_games(self, reply: Future):
+        """Forget the manifest index and read every game's manifest again - for the backend's admin API."""
+        try:
+            manifest_index().clear()
+            self.refresh_games()
+            reply.set_result(len(self.menu_items))
+        except Exception as e:
+            logger.exception("Reloading the games failed")
+            reply.set_exception(e)
+
+
+    def start_zygote(self):
+        """Warm up an interpreter to fork games from, if any game wants one."""
+        forked = [item.manifest.launcher.launch for item in self.menu_items if item.manifest.launcher.launch.zygote]
+        if not forked:
+            return
+        preload = list(ZYGOTE_PRELOAD)
+        for launch in forked:
+            preload += [module for module in launch.preload if module not in preload]
+        App.get_instance().supervisor.start_zygote(preload)
+
+
+    def invalidate(self):
+        """Recompose and redraw the whole screen on the next draw()."""
+        self.composed_index = None
+
+
+    def compose(self):
+        """Draw everything but the flashing credits into self.frame."""
+        frame = self.frame
 
-    def draw(self):
         # Handle no games case
         if not self.menu_items:
-            APP_SCREEN.fill(BLACK)
-            font = pygame.font.SysFont(None, 60)
-            text = font.render("No games found!", True, RED)
+            frame.fill(BLACK)
+            text = text_cache().render("No games found!", None, 60, RED)
             text_rect = text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 50))
-            APP_SCREEN.blit(text, text_rect)
+            frame.blit(text, text_rect)
             
-            font_small = pygame.font.SysFont(None, 40)
-            text2 = font_small.render("Add games to ~/CashuArcade/", True, WHITE)
+            text2 = text_cache().render("Add games to ~/CashuArcade/", None, 40, WHITE)
             text2_rect = text2.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 + 20))
-            APP_SCREEN.blit(text2, text2_rect)
-            
-            pygame.display.flip()
+            frame.blit(text2, text2_rect)
             return
         
         # SHOW GAME ARTWORK
-        image = self.menu_items[self.selected_index].image
-        scaled_image = pygame.transform.scale(image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-        APP_SCREEN.blit(scaled_image, (0, 0))  # Drawing the image
-
-        # Define the coordinates for the gradient effect.
-        left = 0
-        right = int(SCREEN_WIDTH * 0.5)
-        top = SCREEN_HEIGHT
-        bottom = 0
+        frame.blit(self.menu_items[self.selected_index].background, (0, 0))
 
         # Gradient Effect
-        gradient_strength = 1
-        gradient_rect_width = 5
-        for i in range(0, SCREEN_WIDTH // 2, gradient_rect_width):
-            alpha = int(255 * gradient_strength * ((SCREEN_WIDTH // 2 - i) / (SCREEN_WIDTH // 2)))
-            gradient_surface = pygame.Surface((gradient_rect_width, SCREEN_HEIGHT), pygame.SRCALPHA)
-            gradient_surface.fill((0, 0, 0, alpha))
-            APP_SCREEN.blit(gradient_surface, (i, 0))
-
+        frame.blit(self.gradient, (0, 0))
 
         # Drawing Texts
-        font_30 = pygame.font.SysFont(None, 50)
-        font_45 = pygame.font.SysFont(None, 80)
         x, y = SCREEN_WIDTH * 0.02, SCREEN_HEIGHT // 2
         offset = y + self.selected_index * 55
 
@@ -154,31 +222,59 @@ class GameSelectView(ViewState):
             color = (173, 173, 239)  # arcade.color.BLUE_BELL
             if i == self.selected_index:
                 color = (255, 255, 255)  # arcade.color.WHITE
-                text = font_45.render(menu_item.game_name, True, color)
+                text = text_cache().render(menu_item.game_name, None, 80, color)
             else:
-                text = font_30.render(menu_item.game_name, True, color)
+                text = text_cache().render(menu_item.game_name, None, 50, color)
 
-            APP_SCREEN.blit(text, (x, offset - i * 55))
+            frame.blit(text, (x, offset - i * 55))
 
         # Drawing game type
         game_type = self.menu_items[self.selected_index].game_type
         if game_type:
-            text = font_30.render(game_type, True, (255, 0, 0))  # RED
-            APP_SCREEN.blit(text, (SCREEN_WIDTH * 0.5, SCREEN_HEIGHT * 0.05))
+            text = text_cache().render(game_type, None, 50, (255, 0, 0))  # RED
+            frame.blit(text, (SCREEN_WIDTH * 0.5, SCREEN_HEIGHT * 0.05))
 
 
+    def draw(self):
+        if App.get_instance().supervisor.running:
+            self.dirty_rects = [] # leave the screen alone while a game is running
+            return
 
-        self.flash_free_play()
+        # The screen only has to be recomposed when the selection moves - every game has its own full screen
+        # background, so that's the whole screen. Otherwise only the flashing credits are redrawn.
+        # (and once more when the selected game's screenshot finishes loading)
+        ready = bool(self.menu_items) and self.menu_items[self.selected_index].ready
+        if self.composed_index != self.selected_index or ready != self.composed_ready:
+            self.compose()
+            self.composed_index = self.selected_index
+            self.composed_ready = ready
+            APP_SCREEN.blit(self.frame, (0, 0))
+            self.dirty_rects = [APP_SCREEN.get_rect()]
+        else:
+            self.dirty_rects = []
+
+        if self.menu_items:
+            self.dirty_rects.append(self.flash_free_play())
         # self.show_configuration()
 
         # SHOW MOUSE POSITION
         # if os.getenv("DEBUG", False):
             # self.show_mouse_position()
 
-        pygame.display.flip()
-
 
     def handle_event(self, event):
+        if event.type == GAME_EXITED:
+            self.game_exited(event.run)
+            return
+
+        if event.type == RELOAD_GAMES:
+            self.reload_games(event.reply)
+            return
+
+        # the game has the screen (and the controls) until it exits
+        if App.get_instance().supervisor.running:
+            return
+
         self.last_input_time = time.time()
 
         if event.type == pygame.KEYDOWN:
@@ -227,8 +323,7 @@ class GameSelectView(ViewState):
             return
         
         # TODO: Reimplement with pygame if needed
-        font = pygame.font.SysFont(None, 20)
-        text = font.render(f"{self.mouse_pos}", True, (255, 255, 255))
+        text = text_cache().render(f"{self.mouse_pos}", None, 20, (255, 255, 255))
         APP_SCREEN.blit(text, (self.mouse_pos[0] + 10, self.mouse_pos[1] + 10))
 
 
@@ -265,22 +360,12 @@ class GameSelectView(ViewState):
         logger.info(f"Launching: {' '.join(args)}")
         logger.debug(f"Working directory: {cwd}")
 
+        supervisor = App.get_instance().supervisor
         try:
-            # Launch the game (blocking call)
-            result = subprocess.run(
-                args,
-                cwd=cwd,
-                capture_output=False,  # Let game output go to console
-                text=True
-            )
-            
-            ret_code = result.returncode
-            
-            if ret_code != 0:
-                logger.error(f"Game '{game_name}' exited with code {ret_code}")
-                # TODO: Show error modal
-            else:
-                logger.info(f"Game '{game_name}' exited normally")
+            # returns right away - game_exited() is called when the game is done
+            supervisor.launch(game_name, args, cwd,
+                              timeout=float(os.getenv("GAME_WATCHDOG_SECONDS", GAME_WATCHDOG_SECONDS)),
+                              fork=launch_config.zygote and not venv_python)
         
         except FileNotFoundError as e:
             logger.error(f"Failed to launch game: {e}")
@@ -290,7 +375,18 @@ class GameSelectView(ViewState):
         except Exception as e:
             logger.error(f"Error launching game: {e}")
             # TODO: Show error modal
-        
+
+
+    def game_exited(self, run: GameRun):
+        """The game we launched is gone - take the display back."""
+        if run.timed_out:
+            logger.error(f"Game '{run.name}' was stopped by the watchdog")
+        elif run.exit_code != 0:
+            logger.error(f"Game '{run.name}' exited with code {run.exit_code}")
+            # TODO: Show error modal
+        else:
+            logger.info(f"Game '{run.name}' exited normally")
+
         # Restore display after game exits
         logger.debug("Restoring display after game exit")
         global APP_SCREEN
@@ -300,20 +396,29 @@ class GameSelectView(ViewState):
             APP_SCREEN = pygame.display.set_mode(flags=pygame.FULLSCREEN | pygame.NOFRAME)
         
         pygame.display.set_caption("Lightning Arcade")
+        self.last_input_time = time.time()
+        self.invalidate()
 
 
 
-    def flash_free_play(self):
-        font = pygame.font.SysFont(None, 26)
+    def flash_free_play(self) -> pygame.Rect:
+        """Draw the flashing credits over what was there last frame - returns the part of the screen that changed."""
         alpha = abs((time.time() % 2) - 1)  # calculate alpha value for fade in/out effect
 
-        if os.getenv("FREE_PLAY", False):
-            text_surface = font.render("FREE PLAY", True, pygame.Color("GREEN"))
+        if os.getenv("FREE_PLAY", "True").lower() == "true":
+            text_surface = text_cache().render("FREE PLAY", None, 26, pygame.Color("GREEN"))
         else:
-            text_surface = font.render(f"CREDITS: {self.credits}", True, pygame.Color("RED"))  # RGB tuple for RED
+            text_surface = text_cache().render(f"CREDITS: {self.credits}", None, 26, pygame.Color("RED"))  # RGB tuple for RED
 
-        text_surface.set_alpha(int(alpha * 255))
-        APP_SCREEN.blit(text_surface, (10, 10))
+        text_surface.set_alpha(int(alpha * 255)) # NOTE: this is the cached surface - fine, nothing else draws it
+
+        # the credits text can change width, so clear what was drawn last time as well
+        rect = text_surface.get_rect(topleft=(10, 10))
+        dirty = rect.union(self.flash_rect)
+        APP_SCREEN.blit(self.frame, dirty, area=dirty)
+        APP_SCREEN.blit(text_surface, rect)
+        self.flash_rect = rect
+        return dirty
 
 
     def show_configuration(self):
@@ -323,4 +428,17 @@ class GameSelectView(ViewState):
         
         # TODO: Reimplement with pygame if needed
         # For now, just log that the feature is disabled
-        pass
\ No newline at end of file
+        pass
+
+
+
+def gradient_overlay(width: int, height: int) -> pygame.Surface:
+    """Black on the left fading to clear at the middle of the screen, in 5 pixel wide bands."""
+    gradient_strength = 1
+    gradient_rect_width = 5
+    half = width // 2
+    surface = pygame.Surface((half + gradient_rect_width, height), pygame.SRCALPHA)
+    for i in range(0, half, gradient_rect_width):
+        alpha = int(255 * gradient_strength * ((half - i) / half))
+        surface.fill((0, 0, 0, alpha), (i, 0, gradient_rect_width, height))
+    return surface